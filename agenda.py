@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda de colheitas e visitas às escolas.
+
+Os reatores cheios ficam em um heap ordenado pela data prevista de maturação
+(data_encheu + período de vermicompostagem) e as escolas ativas em outro,
+ordenado pela data da próxima visita. Cada evento (reator encheu, colheita,
+visita) custa O(log n); entradas substituídas ficam no heap e são descartadas
+quando chegam ao topo. A lista do dia reúne as tarefas vencidas por escola.
+
+    python agenda.py   # frota sintética de 10 mil reatores + um ano de eventos
+"""
+import heapq
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from calculos import PROFILE_CH4_VERMI
+
+DIAS_VERMICOMPOSTAGEM = len(PROFILE_CH4_VERMI)  # mesma janela dos perfis de emissão (50 dias)
+INTERVALO_VISITA_DIAS = 30
+
+TAREFA_COLHEITA = "Colheita"
+TAREFA_VISITA = "Visita"
+
+_ORDINAL_1970 = date(1970, 1, 1).toordinal()
+
+def _dia(data):
+    """Data (date, datetime ou Timestamp) como número ordinal de dias."""
+    return data if isinstance(data, (int, np.integer)) else data.toordinal()
+
+def _ordinais(serie):
+    """Datas de uma Series como ordinais (int64), com máscara das datas válidas."""
+    validas = serie.notna().to_numpy()
+    dias = serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype('int64') + _ORDINAL_1970
+    return dias, validas
+
+def _datas(ordinais):
+    return pd.to_datetime(np.asarray(ordinais, dtype='int64') - _ORDINAL_1970, unit='D')
+
+# =============================================================================
+# AGENDA (HEAPS COM REMOÇÃO PREGUIÇOSA)
+# =============================================================================
+
+class Agenda:
+    def __init__(self, dias_vermicompostagem=DIAS_VERMICOMPOSTAGEM, intervalo_visita_dias=INTERVALO_VISITA_DIAS):
+        self.dias_vermicompostagem = dias_vermicompostagem
+        self.intervalo_visita_dias = intervalo_visita_dias
+        self._colheitas = []  # heap de (dia_maturacao, id_reator)
+        self._visitas = []    # heap de (dia_proxima_visita, id_escola)
+        self._reatores = {}   # id_reator -> (dia_maturacao, id_escola) vigente
+        self._escolas = {}    # id_escola -> dia_proxima_visita vigente
+
+    @classmethod
+    def de_tabelas(cls, df_escolas, df_reatores, hoje, dias_vermicompostagem=DIAS_VERMICOMPOSTAGEM,
+                   intervalo_visita_dias=INTERVALO_VISITA_DIAS):
+        """
+        Monta a agenda a partir das tabelas (já compactadas): reatores de
+        processamento cheios e ainda não colhidos, e escolas ativas. Escolas sem
+        'ultima_visita' usam 'data_implantacao'; sem nenhuma das duas, vencem hoje.
+        """
+        agenda = cls(dias_vermicompostagem, intervalo_visita_dias)
+        hoje = _dia(hoje)
+
+        escolas = df_escolas[df_escolas['is_ativo']] if 'is_ativo' in df_escolas.columns else df_escolas
+        referencia = pd.Series(pd.NaT, index=escolas.index, dtype='datetime64[ns]')
+        for col in ('ultima_visita', 'data_implantacao'):
+            if col in escolas.columns:
+                referencia = referencia.fillna(escolas[col])
+        dias, validas = _ordinais(referencia)
+        proximas = np.where(validas, dias + intervalo_visita_dias, hoje)
+        agenda._escolas = dict(zip(escolas['id_escola'].astype(str), proximas.tolist()))
+        agenda._visitas = [(dia, id_escola) for id_escola, dia in agenda._escolas.items()]
+        heapq.heapify(agenda._visitas)
+
+        if 'data_encheu' in df_reatores.columns:
+            pendentes = df_reatores['data_encheu'].notna()
+            if 'is_liquido' in df_reatores.columns:
+                pendentes &= ~df_reatores['is_liquido']
+            if 'data_colheita' in df_reatores.columns:
+                pendentes &= df_reatores['data_colheita'].isna()
+            reatores = df_reatores[pendentes]
+            dias, _ = _ordinais(reatores['data_encheu'])
+            maturacao = (dias + dias_vermicompostagem).tolist()
+            ids = reatores['id_reator'].astype(str).tolist()
+            agenda._reatores = dict(zip(ids, zip(maturacao, reatores['id_escola'].astype(str).tolist())))
+            agenda._colheitas = list(zip(maturacao, ids))
+            heapq.heapify(agenda._colheitas)
+        return agenda
+
+    # -------------------------------------------------------------------------
+    # Eventos: O(log n) cada
+    # -------------------------------------------------------------------------
+
+    def registrar_enchimento(self, id_reator, id_escola, data_encheu):
+        dia = _dia(data_encheu) + self.dias_vermicompostagem
+        if self._reatores.get(id_reator, (None,))[0] != dia:
+            self._reatores[id_reator] = (dia, id_escola)
+            heapq.heappush(self._colheitas, (dia, id_reator))
+            self._compactar()
+
+    def registrar_colheita(self, id_reator, data_colheita):
+        """Retira o reator da agenda; a colheita conta como visita à escola."""
+        _, id_escola = self._reatores.pop(id_reator)
+        self.registrar_visita(id_escola, data_colheita)
+
+    def registrar_visita(self, id_escola, data_visita):
+        dia = _dia(data_visita) + self.intervalo_visita_dias
+        if dia > self._escolas.get(id_escola, dia - 1):
+            self._escolas[id_escola] = dia
+            heapq.heappush(self._visitas, (dia, id_escola))
+            self._compactar()
+
+    def _compactar(self):
+        # Reconstrói um heap quando as entradas substituídas passam da metade
+        if len(self._colheitas) > 2 * len(self._reatores) + 64:
+            self._colheitas = [(dia, id_reator) for id_reator, (dia, _) in self._reatores.items()]
+            heapq.heapify(self._colheitas)
+        if len(self._visitas) > 2 * len(self._escolas) + 64:
+            self._visitas = [(dia, id_escola) for id_escola, dia in self._escolas.items()]
+            heapq.heapify(self._visitas)
+
+    # -------------------------------------------------------------------------
+    # Consultas: O(k log n) para k tarefas vencidas
+    # -------------------------------------------------------------------------
+
+    def _vencidas(self, heap, vigente, dia):
+        vencidas = []
+        while heap and heap[0][0] <= dia:
+            entrada = heapq.heappop(heap)
+            if vigente(entrada):
+                vencidas.append(entrada)
+        for entrada in vencidas:
+            heapq.heappush(heap, entrada)
+        return vencidas
+
+    def colheitas_vencidas(self, data):
+        """[(dia_maturacao, id_reator, id_escola)] dos reatores maduros até 'data'."""
+        vencidas = self._vencidas(self._colheitas, lambda e: self._reatores.get(e[1], (None,))[0] == e[0],
+                                  _dia(data))
+        return [(dia, id_reator, self._reatores[id_reator][1]) for dia, id_reator in vencidas]
+
+    def visitas_vencidas(self, data):
+        """[(dia_proxima_visita, id_escola)] das escolas com visita vencida até 'data'."""
+        return self._vencidas(self._visitas, lambda e: self._escolas.get(e[1]) == e[0], _dia(data))
+
+    def lista_do_dia(self, data):
+        """
+        Tarefas vencidas em 'data', agrupadas por escola. As escolas são
+        ordenadas pela tarefa mais atrasada e depois pelo número de tarefas;
+        dentro de cada escola, a visita vem antes das colheitas.
+        """
+        hoje = _dia(data)
+        linhas = [(id_escola, TAREFA_VISITA, None, dia) for dia, id_escola in self.visitas_vencidas(hoje)]
+        linhas += [(id_escola, TAREFA_COLHEITA, id_reator, dia)
+                   for dia, id_reator, id_escola in self.colheitas_vencidas(hoje)]
+        colunas = ['prioridade', 'id_escola', 'tarefa', 'id_reator', 'data_prevista', 'dias_atraso']
+        if not linhas:
+            return pd.DataFrame(columns=colunas)
+        df = pd.DataFrame(linhas, columns=['id_escola', 'tarefa', 'id_reator', 'dia'])
+        df['dias_atraso'] = hoje - df['dia']
+        por_escola = df.groupby('id_escola').agg(maior_atraso=('dias_atraso', 'max'), tarefas=('tarefa', 'size'))
+        por_escola = por_escola.sort_values(['maior_atraso', 'tarefas'], ascending=False)
+        df['prioridade'] = df['id_escola'].map(pd.Series(np.arange(1, len(por_escola) + 1), index=por_escola.index))
+        df['ordem_tarefa'] = (df['tarefa'] == TAREFA_COLHEITA).astype(int)
+        df = df.sort_values(['prioridade', 'ordem_tarefa', 'dias_atraso', 'id_reator'],
+                            ascending=[True, True, False, True], ignore_index=True)
+        df['data_prevista'] = _datas(df['dia'])
+        return df[colunas]
+
+    def __contains__(self, id_reator):
+        return id_reator in self._reatores
+
+    def __len__(self):
+        return len(self._reatores)
+
+# =============================================================================
+# SIMULAÇÃO E MEDIÇÃO
+# =============================================================================
+
+def simular_ano(agenda, inicio, dias=365, enchendo=(), prob_visita=0.5, semente=42):
+    """
+    Simula 'dias' dias de operação: os reatores 'enchendo' [(id_reator,
+    id_escola)] enchem nos primeiros 40 dias; a cada dia, todos os reatores
+    maduros são colhidos e reenchem entre 10 e 40 dias depois, e parte das
+    escolas atrasadas é visitada. Retorna o número de eventos registrados.
+    """
+    rng = np.random.default_rng(semente)
+    inicio = _dia(inicio)
+    reenchimentos = {}  # dia -> [(id_reator, id_escola)]
+    for reator, atraso in zip(enchendo, rng.integers(0, 41, len(enchendo))):
+        reenchimentos.setdefault(inicio + int(atraso), []).append(reator)
+    eventos = 0
+    for dia in range(inicio, inicio + dias):
+        for id_reator, id_escola in reenchimentos.pop(dia, ()):
+            agenda.registrar_enchimento(id_reator, id_escola, dia)
+            eventos += 1
+        colheitas = agenda.colheitas_vencidas(dia)
+        atrasos = rng.integers(10, 41, len(colheitas))
+        for (_, id_reator, id_escola), atraso in zip(colheitas, atrasos):
+            agenda.registrar_colheita(id_reator, dia)
+            reenchimentos.setdefault(dia + int(atraso), []).append((id_reator, id_escola))
+            eventos += 1
+        visitas = agenda.visitas_vencidas(dia)
+        for (_, id_escola), visitar in zip(visitas, rng.random(len(visitas)) < prob_visita):
+            if visitar:
+                agenda.registrar_visita(id_escola, dia)
+                eventos += 1
+    return eventos
+
+def medir_desempenho(n_reatores=10_000, n_escolas=200, dias=365):
+    """Tempo para montar a agenda de uma frota sintética, simular um ano e gerar a lista do dia."""
+    from dados import compactar_tabelas, tabelas_sinteticas
+    df_escolas, df_reatores, _ = tabelas_sinteticas(n_reatores, n_escolas)
+    df_escolas, df_reatores = compactar_tabelas(df_escolas, df_reatores)
+    hoje = pd.Timestamp.today().normalize()
+    inicio = time.perf_counter()
+    agenda = Agenda.de_tabelas(df_escolas, df_reatores, hoje)
+    montagem = time.perf_counter() - inicio
+    processamento = df_reatores[~df_reatores['is_liquido']]
+    enchendo = [(id_reator, id_escola) for id_reator, id_escola
+                in zip(processamento['id_reator'].astype(str), processamento['id_escola'].astype(str))
+                if id_reator not in agenda]
+    inicio = time.perf_counter()
+    eventos = simular_ano(agenda, hoje, dias, enchendo)
+    simulacao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    lista = agenda.lista_do_dia(hoje.toordinal() + dias)
+    lista_do_dia = time.perf_counter() - inicio
+    return {'reatores': n_reatores, 'escolas': n_escolas, 'eventos': eventos, 'montagem_s': montagem,
+            'simulacao_s': simulacao, 'lista_do_dia_s': lista_do_dia,
+            'total_s': montagem + simulacao + lista_do_dia, 'tarefas_no_fim': len(lista)}
+
+if __name__ == "__main__":
+    for chave, valor in medir_desempenho().items():
+        print(f"{chave}: {valor:.3f}" if isinstance(valor, float) else f"{chave}: {valor}")
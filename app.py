@@ -1,15 +1,35 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
-import numpy as np
 from io import BytesIO
+import logging
 import math
+import os
+import threading
+import time
 import yfinance as yf
 
+# Os DataFrames em cache_resource são compartilhados entre sessões; com Copy-on-Write
+# (padrão a partir do pandas 3) o que cada sessão deriva deles nunca altera o original.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+from formatacao import formatar_br, formatar_moeda_br, formatar_tco2eq
+from dados import ler_planilha_validada, compactar_tabelas, preparar_gastos
+import calculos
+import graficos
+from calculos import DENSIDADE_PADRAO, K_ANO_PADRAO, PHI_BASELINE
+from custos import agregar_gastos, custo_por_escola, custo_ao_longo_do_tempo
+from exportacao import FORMATOS, exportar_pacote
+from sensibilidade import dados_tornado, elasticidades_frota
+import valoracao
+from relatorios import empacotar_relatorios
+from agenda import DIAS_VERMICOMPOSTAGEM, INTERVALO_VISITA_DIAS, TAREFA_COLHEITA, TAREFA_VISITA, Agenda
+from tabelas import coluna_data, coluna_moeda, coluna_numero, coluna_tco2eq, exibir_tabela, paginar
+
 # =============================================================================
 # CONFIGURAÇÕES INICIAIS
 # =============================================================================
@@ -27,51 +47,21 @@ st.markdown("**Cálculo de créditos de carbono baseado no modelo científico de
 # CONFIGURAÇÕES FIXAS
 # =============================================================================
 
-URL_EXCEL = "https://raw.githubusercontent.com/loopvinyl/Controladoria-Compostagem-nas-Escolas/main/dados_vermicompostagem_real.xlsx"
-DENSIDADE_PADRAO = 0.6  # kg/L - para resíduos de vegetais, frutas e borra de café
-K_ANO_PADRAO = 0.06     # Taxa de decaimento anual padrão (IPCC para resíduos alimentares)
-PHI_BASELINE = 0.85     # Fator φ (UNFCCC 2024) para clima úmido
-
-# =============================================================================
-# FUNÇÕES DE FORMATAÇÃO BRASILEIRA (AJUSTADAS: >=1 → 2 casas; <1 → 4 casas)
-# =============================================================================
-
-def formatar_br(numero, casas_decimais=None):
-    """
-    Formata número no padrão brasileiro (ponto milhar, vírgula decimal).
-    Se casas_decimais for None, define automaticamente:
-        - valores >= 1: 2 casas decimais
-        - valores < 1: 4 casas decimais
-    """
-    if numero is None or pd.isna(numero):
-        return "N/A"
-    try:
-        numero = float(numero)
-        if casas_decimais is None:
-            if abs(numero) >= 1:
-                casas_decimais = 2
-            else:
-                casas_decimais = 4
-        numero_arredondado = round(numero, casas_decimais)
-        if casas_decimais == 0:
-            return f"{numero_arredondado:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        else:
-            formato = f"{{:,.{casas_decimais}f}}"
-            return formato.format(numero_arredondado).replace(",", "X").replace(".", ",").replace("X", ".")
-    except (ValueError, TypeError):
-        return "N/A"
-
-def formatar_moeda_br(valor, simbolo="R$", casas_decimais=None):
-    return f"{simbolo} {formatar_br(valor, casas_decimais)}"
+URL_EXCEL = os.environ.get("URL_EXCEL", "https://raw.githubusercontent.com/loopvinyl/Controladoria-Compostagem-nas-Escolas/main/dados_vermicompostagem_real.xlsx")
+TTL_COTACOES = 3600     # segundos em que as cotações ficam em cache entre sessões
+LINHAS_POR_PAGINA_ATIVOS = 20  # reatores por página na lista de compra (cada um cria 5 widgets)
+COTACOES_LOCAIS = os.environ.get("COTACOES_LOCAIS") == "1"  # usa só as cotações de referência (testes de carga)
 
-def formatar_tco2eq(valor):
-    return f"{formatar_br(valor)} tCO₂eq"
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # FUNÇÕES DE COTAÇÃO DO CARBONO (YAHOO FINANCE + FALLBACK)
 # =============================================================================
 
+@st.cache_data(ttl=TTL_COTACOES, show_spinner=False)
 def obter_cotacao_carbono():
+    if COTACOES_LOCAIS:
+        return 85.50, "€", "Carbon Emissions (Referência)", False, "Referência"
     try:
         ticker = yf.Ticker("CO2.L")
         data = ticker.history(period="1d")
@@ -83,7 +73,10 @@ def obter_cotacao_carbono():
     except Exception:
         return 85.50, "€", "Carbon Emissions (Referência)", False, "Referência"
 
+@st.cache_data(ttl=TTL_COTACOES, show_spinner=False)
 def obter_cotacao_euro_real():
+    if COTACOES_LOCAIS:
+        return 5.50, "R$", False, "Referência"
     try:
         url = "https://economia.awesomeapi.com.br/last/EUR-BRL"
         response = requests.get(url, timeout=10)
@@ -117,6 +110,9 @@ def exibir_cotacao_carbono():
             st.session_state.mostrar_atualizacao = True
     if st.session_state.get('mostrar_atualizacao', False):
         st.sidebar.info("🔄 Atualizando cotações...")
+        if st.session_state.get('cotacao_atualizada', False):
+            obter_cotacao_carbono.clear()
+            obter_cotacao_euro_real.clear()
         preco_carbono, moeda, _, _, fonte_carbono = obter_cotacao_carbono()
         preco_euro, moeda_real, _, _ = obter_cotacao_euro_real()
         st.session_state.preco_carbono = preco_carbono
@@ -207,85 +203,17 @@ def inicializar_session_state():
 # CARREGAMENTO DOS DADOS REAIS
 # =============================================================================
 
-@st.cache_data
+@st.cache_resource(show_spinner=False)
 def carregar_dados_excel(url):
+    """Planilha validada e compactada, uma única cópia no processo para todas as sessões (somente leitura)."""
     try:
         loading_placeholder = st.empty()
         loading_placeholder.info("📥 Carregando dados do Excel...")
-        excel_file = pd.ExcelFile(url)
-        df_escolas = pd.read_excel(url, sheet_name='escolas')
-        df_reatores = pd.read_excel(url, sheet_name='reatores')
-        df_gastos = pd.read_excel(url, sheet_name='gastos')
-        df_reatores = df_reatores.dropna(how='all')
-        df_escolas = df_escolas.dropna(how='all')
-        df_gastos = df_gastos.dropna(how='all')
-        if 'id_reator' in df_reatores.columns:
-            df_reatores = df_reatores.dropna(subset=['id_reator'])
-            df_reatores = df_reatores[df_reatores['id_reator'].astype(str).str.strip() != '']
-            # Remove duplicatas
-            df_reatores = df_reatores.drop_duplicates(subset=['id_reator'], keep='first')
+        df_escolas, df_reatores, df_gastos, df_erros = ler_planilha_validada(url, DENSIDADE_PADRAO)
         loading_placeholder.empty()
-
-        # Datas
-        colunas_data_escolas = ['data_implantacao', 'ultima_visita']
-        for col in colunas_data_escolas:
-            if col in df_escolas.columns:
-                try:
-                    df_escolas[col] = pd.to_datetime(df_escolas[col], dayfirst=True, errors='coerce')
-                except:
-                    df_escolas[col] = pd.to_datetime(df_escolas[col], errors='coerce')
-        colunas_data_reatores = ['data_ativacao', 'data_encheu', 'data_colheita']
-        for col in colunas_data_reatores:
-            if col in df_reatores.columns:
-                try:
-                    df_reatores[col] = pd.to_datetime(df_reatores[col], dayfirst=True, errors='coerce')
-                except:
-                    df_reatores[col] = pd.to_datetime(df_reatores[col], errors='coerce')
-        if 'data_compra' in df_gastos.columns:
-            try:
-                df_gastos['data_compra'] = pd.to_datetime(df_gastos['data_compra'], dayfirst=True, errors='coerce')
-            except:
-                df_gastos['data_compra'] = pd.to_datetime(df_gastos['data_compra'], errors='coerce')
-
-        # Tratamento de capacidade_total_sistema_litros nas escolas
-        if 'capacidade_total_sistema_litros' in df_escolas.columns:
-            df_escolas['capacidade_total_sistema_litros'] = pd.to_numeric(df_escolas['capacidade_total_sistema_litros'], errors='coerce')
-
-        # NOVA LÓGICA DE CAPACIDADE DOS REATORES
-        # Se existir 'volume_calculado_litros', usa-o; senão calcula por dimensões
-        if 'volume_calculado_litros' in df_reatores.columns:
-            df_reatores['volume_calculado_litros'] = pd.to_numeric(df_reatores['volume_calculado_litros'], errors='coerce')
-            dimensoes_cols = ['altura_cm', 'largura_cm', 'comprimento_cm']
-            if all(col in df_reatores.columns for col in dimensoes_cols):
-                for col in dimensoes_cols:
-                    df_reatores[col] = pd.to_numeric(df_reatores[col], errors='coerce')
-                calculado = (df_reatores['altura_cm'] * df_reatores['largura_cm'] * df_reatores['comprimento_cm']) / 1000
-                df_reatores['capacidade_litros'] = df_reatores['volume_calculado_litros'].fillna(calculado)
-            else:
-                df_reatores['capacidade_litros'] = df_reatores['volume_calculado_litros'].fillna(100)
-        else:
-            dimensoes_cols = ['altura_cm', 'largura_cm', 'comprimento_cm']
-            if all(col in df_reatores.columns for col in dimensoes_cols):
-                for col in dimensoes_cols:
-                    df_reatores[col] = pd.to_numeric(df_reatores[col], errors='coerce')
-                df_reatores['capacidade_litros'] = (df_reatores['altura_cm'] * 
-                                                    df_reatores['largura_cm'] * 
-                                                    df_reatores['comprimento_cm']) / 1000
-            else:
-                df_reatores['capacidade_litros'] = 100
-
-        df_reatores['capacidade_litros'] = df_reatores['capacidade_litros'].round(2).fillna(100)
-
-        # NOVA LÓGICA DE PESO ESTIMADO
-        if 'peso_estimado_kg' in df_reatores.columns:
-            df_reatores['peso_estimado_kg'] = pd.to_numeric(df_reatores['peso_estimado_kg'], errors='coerce')
-            df_reatores['residuo_kg_estimado'] = df_reatores['peso_estimado_kg'].fillna(
-                df_reatores['capacidade_litros'] * DENSIDADE_PADRAO)
-        else:
-            df_reatores['residuo_kg_estimado'] = df_reatores['capacidade_litros'] * DENSIDADE_PADRAO
-        df_reatores['residuo_kg_estimado'] = df_reatores['residuo_kg_estimado'].round(1)
-
-        return df_escolas, df_reatores, df_gastos
+        df_escolas, df_reatores = compactar_tabelas(df_escolas, df_reatores)
+        df_gastos = preparar_gastos(df_gastos)
+        return df_escolas, df_reatores, df_gastos, df_erros
     except Exception as e:
         if 'loading_placeholder' in locals():
             loading_placeholder.empty()
@@ -295,241 +223,50 @@ def carregar_dados_excel(url):
             st.error(f"📋 Abas encontradas: {excel_file.sheet_names}")
         except Exception as diag_error:
             st.error(f"❌ Erro no diagnóstico: {diag_error}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def filtrar_por_escola(url, escola):
+    """Recorte das tabelas por escola, compartilhado entre as sessões que escolhem o mesmo filtro."""
+    df_escolas, df_reatores, _, _ = carregar_dados_excel(url)
+    if escola == "Todas as escolas":
+        return df_escolas, df_reatores
+    return df_escolas[df_escolas['id_escola'] == escola], df_reatores[df_reatores['id_escola'] == escola]
 
 # =============================================================================
-# FUNÇÕES DE CÁLCULO CIENTÍFICO – COM PERFIS TEMPORAIS CORRIGIDOS
+# FUNÇÕES DE CÁLCULO CIENTÍFICO (modelo em calculos.py, com cache compartilhado no servidor)
 # =============================================================================
 
-# Parâmetros de pré-descarte (idênticos ao app.py)
-CH4_PRE_KG_POR_KG_DIA = 2.78 * (16/12) * 24 / 1_000_000_000   # kg CH4 / kg resíduo / dia
-N2O_PRE_TOTAL_KG_POR_KG = 20.26 * (44/28) / 1_000_000        # kg N2O / kg resíduo (total em 3 dias)
-PROFILE_N2O_PRE = {1: 0.8623, 2: 0.10, 3: 0.0377}            # distribuição diária do N2O pré-descarte
-
-# Perfis diários de emissão para vermicompostagem (50 dias, normalizados)
-# Conforme Yang et al. 2017 e utilizados no app.py e Colab
-PROFILE_CH4_VERMI = np.array([
-    0.02, 0.02, 0.02, 0.03, 0.03, 0.04, 0.04, 0.05, 0.05, 0.06,
-    0.07, 0.08, 0.09, 0.10, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04,
-    0.03, 0.02, 0.02, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
-    0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005,
-    0.002, 0.002, 0.002, 0.002, 0.002, 0.001, 0.001, 0.001, 0.001, 0.001
-])
-PROFILE_CH4_VERMI = PROFILE_CH4_VERMI / PROFILE_CH4_VERMI.sum()
-
-PROFILE_N2O_VERMI = np.array([
-    0.15, 0.10, 0.20, 0.05, 0.03, 0.03, 0.03, 0.04, 0.05, 0.06,
-    0.08, 0.09, 0.10, 0.08, 0.07, 0.06, 0.05, 0.04, 0.03, 0.02,
-    0.01, 0.01, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005,
-    0.002, 0.002, 0.002, 0.002, 0.002, 0.001, 0.001, 0.001, 0.001, 0.001,
-    0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001
-])
-PROFILE_N2O_VERMI = PROFILE_N2O_VERMI / PROFILE_N2O_VERMI.sum()
-
-# Perfil diário de N2O para o aterro (Wang et al. 2017) – 5 dias
-PROFILE_N2O_LANDFILL_DAILY = np.array([0.10, 0.30, 0.40, 0.15, 0.05], dtype=float)
-PROFILE_N2O_LANDFILL_DAILY = PROFILE_N2O_LANDFILL_DAILY / PROFILE_N2O_LANDFILL_DAILY.sum()
+_calcular_emissoes_reator = st.cache_data(show_spinner=False)(calculos.calcular_emissoes_evitadas_reator_detalhado)
+# Resultados sobre a frota: compartilhados entre sessões, sem cópia por sessão (somente leitura)
+_calcular_creditos_reatores = st.cache_resource(max_entries=64, show_spinner=False)(calculos.calcular_creditos_reatores)
+_calcular_elasticidades = st.cache_resource(max_entries=32, show_spinner=False)(elasticidades_frota)
 
-def calcular_emissoes_evitadas_reator_detalhado(capacidade_litros, periodo_anos=10):
-    """
-    Calcula as emissões evitadas para um único reator (carga única).
-    Inclui:
-      - Aterro (baseline): CH₄ com decaimento exponencial (método FOD) + φ,
-        N₂O com perfil diário de 5 dias (Wang et al.) + pré‑descarte,
-      - Vermicompostagem: CH₄ e N₂O com perfis diários de 50 dias (Yang et al.),
-      - Pré‑descarte: CH₄ constante diária nos 3 dias, N₂O distribuído nos 3 dias.
-    Retorna dicionário com todos os valores intermediários e finais.
-    """
-    residuo_kg = capacidade_litros * DENSIDADE_PADRAO
-    T = 25
-    DOC = 0.15
-    DOCf = 0.0147 * T + 0.28
-    MCF = 1.0
-    F = 0.5
-    OX = 0.1
-    Ri = 0.0
-    phi = PHI_BASELINE
-    TOC_YANG = 0.436
-    TN_YANG = 14.2 / 1000
-    CH4_C_FRAC_YANG = 0.13 / 100
-    N2O_N_FRAC_YANG = 0.92 / 100
-    umidade = 0.85
-    fracao_ms = 1 - umidade
-    GWP_CH4_20 = 79.7
-    GWP_N2O_20 = 273
+# Figuras memorizadas pelo hash dos dados de entrada (objeto compartilhado, não é alterado depois)
+figura_pizza = st.cache_resource(max_entries=64, show_spinner=False)(graficos.figura_pizza)
+figura_linha = st.cache_resource(max_entries=16, show_spinner=False)(graficos.figura_linha)
+figura_tornado = st.cache_resource(max_entries=16, show_spinner=False)(graficos.figura_tornado)
 
+def calcular_emissoes_evitadas_reator_detalhado(capacidade_litros, periodo_anos=10):
     k_ano_atual = st.session_state.get('k_ano', K_ANO_PADRAO)
-    k_dia = k_ano_atual / 365.0
-    dias_simulacao = periodo_anos * 365
-    t = np.arange(1, dias_simulacao + 1, dtype=float)
-
-    # ==================== ATERRO (BASELINE) ====================
-
-    # --- CH₄ (FOD com kernel exponencial) ---
-    # Potencial total de CH₄ (kg) que poderia ser gerado se todo o resíduo fosse degradado
-    ch4_potencial_total = residuo_kg * DOC * DOCf * MCF * F * (16/12) * (1 - Ri) * (1 - OX)
-    # Fração emitida no período (soma do kernel exponencial)
-    kernel_ch4 = np.exp(-k_dia * (t - 1)) - np.exp(-k_dia * t)
-    kernel_ch4 = np.maximum(kernel_ch4, 0)
-    fracao_ch4_emitida = kernel_ch4.sum()
-    ch4_emitido_periodo_bruto = ch4_potencial_total * fracao_ch4_emitida
-    ch4_emitido_aterro = ch4_emitido_periodo_bruto * phi   # aplica φ apenas ao CH4
-
-    # --- N₂O do aterro (Wang et al. 2017) com perfil diário ---
-    # Fator de abertura
-    f_aberto = (50.0 / residuo_kg) * (8.0 / 24)  # massa exposta ≈ 50 kg
-    f_aberto = np.clip(f_aberto, 0.0, 1.0)
-    E_aberto = 1.91
-    E_fechado = 2.15
-    E_medio = f_aberto * E_aberto + (1 - f_aberto) * E_fechado
-    fator_umid = (1 - umidade) / (1 - 0.55)
-    E_medio_ajust = E_medio * fator_umid
-    fator_n2o_por_kg = (E_medio_ajust * (44/28) / 1_000_000)   # kg N2O / kg residuo
-    n2o_total_aterro = residuo_kg * fator_n2o_por_kg
-
-    # Convolução do pulso único com o kernel diário de 5 dias
-    pulse = np.zeros(dias_simulacao)
-    pulse[0] = n2o_total_aterro   # carga total no dia zero
-    n2o_aterro_diario = np.convolve(pulse, PROFILE_N2O_LANDFILL_DAILY, mode='full')[:dias_simulacao]
-    n2o_emitido_aterro = n2o_aterro_diario.sum()
-
-    # --- Pré‑descarte (CH₄ e N₂O) ---
-    # CH₄ pré-descarte: constante durante os 3 dias iniciais
-    ch4_pre_total = residuo_kg * CH4_PRE_KG_POR_KG_DIA * 3
-    # N₂O pré-descarte: total distribuído em 3 dias conforme perfil
-    n2o_pre_total = residuo_kg * N2O_PRE_TOTAL_KG_POR_KG
-    # Distribuição sobre os dias (pulso único, mas distribuído)
-    n2o_pre_diario = np.zeros(dias_simulacao)
-    for atraso, frac in PROFILE_N2O_PRE.items():
-        idx = atraso - 1
-        if idx < dias_simulacao:
-            n2o_pre_diario[idx] += n2o_pre_total * frac
-    n2o_pre_emitido = n2o_pre_diario.sum()
-
-    # Somar pré‑descarte ao aterro (não multiplicado por φ)
-    ch4_emitido_aterro += ch4_pre_total
-    n2o_emitido_aterro += n2o_pre_emitido
-
-    # ==================== VERMICOMPOSTAGEM ====================
-    # Cálculo das emissões totais potenciais (kg) para o resíduo
-    ch4_potencial_vermi = residuo_kg * (TOC_YANG * CH4_C_FRAC_YANG * (16/12) * fracao_ms)
-    n2o_potencial_vermi = residuo_kg * (TN_YANG * N2O_N_FRAC_YANG * (44/28) * fracao_ms)
-
-    # Distribuição temporal com perfis diários de 50 dias
-    pulse_vermi = np.zeros(dias_simulacao)
-    pulse_vermi[0] = 1.0   # marcador para convolução
-    # Convolver cada perfil com o pulso unitário
-    ch4_vermi_diario = np.convolve(pulse_vermi, PROFILE_CH4_VERMI, mode='full')[:dias_simulacao]
-    n2o_vermi_diario = np.convolve(pulse_vermi, PROFILE_N2O_VERMI, mode='full')[:dias_simulacao]
-    # Multiplicar pelos fatores de emissão totais
-    ch4_vermi_diario *= ch4_potencial_vermi
-    n2o_vermi_diario *= n2o_potencial_vermi
-    ch4_emitido_vermi = ch4_vermi_diario.sum()
-    n2o_emitido_vermi = n2o_vermi_diario.sum()
-
-    # ==================== EMISSÕES EM CO₂eq ====================
-    emissao_aterro_kgco2eq = (ch4_emitido_aterro * GWP_CH4_20 +
-                              n2o_emitido_aterro * GWP_N2O_20)
-    emissao_vermi_kgco2eq = (ch4_emitido_vermi * GWP_CH4_20 +
-                             n2o_emitido_vermi * GWP_N2O_20)
-    emissoes_evitadas_tco2eq = (emissao_aterro_kgco2eq - emissao_vermi_kgco2eq) / 1000
-
-    # ==================== DICIONÁRIO DE SAÍDA (compatível com a interface original) ====================
-    return {
-        'residuo_kg': residuo_kg,
-        'ch4_total_aterro': ch4_potencial_total,
-        'ch4_emitido_aterro_bruto': ch4_emitido_periodo_bruto,
-        'ch4_pre_descarte': ch4_pre_total,
-        'ch4_emitido_aterro_periodo': ch4_emitido_aterro,
-        'n2o_total_aterro': n2o_total_aterro,
-        'n2o_pre_descarte': n2o_pre_total,
-        'n2o_emitido_aterro_periodo': n2o_emitido_aterro,
-        'ch4_total_compostagem': ch4_potencial_vermi,
-        'n2o_total_compostagem': n2o_potencial_vermi,
-        'ch4_emitido_compostagem_periodo': ch4_emitido_vermi,
-        'n2o_emitido_compostagem_periodo': n2o_emitido_vermi,
-        'emissao_aterro_kgco2eq': emissao_aterro_kgco2eq,
-        'emissao_compostagem_kgco2eq': emissao_vermi_kgco2eq,
-        'emissoes_evitadas_tco2eq': emissoes_evitadas_tco2eq,
-        'parametros': {
-            'capacidade_litros': capacidade_litros,
-            'densidade_kg_l': DENSIDADE_PADRAO,
-            'periodo_anos': periodo_anos,
-            'k_ano': k_ano_atual,
-            'fracao_ch4_emitida': fracao_ch4_emitida,
-            'phi': phi,
-            'T': T, 'DOC': DOC, 'DOCf': DOCf,
-            'TOC_YANG': TOC_YANG, 'TN_YANG': TN_YANG,
-            'CH4_C_FRAC_YANG': CH4_C_FRAC_YANG, 'N2O_N_FRAC_YANG': N2O_N_FRAC_YANG,
-            'umidade': umidade,
-            'GWP_CH4_20': GWP_CH4_20, 'GWP_N2O_20': GWP_N2O_20,
-            'f_aberto': f_aberto, 'E_medio': E_medio,
-            'E_medio_ajust': E_medio_ajust, 'fator_umid': fator_umid,
-            'ch4_pre_dia_kg': CH4_PRE_KG_POR_KG_DIA,
-            'n2o_pre_total_kg': N2O_PRE_TOTAL_KG_POR_KG
-        }
-    }
+    return _calcular_emissoes_reator(float(capacidade_litros), periodo_anos, k_ano_atual)
 
 def calcular_emissoes_evitadas_reator(capacidade_litros):
     resultado = calcular_emissoes_evitadas_reator_detalhado(capacidade_litros)
     return resultado['residuo_kg'], resultado['emissoes_evitadas_tco2eq']
 
 def processar_reatores_cheios(df_reatores, df_escolas):
-    reatores_cheios = df_reatores[df_reatores['data_encheu'].notna()].copy()
-    # Remove reatores do tipo Líquido (coletores de chorume)
-    if 'tipo_caixa' in reatores_cheios.columns:
-        reatores_cheios = reatores_cheios[~reatores_cheios['tipo_caixa'].str.lower().str.contains('líquido|liquido')]
-    if reatores_cheios.empty:
-        return pd.DataFrame(), 0, 0, []
-    resultados = []
-    total_residuo = 0
-    total_emissoes_evitadas = 0
-    detalhes_calculo = []
-    for _, reator in reatores_cheios.iterrows():
-        capacidade = reator['capacidade_litros'] if pd.notna(reator['capacidade_litros']) else 100
-        resultado_detalhado = calcular_emissoes_evitadas_reator_detalhado(capacidade, st.session_state.periodo_credito)
-        residuo_kg = resultado_detalhado['residuo_kg']
-        emissoes_evitadas = resultado_detalhado['emissoes_evitadas_tco2eq']
-        detalhes_calculo.append({
-            'id_reator': reator['id_reator'],
-            'id_escola': reator['id_escola'],
-            'capacidade_litros': capacidade,
-            'residuo_kg': residuo_kg,
-            'emissoes_evitadas_tco2eq': emissoes_evitadas,
-            'calculo_detalhado': resultado_detalhado,
-            'altura_cm': reator.get('altura_cm', 'N/A'),
-            'largura_cm': reator.get('largura_cm', 'N/A'),
-            'comprimento_cm': reator.get('comprimento_cm', 'N/A')
-        })
-        resultados.append({
-            'id_reator': reator['id_reator'],
-            'id_escola': reator['id_escola'],
-            'data_encheu': reator['data_encheu'],
-            'capacidade_litros': capacidade,
-            'residuo_kg': residuo_kg,
-            'emissoes_evitadas_tco2eq': emissoes_evitadas,
-            'altura_cm': reator.get('altura_cm', 'N/A'),
-            'largura_cm': reator.get('largura_cm', 'N/A'),
-            'comprimento_cm': reator.get('comprimento_cm', 'N/A')
-        })
-        total_residuo += residuo_kg
-        total_emissoes_evitadas += emissoes_evitadas
-    df_resultados = pd.DataFrame(resultados)
-    if 'nome_escola' in df_escolas.columns and 'id_escola' in df_resultados.columns:
-        df_resultados = df_resultados.merge(df_escolas[['id_escola', 'nome_escola']], on='id_escola', how='left')
-    return df_resultados, total_residuo, total_emissoes_evitadas, detalhes_calculo
+    return _calcular_creditos_reatores(df_reatores, df_escolas, st.session_state.periodo_credito,
+                                       st.session_state.get('k_ano', K_ANO_PADRAO))
 
 def analisar_escolas_ativas_com_reatores_ativos(df_escolas, df_reatores):
-    if 'status' in df_escolas.columns:
-        escolas_ativas = df_escolas[df_escolas['status'] == 'Ativo'].copy()
-    else:
-        escolas_ativas = df_escolas.copy()
+    escolas_ativas = df_escolas[df_escolas['is_ativo']].copy()
     if 'status_reator' in df_reatores.columns:
         reatores_ativos = df_reatores[df_reatores['status_reator'].notna()].copy()
     else:
         reatores_ativos = pd.DataFrame()
     if not reatores_ativos.empty and 'id_escola' in reatores_ativos.columns:
-        contagem = reatores_ativos.groupby('id_escola').size().reset_index(name='reatores_ativos')
+        contagem = reatores_ativos.groupby('id_escola', observed=True).size().reset_index(name='reatores_ativos')
         escolas_com = escolas_ativas.merge(contagem, on='id_escola', how='left')
         escolas_com['reatores_ativos'] = escolas_com['reatores_ativos'].fillna(0)
         return escolas_com
@@ -540,22 +277,88 @@ def analisar_escolas_ativas_com_reatores_ativos(df_escolas, df_reatores):
 def analisar_gastos(df_gastos):
     if df_gastos.empty:
         return pd.DataFrame(), 0
-    if 'valor' in df_gastos.columns:
-        df_gastos['valor_numerico'] = df_gastos['valor'].astype(str).str.replace('R\$', '', regex=True).str.replace(',', '.').str.strip()
-        df_gastos['valor_numerico'] = pd.to_numeric(df_gastos['valor_numerico'], errors='coerce')
-        total_gastos = df_gastos['valor_numerico'].sum()
-        return df_gastos, total_gastos
-    return df_gastos, 0
+    total_gastos = df_gastos['valor_centavos'].sum() / 100
+    return df_gastos, total_gastos
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def analisar_custos(df_gastos, df_creditos):
+    agregados = agregar_gastos(df_gastos)
+    return (agregados, custo_por_escola(agregados, df_creditos),
+            custo_ao_longo_do_tempo(agregados, df_creditos))
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def montar_lista_do_dia(df_escolas, df_reatores, hoje, dias_vermicompostagem, intervalo_visita_dias):
+    agenda = Agenda.de_tabelas(df_escolas, df_reatores, hoje, dias_vermicompostagem, intervalo_visita_dias)
+    return agenda.lista_do_dia(hoje)
+
+@st.cache_resource(show_spinner=False)
+def iniciar_atualizacao_cotacoes():
+    """
+    Thread única do servidor que completa o histórico local de cotações a cada
+    TTL_COTACOES, fora da execução do script: nenhuma página espera o download.
+    Uma falha (CSV corrompido, disco cheio) fica no log e a próxima tentativa
+    acontece no ciclo seguinte, sem derrubar a thread.
+    """
+    def atualizar():
+        while True:
+            try:
+                if valoracao.atualizar_historico():
+                    carregar_historico_cotacoes.clear()
+            except Exception:
+                logger.exception("Falha ao atualizar o histórico de cotações; nova tentativa em %d s", TTL_COTACOES)
+            time.sleep(TTL_COTACOES)
+    thread = threading.Thread(target=atualizar, name="atualizar_cotacoes", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource(ttl=TTL_COTACOES, show_spinner=False)
+def carregar_historico_cotacoes():
+    """Histórico local de cotações como está no disco; vazio até a primeira atualização terminar."""
+    if not COTACOES_LOCAIS:
+        iniciar_atualizacao_cotacoes()
+    try:
+        return valoracao.carregar_historico()
+    except Exception:
+        logger.exception("Histórico de cotações ilegível em %s", valoracao.CAMINHO_COTACOES)
+        return pd.DataFrame(columns=valoracao.COLUNAS_COTACOES + ['preco_brl'])
+
+_valorar_creditos = st.cache_resource(max_entries=32, show_spinner=False)(valoracao.valorar_creditos)
+
+def aquecer_caches():
+    """
+    Pré-carrega a planilha, as cotações e a tabela de emissões por capacidade
+    com os parâmetros padrão, para que o primeiro usuário encontre tudo em cache.
+    Retorna o tempo gasto em segundos.
+    """
+    inicio = time.perf_counter()
+    df_escolas_cache, df_reatores_cache, _, _ = carregar_dados_excel(URL_EXCEL)
+    obter_cotacao_carbono()
+    obter_cotacao_euro_real()
+    carregar_historico_cotacoes()
+    if not df_reatores_cache.empty:
+        _calcular_creditos_reatores(df_reatores_cache, df_escolas_cache, 10, K_ANO_PADRAO)
+    if 'capacidade_litros' in df_reatores_cache.columns:
+        for capacidade in df_reatores_cache['capacidade_litros'].astype(float).round(2).fillna(100).unique():
+            _calcular_emissoes_reator(float(capacidade), 10, K_ANO_PADRAO)
+    return time.perf_counter() - inicio
 
 # =============================================================================
 # INTERFACE PRINCIPAL (mantida idêntica, exceto textos de correção)
 # =============================================================================
 
+if 'aquecer' in st.query_params:
+    st.caption(f"🔥 Caches aquecidos em {formatar_br(aquecer_caches(), 2)} s")
+
 inicializar_session_state()
-df_escolas, df_reatores, df_gastos = carregar_dados_excel(URL_EXCEL)
+df_escolas, df_reatores, df_gastos, df_erros_planilha = carregar_dados_excel(URL_EXCEL)
 if df_escolas.empty or df_reatores.empty:
     st.error("❌ Não foi possível carregar os dados. Verifique se o arquivo Excel existe no repositório GitHub.")
     st.stop()
+if not df_erros_planilha.empty:
+    st.warning(f"⚠️ {formatar_br(len(df_erros_planilha), 0)} problema(s) encontrado(s) na planilha. "
+               "Células inválidas foram ignoradas; linhas sem campos obrigatórios ou repetidas foram descartadas.")
+    with st.expander("📋 Problemas na planilha"):
+        exibir_tabela(df_erros_planilha, "erros_planilha", {'linha': coluna_numero("Linha", 0)})
 
 exibir_cotacao_carbono()
 
@@ -578,19 +381,15 @@ with st.sidebar:
     escolas_options = ["Todas as escolas"] + df_escolas['id_escola'].tolist()
     escola_selecionada = st.selectbox("Selecionar escola", escolas_options)
 
-if escola_selecionada != "Todas as escolas":
-    reatores_filtrados = df_reatores[df_reatores['id_escola'] == escola_selecionada]
-    escolas_filtradas = df_escolas[df_escolas['id_escola'] == escola_selecionada]
-else:
-    reatores_filtrados = df_reatores
-    escolas_filtradas = df_escolas
+escolas_filtradas, reatores_filtrados = filtrar_por_escola(URL_EXCEL, escola_selecionada)
 
-reatores_processados, total_residuo, total_emissoes, detalhes_calculo = processar_reatores_cheios(reatores_filtrados, escolas_filtradas)
+reatores_processados, total_residuo, total_emissoes = processar_reatores_cheios(reatores_filtrados, escolas_filtradas)
 preco_carbono_eur = st.session_state.preco_carbono
 taxa_cambio = st.session_state.taxa_cambio
 valor_eur = calcular_valor_creditos(total_emissoes, preco_carbono_eur, "€")
 valor_brl = calcular_valor_creditos(total_emissoes, preco_carbono_eur, "R$", taxa_cambio)
 df_gastos_analisados, total_gastos = analisar_gastos(df_gastos)
+gastos_agregados, custos_escola, custos_tempo = analisar_custos(df_gastos, reatores_processados)
 
 # =============================================================================
 # EXIBIÇÃO (mantida idêntica, exceto ajuste de texto)
@@ -613,7 +412,7 @@ with col1:
 with col2:
     st.metric("Total de Reatores", formatar_br(len(df_reatores), 0))
 with col3:
-    st.metric("Reatores Cheios", formatar_br(len(df_reatores[df_reatores['data_encheu'].notna()]), 0))
+    st.metric("Reatores Cheios", formatar_br(df_reatores['is_cheio'].sum(), 0))
 with col4:
     st.metric("Reatores Ativos", formatar_br(len(df_reatores[df_reatores['status_reator'].notna()]), 0))
 
@@ -644,16 +443,38 @@ if not df_gastos.empty:
         else:
             st.metric("Custo por tCO₂eq", formatar_moeda_br(0))
     st.subheader("📋 Detalhamento dos Gastos")
-    df_gastos_display = df_gastos[['id_gasto', 'nome_gasto', 'data_compra', 'valor']].copy()
-    if 'data_compra' in df_gastos_display.columns:
-        df_gastos_display['data_compra'] = pd.to_datetime(df_gastos_display['data_compra'], errors='coerce').dt.strftime('%d/%m/%Y')
-    if 'valor' in df_gastos_display.columns:
-        df_gastos_display['valor_formatado'] = df_gastos_display['valor'].astype(str).apply(
-            lambda x: formatar_moeda_br(float(x.replace('R$', '').replace(',', '.').strip())) if pd.notna(x) and x != '' else formatar_moeda_br(0)
-        )
-        df_gastos_display['valor'] = df_gastos_display['valor_formatado']
-        df_gastos_display = df_gastos_display.drop('valor_formatado', axis=1)
-    st.dataframe(df_gastos_display, use_container_width=True)
+    df_gastos_display = df_gastos[['id_gasto', 'nome_gasto', 'data_compra']].copy()
+    df_gastos_display['valor'] = df_gastos['valor_centavos'] / 100
+    exibir_tabela(df_gastos_display, "gastos", {'data_compra': coluna_data("data_compra"),
+                                                'valor': coluna_moeda("valor (R$)")})
+
+    st.subheader("📊 Custos por Escola, Mês e Categoria")
+    aba_escola, aba_tempo, aba_categoria = st.tabs(["Por escola", "Ao longo do tempo", "Por categoria"])
+    with aba_escola:
+        df_custos_escola = custos_escola[['id_escola', 'emissoes_evitadas_tco2eq', 'custo_por_tco2eq']].copy()
+        df_custos_escola.insert(1, 'gasto', custos_escola['gasto_centavos'] / 100)
+        exibir_tabela(df_custos_escola, "custos_escola", {
+            'gasto': coluna_moeda("Gasto (R$)"),
+            'emissoes_evitadas_tco2eq': coluna_tco2eq(),
+            'custo_por_tco2eq': coluna_moeda("Custo (R$/tCO₂eq)")
+        })
+    with aba_tempo:
+        df_custos_tempo = pd.DataFrame({
+            'mes': custos_tempo['mes'].dt.to_timestamp(),
+            'gasto_acumulado': custos_tempo['gasto_acumulado_centavos'] / 100,
+            'emissoes_acumuladas_tco2eq': custos_tempo['emissoes_acumuladas_tco2eq'],
+            'custo_por_tco2eq': custos_tempo['custo_por_tco2eq']
+        })
+        exibir_tabela(df_custos_tempo, "custos_tempo", {
+            'mes': st.column_config.DateColumn("Mês", format="MM/YYYY"),
+            'gasto_acumulado': coluna_moeda("Gasto acumulado (R$)"),
+            'emissoes_acumuladas_tco2eq': coluna_tco2eq("Emissões evitadas acumuladas (tCO₂eq)"),
+            'custo_por_tco2eq': coluna_moeda("Custo (R$/tCO₂eq)")
+        })
+    with aba_categoria:
+        df_custos_categoria = gastos_agregados['por_categoria'][['categoria']].copy()
+        df_custos_categoria['gasto'] = gastos_agregados['por_categoria']['gasto_centavos'] / 100
+        exibir_tabela(df_custos_categoria, "custos_categoria", {'gasto': coluna_moeda("Gasto (R$)")})
 else:
     st.info("ℹ️ Nenhum gasto registrado.")
 
@@ -668,32 +489,134 @@ with col2:
 with col3:
     st.metric("Total de Reatores Ativos", formatar_br(escolas_com_reatores_ativos['reatores_ativos'].sum(), 0))
 
+st.header("🗓️ Agenda de Colheitas e Visitas")
+col1, col2 = st.columns(2)
+with col1:
+    dias_vermicompostagem = st.number_input("Período de vermicompostagem (dias)", 1, 365, DIAS_VERMICOMPOSTAGEM, 1,
+                                            key="dias_vermicompostagem")
+with col2:
+    intervalo_visita_dias = st.number_input("Intervalo entre visitas (dias)", 1, 365, INTERVALO_VISITA_DIAS, 1,
+                                            key="intervalo_visita_dias")
+lista_do_dia = montar_lista_do_dia(escolas_filtradas, reatores_filtrados, datetime.now().date(),
+                                   dias_vermicompostagem, intervalo_visita_dias)
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Colheitas Vencidas", formatar_br((lista_do_dia['tarefa'] == TAREFA_COLHEITA).sum(), 0))
+with col2:
+    st.metric("Visitas Atrasadas", formatar_br((lista_do_dia['tarefa'] == TAREFA_VISITA).sum(), 0))
+with col3:
+    st.metric("Escolas na Lista do Dia", formatar_br(lista_do_dia['id_escola'].nunique(), 0))
+if lista_do_dia.empty:
+    st.success("✅ Nenhuma colheita ou visita pendente para hoje.")
+else:
+    exibir_tabela(lista_do_dia, "lista_do_dia", {
+        'prioridade': coluna_numero("Prioridade", 0),
+        'data_prevista': coluna_data("Data prevista"),
+        'dias_atraso': coluna_numero("Dias de atraso", 0)
+    })
+
 if not reatores_processados.empty:
     st.header("📊 Detalhamento dos Créditos por Reator")
     preco_carbono_reais_por_tonelada = st.session_state.preco_carbono * st.session_state.taxa_cambio
     df_detalhes = reatores_processados[['nome_escola', 'id_reator', 'data_encheu', 'altura_cm', 'largura_cm', 'comprimento_cm',
                                         'capacidade_litros', 'residuo_kg', 'emissoes_evitadas_tco2eq']].copy()
     df_detalhes['valor_creditos_reais'] = df_detalhes['emissoes_evitadas_tco2eq'] * preco_carbono_reais_por_tonelada
-    for col in ['altura_cm', 'largura_cm', 'comprimento_cm']:
-        df_detalhes[col] = df_detalhes[col].apply(lambda x: formatar_br(x, 0) if pd.notna(x) else "N/A")
-    df_detalhes['residuo_kg'] = df_detalhes['residuo_kg'].apply(lambda x: formatar_br(x, 1))
-    df_detalhes['emissoes_evitadas_tco2eq'] = df_detalhes['emissoes_evitadas_tco2eq'].apply(formatar_tco2eq)
-    df_detalhes['capacidade_litros'] = df_detalhes['capacidade_litros'].apply(lambda x: formatar_br(x, 0))
-    df_detalhes['data_encheu'] = pd.to_datetime(df_detalhes['data_encheu']).dt.strftime('%d/%m/%Y')
-    df_detalhes['valor_creditos_reais'] = df_detalhes['valor_creditos_reais'].apply(lambda x: formatar_moeda_br(x))
-    st.dataframe(df_detalhes, use_container_width=True)
+    exibir_tabela(df_detalhes, "detalhes_reatores", {
+        'data_encheu': coluna_data("data_encheu"),
+        'altura_cm': coluna_numero("altura_cm", 0),
+        'largura_cm': coluna_numero("largura_cm", 0),
+        'comprimento_cm': coluna_numero("comprimento_cm", 0),
+        'capacidade_litros': coluna_numero("capacidade_litros", 0),
+        'residuo_kg': coluna_numero("residuo_kg", 1),
+        'emissoes_evitadas_tco2eq': coluna_tco2eq("emissoes_evitadas_tco2eq"),
+        'valor_creditos_reais': coluna_moeda("valor_creditos_reais (R$)")
+    })
+
+    st.subheader("📦 Exportar Pacote de Auditoria")
+    st.caption("Créditos por reator, parâmetros do cálculo e gastos, com valores numéricos sem formatação.")
+    formato_exportacao = st.radio("Formato", list(FORMATOS), horizontal=True, key="formato_exportacao",
+                                  format_func=str.upper)
+    def gerar_pacote_auditoria():
+        destino = BytesIO()
+        exportar_pacote(formato_exportacao, destino, reatores_processados, df_gastos, periodo_credito, k_ano,
+                        preco_carbono_reais_por_tonelada)
+        return destino.getvalue()
+    _, extensao, mime = FORMATOS[formato_exportacao]
+    st.download_button("⬇️ Baixar pacote de auditoria", data=gerar_pacote_auditoria,
+                       file_name=f"auditoria_creditos_{formato_exportacao}.{extensao}", mime=mime)
+
+    st.subheader("🗂️ Relatórios por Escola")
+    uma_escola = escola_selecionada != "Todas as escolas"
+    if uma_escola:
+        st.caption("Relatório HTML da escola (reatores, resíduo, emissões evitadas, gastos e gráficos), em um ZIP. "
+                   "Com uma escola selecionada, os gastos gerais do programa não são rateados.")
+    else:
+        st.caption("Um relatório HTML por escola (reatores, resíduo, emissões evitadas, gastos e gráficos), em um "
+                   "ZIP com o plotly.min.js: extraia o ZIP antes de abrir os relatórios.")
+    def gerar_relatorios_escolas():
+        gastos_relatorio = df_gastos
+        if uma_escola and 'id_escola' in df_gastos.columns:
+            # O rateio dos gastos gerais depende das emissões de todas as escolas
+            gastos_relatorio = df_gastos[df_gastos['id_escola'] == escola_selecionada]
+        # Sem pool dentro do servidor: as escolas são só recortes das tabelas já calculadas.
+        # Uma escola leva o plotly.js embutido; todas as escolas embutidas dariam ~300 MB com 200 escolas
+        return empacotar_relatorios(reatores_processados, gastos_relatorio, preco_carbono_reais_por_tonelada,
+                                    processos=1, embutir_plotlyjs=uma_escola)
+    st.download_button("⬇️ Baixar relatórios das escolas", data=gerar_relatorios_escolas,
+                       file_name="relatorios_escolas.zip", mime="application/zip")
+
+    st.header("🏷️ Valor dos Créditos por Safra")
+    historico_cotacoes = carregar_historico_cotacoes()
+    if historico_cotacoes.empty:
+        st.info("ℹ️ Histórico de cotações ainda indisponível: ele é baixado em segundo plano "
+                "(ou com `python valoracao.py --atualizar`). Recarregue a página em alguns minutos.")
+    else:
+        valores_safra = _valorar_creditos(reatores_processados, historico_cotacoes, preco_carbono_reais_por_tonelada,
+                                          dias_vermicompostagem)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Valor na Safra", formatar_moeda_br(valores_safra['por_reator']['valor_safra_brl'].sum()))
+        with col2:
+            st.metric("Valor na Colheita", formatar_moeda_br(valores_safra['por_reator']['valor_colheita_brl'].sum()))
+        with col3:
+            st.metric("Marcação a Mercado",
+                      formatar_moeda_br(valores_safra['por_reator']['marcacao_mercado_brl'].sum()))
+        st.caption(f"Safra: cotação CO2.L × EUR/BRL do último pregão até data_encheu; colheita: até data_colheita "
+                   f"(ou data_encheu + {dias_vermicompostagem} dias). Histórico de "
+                   f"{historico_cotacoes['data'].min():%d/%m/%Y} a {historico_cotacoes['data'].max():%d/%m/%Y}.")
+        colunas_valor = {
+            'data_encheu': coluna_data("data_encheu"),
+            'data_colheita': coluna_data("data_colheita"),
+            'mes': st.column_config.DateColumn("Mês", format="MM/YYYY"),
+            'emissoes_evitadas_tco2eq': coluna_tco2eq("emissoes_evitadas_tco2eq"),
+            'preco_safra_brl': coluna_moeda("Cotação na safra (R$/tCO₂eq)"),
+            'preco_colheita_brl': coluna_moeda("Cotação na colheita (R$/tCO₂eq)"),
+            'valor_safra_brl': coluna_moeda("Valor na safra (R$)"),
+            'valor_colheita_brl': coluna_moeda("Valor na colheita (R$)"),
+            'valor_atual_brl': coluna_moeda("Valor atual (R$)"),
+            'marcacao_mercado_brl': coluna_moeda("Marcação a mercado (R$)")
+        }
+        aba_reator, aba_escola, aba_mes = st.tabs(["Por reator", "Por escola", "Por mês de enchimento"])
+        with aba_reator:
+            exibir_tabela(valores_safra['por_reator'], "valor_safra_reator", colunas_valor)
+        with aba_escola:
+            exibir_tabela(valores_safra['por_escola'], "valor_safra_escola", colunas_valor)
+        with aba_mes:
+            exibir_tabela(valores_safra['por_mes'], "valor_safra_mes", colunas_valor)
 
     st.header("🧮 Detalhamento Completo dos Cálculos")
-    primeiro_reator = detalhes_calculo[0]
-    calc = primeiro_reator['calculo_detalhado']
-    st.subheader(f"📋 Cálculo Detalhado para o Reator {primeiro_reator['id_reator']}")
+    reator_detalhado = st.selectbox("Selecionar reator", reatores_processados['id_reator'].tolist(),
+                                    key="reator_detalhado")
+    reator = reatores_processados[reatores_processados['id_reator'] == reator_detalhado].iloc[0]
+    calc = calcular_emissoes_evitadas_reator_detalhado(reator['capacidade_litros'], periodo_credito)
+    st.subheader(f"📋 Cálculo Detalhado para o Reator {reator_detalhado}")
     st.info(f"**Período de cálculo:** {periodo_credito} anos | **Taxa de decaimento (k):** {formatar_br(k_ano, 3)} ano⁻¹ | **φ = {PHI_BASELINE}**")
     col1, col2 = st.columns(2)
     with col1:
         st.write("**Dimensões e Massa:**")
-        st.write(f"- Altura: {formatar_br(primeiro_reator.get('altura_cm', 'N/A'), 0)} cm")
-        st.write(f"- Largura: {formatar_br(primeiro_reator.get('largura_cm', 'N/A'), 0)} cm")
-        st.write(f"- Comprimento: {formatar_br(primeiro_reator.get('comprimento_cm', 'N/A'), 0)} cm")
+        st.write(f"- Altura: {formatar_br(reator['altura_cm'], 0)} cm")
+        st.write(f"- Largura: {formatar_br(reator['largura_cm'], 0)} cm")
+        st.write(f"- Comprimento: {formatar_br(reator['comprimento_cm'], 0)} cm")
         st.write(f"- Capacidade: {formatar_br(calc['parametros']['capacidade_litros'], 0)} L")
         st.write(f"- Densidade: {formatar_br(calc['parametros']['densidade_kg_l'], 2)} kg/L")
         st.write(f"- Massa: {formatar_br(calc['residuo_kg'], 1)} kg")
@@ -708,12 +631,25 @@ if not reatores_processados.empty:
         st.write(f"- CO₂eq Vermicompostagem: {formatar_br(calc['emissao_compostagem_kgco2eq'], None)} kg")
         st.metric("Emissões Evitadas", formatar_tco2eq(calc['emissoes_evitadas_tco2eq']))
 
+    st.header("🌪️ Análise de Sensibilidade dos Parâmetros")
+    variacao_sensibilidade = st.slider("Variação de cada parâmetro (%)", 1, 50, 10, 1, key="variacao_sensibilidade")
+    elasticidades, elasticidades_escola = _calcular_elasticidades(
+        reatores_processados[['id_escola', 'capacidade_litros']], periodo_credito, k_ano)
+    df_tornado = dados_tornado(elasticidades, total_emissoes, variacao_sensibilidade / 100)
+    fig_tornado = figura_tornado(df_tornado)
+    st.plotly_chart(fig_tornado, use_container_width=True)
+    st.caption("Elasticidade = variação % das emissões evitadas para 1% de variação no parâmetro (derivadas analíticas).")
+    with st.expander("📋 Elasticidades por escola"):
+        # Uma linha por escola (paginada): com centenas de escolas, uma coluna por escola fica ilegível
+        exibir_tabela(elasticidades_escola.reset_index(), "elasticidades_escola",
+                      {parametro: coluna_numero(parametro, 4) for parametro in elasticidades_escola.columns})
+
 st.header("📈 Status dos Reatores")
 if 'status_reator' in df_reatores.columns:
     status_count = df_reatores['status_reator'].value_counts()
     if not status_count.empty:
         labels_formatados = [f"{status} ({formatar_br(count, 0)})" for status, count in status_count.items()]
-        fig = px.pie(values=status_count.values, names=labels_formatados, title="Distribuição dos Status dos Reatores")
+        fig = figura_pizza(status_count.tolist(), labels_formatados, "Distribuição dos Status dos Reatores")
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("ℹ️ Sem dados de status para reatores")
@@ -725,7 +661,7 @@ if 'status' in df_escolas.columns:
     status_escolas_count = df_escolas['status'].value_counts()
     if not status_escolas_count.empty:
         labels_escolas_formatados = [f"{status} ({formatar_br(count, 0)})" for status, count in status_escolas_count.items()]
-        fig2 = px.pie(values=status_escolas_count.values, names=labels_escolas_formatados, title="Distribuição dos Status das Escolas")
+        fig2 = figura_pizza(status_escolas_count.tolist(), labels_escolas_formatados, "Distribuição dos Status das Escolas")
         st.plotly_chart(fig2, use_container_width=True)
     else:
         st.info("ℹ️ Sem dados de status para escolas")
@@ -796,7 +732,7 @@ if not reatores_processados.empty:
 
     st.subheader("📊 Ativos Disponíveis para Compra (Créditos de Carbono por Reator)")
 
-    for idx, row in df_ativos.iterrows():
+    for idx, row in paginar(df_ativos, "ativos", LINHAS_POR_PAGINA_ATIVOS).iterrows():
         col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 2, 3])
         with col1:
             st.write(f"**{row['nome_escola']}**")
@@ -829,7 +765,7 @@ if not reatores_processados.empty:
                         else:
                             st.session_state.portfolio_creditos[row['id_reator']] = quantidade_comprar
                         st.session_state.historico_transacoes.append({
-                            'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
+                            'data': datetime.now(),
                             'id_reator': row['id_reator'],
                             'escola': row['nome_escola'],
                             'quantidade_tco2eq': quantidade_comprar,
@@ -847,19 +783,25 @@ if not reatores_processados.empty:
     st.subheader("📂 Seu Portfólio de Créditos de Carbono")
     if st.session_state.portfolio_creditos:
         portfolio_data = []
+        # A escola vem do histórico de compras: com o filtro de escola ativo, reatores comprados
+        # de outras escolas não estão em reatores_processados
+        escola_do_reator = {t['id_reator']: t['escola'] for t in st.session_state.historico_transacoes}
         for id_reator, qtd in st.session_state.portfolio_creditos.items():
-            info = reatores_processados[reatores_processados['id_reator'] == id_reator].iloc[0]
             portfolio_data.append({
-                'Escola': info['nome_escola'],
+                'Escola': escola_do_reator.get(id_reator, id_reator),
                 'Reator': id_reator,
                 'Créditos (tCO₂eq)': qtd,
                 'Preço Médio (R$/tCO₂eq)': preco_carbono_reais,
                 'Valor Atual (R$)': qtd * preco_carbono_reais
             })
         df_portfolio = pd.DataFrame(portfolio_data)
-        st.dataframe(df_portfolio, use_container_width=True)
-        fig_port = px.pie(df_portfolio, values='Créditos (tCO₂eq)', names='Escola',
-                          title='Distribuição da Carteira de Créditos')
+        exibir_tabela(df_portfolio, "portfolio", {
+            'Créditos (tCO₂eq)': coluna_tco2eq('Créditos (tCO₂eq)'),
+            'Preço Médio (R$/tCO₂eq)': coluna_moeda('Preço Médio (R$/tCO₂eq)'),
+            'Valor Atual (R$)': coluna_moeda('Valor Atual (R$)')
+        })
+        fig_port = figura_pizza(df_portfolio['Créditos (tCO₂eq)'].tolist(), df_portfolio['Escola'].tolist(),
+                                'Distribuição da Carteira de Créditos')
         st.plotly_chart(fig_port, use_container_width=True)
     else:
         st.info("Nenhum crédito em carteira. Compre créditos das escolas acima!")
@@ -867,10 +809,12 @@ if not reatores_processados.empty:
     st.subheader("📜 Histórico de Transações")
     if st.session_state.historico_transacoes:
         df_hist = pd.DataFrame(st.session_state.historico_transacoes)
-        df_hist_display = df_hist.copy()
-        df_hist_display['valor_total'] = df_hist_display['valor_total'].apply(lambda x: formatar_moeda_br(x))
-        df_hist_display['quantidade_tco2eq'] = df_hist_display['quantidade_tco2eq'].apply(lambda x: formatar_tco2eq(x))
-        st.dataframe(df_hist_display, use_container_width=True)
+        exibir_tabela(df_hist, "historico", {
+            'data': coluna_data('data', com_hora=True),
+            'quantidade_tco2eq': coluna_tco2eq('quantidade_tco2eq'),
+            'preco_unitario': coluna_moeda('preco_unitario (R$)'),
+            'valor_total': coluna_moeda('valor_total (R$)')
+        })
     else:
         st.info("Nenhuma transação realizada ainda.")
 
@@ -879,45 +823,25 @@ if not reatores_processados.empty:
     # =========================================================================
     st.subheader("📈 Cotação Real do Carbono - Últimos 30 Dias (CO2.L)")
     try:
-        ticker_carbono = yf.Ticker("CO2.L")
-        hist = ticker_carbono.history(period="1mo")
-        if hist.empty:
-            raise ValueError("Sem dados históricos do CO2.L")
-
-        ticker_euro = yf.Ticker("EURBRL=X")
-        hist_euro = ticker_euro.history(period="1mo")
-        if hist_euro.empty:
-            raise ValueError("Sem dados históricos do EUR/BRL")
-
-        hist['Taxa_EURBRL'] = hist_euro['Close']
-        hist['Preço (R$/tCO₂eq)'] = hist['Close'] * hist['Taxa_EURBRL']
-
-        df_real = hist.reset_index()[['Date', 'Preço (R$/tCO₂eq)']]
-        df_real = df_real.rename(columns={'Date': 'Data'})
-
-        fig_merc = px.line(df_real, x='Data', y='Preço (R$/tCO₂eq)',
-                           title='Cotação Real do Carbono (CO2.L convertido pelo EUR/BRL diário)',
-                           markers=True)
+        historico_30_dias = carregar_historico_cotacoes()
+        historico_30_dias = historico_30_dias[historico_30_dias['data'] > historico_30_dias['data'].max()
+                                              - pd.Timedelta(days=30)]
+        if historico_30_dias.empty:
+            raise ValueError("histórico de cotações indisponível")
+        df_real = historico_30_dias[['data', 'preco_brl']].rename(
+            columns={'data': 'Data', 'preco_brl': 'Preço (R$/tCO₂eq)'})
 
         ultimo_preco = df_real['Preço (R$/tCO₂eq)'].iloc[-1]
-        fig_merc.add_hline(y=ultimo_preco, line_dash="dash", line_color="red",
-                           annotation_text="Preço Atual")
+        fig_merc = figura_linha(df_real, 'Data', 'Preço (R$/tCO₂eq)',
+                                'Cotação Real do Carbono (CO2.L convertido pelo EUR/BRL diário)', ultimo_preco)
         st.plotly_chart(fig_merc, use_container_width=True)
         st.caption("Fonte: Yahoo Finance (CO2.L e EURBRL=X) - Conversão data a data")
     except Exception as e:
-        st.warning(f"Não foi possível obter o histórico real ({e}). Exibindo simulação de referência.")
-        datas = pd.date_range(start='2024-01-01', periods=30, freq='D')
-        preco_base = st.session_state.preco_carbono * st.session_state.taxa_cambio
-        np.random.seed(42)
-        variacao = np.random.normal(0, 0.02, 30).cumsum()
-        precos_sim = preco_base * (1 + variacao)
-        df_mercado = pd.DataFrame({'Data': datas, 'Preço (R$/tCO₂eq)': precos_sim})
-        fig_merc = px.line(df_mercado, x='Data', y='Preço (R$/tCO₂eq)',
-                           title='Simulação do Preço do Carbono nos Últimos 30 Dias',
-                           markers=True)
-        fig_merc.add_hline(y=preco_base, line_dash="dash", line_color="red",
-                           annotation_text="Preço Atual")
-        st.plotly_chart(fig_merc, use_container_width=True)
+        # Sem histórico diário: mostra a cotação atual já em cache em vez de uma série inventada
+        preco_atual = st.session_state.preco_carbono * st.session_state.taxa_cambio
+        st.info(f"ℹ️ Histórico diário indisponível ({e}); ele é atualizado em segundo plano.")
+        st.metric("Cotação atual (R$/tCO₂eq)", formatar_moeda_br(preco_atual),
+                  help=f"Fonte: {st.session_state.fonte_cotacao}")
 
 else:
     st.info("Nenhum crédito disponível para negociação. Aguarde reatores serem preenchidos.")
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo científico de emissões evitadas pela vermicompostagem (aterro como baseline).
+Não depende do Streamlit, para poder ser usado também em scripts e relatórios.
+"""
+import numpy as np
+import pandas as pd
+
+DENSIDADE_PADRAO = 0.6  # kg/L - para resíduos de vegetais, frutas e borra de café
+K_ANO_PADRAO = 0.06     # Taxa de decaimento anual padrão (IPCC para resíduos alimentares)
+PHI_BASELINE = 0.85     # Fator φ (UNFCCC 2024) para clima úmido
+
+# =============================================================================
+# FUNÇÕES DE CÁLCULO CIENTÍFICO – COM PERFIS TEMPORAIS CORRIGIDOS
+# =============================================================================
+
+# Parâmetros de pré-descarte
+CH4_PRE_KG_POR_KG_DIA = 2.78 * (16/12) * 24 / 1_000_000_000   # kg CH4 / kg resíduo / dia
+N2O_PRE_TOTAL_KG_POR_KG = 20.26 * (44/28) / 1_000_000        # kg N2O / kg resíduo (total em 3 dias)
+PROFILE_N2O_PRE = {1: 0.8623, 2: 0.10, 3: 0.0377}            # distribuição diária do N2O pré-descarte
+
+# Perfis diários de emissão para vermicompostagem (50 dias, normalizados)
+# Conforme Yang et al. 2017 e utilizados no Colab
+PROFILE_CH4_VERMI = np.array([
+    0.02, 0.02, 0.02, 0.03, 0.03, 0.04, 0.04, 0.05, 0.05, 0.06,
+    0.07, 0.08, 0.09, 0.10, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04,
+    0.03, 0.02, 0.02, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01,
+    0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005,
+    0.002, 0.002, 0.002, 0.002, 0.002, 0.001, 0.001, 0.001, 0.001, 0.001
+])
+PROFILE_CH4_VERMI = PROFILE_CH4_VERMI / PROFILE_CH4_VERMI.sum()
+
+PROFILE_N2O_VERMI = np.array([
+    0.15, 0.10, 0.20, 0.05, 0.03, 0.03, 0.03, 0.04, 0.05, 0.06,
+    0.08, 0.09, 0.10, 0.08, 0.07, 0.06, 0.05, 0.04, 0.03, 0.02,
+    0.01, 0.01, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005, 0.005,
+    0.002, 0.002, 0.002, 0.002, 0.002, 0.001, 0.001, 0.001, 0.001, 0.001,
+    0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001
+])
+PROFILE_N2O_VERMI = PROFILE_N2O_VERMI / PROFILE_N2O_VERMI.sum()
+
+# Perfil diário de N2O para o aterro (Wang et al. 2017) – 5 dias
+PROFILE_N2O_LANDFILL_DAILY = np.array([0.10, 0.30, 0.40, 0.15, 0.05], dtype=float)
+PROFILE_N2O_LANDFILL_DAILY = PROFILE_N2O_LANDFILL_DAILY / PROFILE_N2O_LANDFILL_DAILY.sum()
+
+# Parâmetros do modelo (podem ser substituídos por chamada, ex.: análise de sensibilidade)
+T_ATERRO = 25  # °C
+PARAMETROS_PADRAO = {
+    'densidade_kg_l': DENSIDADE_PADRAO,
+    'DOC': 0.15,
+    'DOCf': 0.0147 * T_ATERRO + 0.28,
+    'MCF': 1.0,
+    'F': 0.5,
+    'OX': 0.1,
+    'Ri': 0.0,
+    'phi': PHI_BASELINE,
+    'TOC_YANG': 0.436,
+    'TN_YANG': 14.2 / 1000,
+    'CH4_C_FRAC_YANG': 0.13 / 100,
+    'N2O_N_FRAC_YANG': 0.92 / 100,
+    'umidade': 0.85,
+    'GWP_CH4_20': 79.7,
+    'GWP_N2O_20': 273,
+    'E_aberto': 1.91,
+    'E_fechado': 2.15,
+    'ch4_pre_dia_kg': CH4_PRE_KG_POR_KG_DIA,
+    'n2o_pre_total_kg': N2O_PRE_TOTAL_KG_POR_KG
+}
+
+def calcular_emissoes_evitadas_reator_detalhado(capacidade_litros, periodo_anos=10, k_ano=K_ANO_PADRAO,
+                                                parametros=None):
+    """
+    Calcula as emissões evitadas para um único reator (carga única).
+    Inclui:
+      - Aterro (baseline): CH₄ com decaimento exponencial (método FOD) + φ,
+        N₂O com perfil diário de 5 dias (Wang et al.) + pré‑descarte,
+      - Vermicompostagem: CH₄ e N₂O com perfis diários de 50 dias (Yang et al.),
+      - Pré‑descarte: CH₄ constante diária nos 3 dias, N₂O distribuído nos 3 dias.
+    'parametros' substitui valores de PARAMETROS_PADRAO.
+    Retorna dicionário com todos os valores intermediários e finais.
+    """
+    p = {**PARAMETROS_PADRAO, **(parametros or {})}
+    densidade = p['densidade_kg_l']
+    residuo_kg = capacidade_litros * densidade
+    T = T_ATERRO
+    DOC = p['DOC']
+    DOCf = p['DOCf']
+    MCF = p['MCF']
+    F = p['F']
+    OX = p['OX']
+    Ri = p['Ri']
+    phi = p['phi']
+    TOC_YANG = p['TOC_YANG']
+    TN_YANG = p['TN_YANG']
+    CH4_C_FRAC_YANG = p['CH4_C_FRAC_YANG']
+    N2O_N_FRAC_YANG = p['N2O_N_FRAC_YANG']
+    umidade = p['umidade']
+    fracao_ms = 1 - umidade
+    GWP_CH4_20 = p['GWP_CH4_20']
+    GWP_N2O_20 = p['GWP_N2O_20']
+    ch4_pre_dia_kg = p['ch4_pre_dia_kg']
+    n2o_pre_total_kg = p['n2o_pre_total_kg']
+
+    k_dia = k_ano / 365.0
+    dias_simulacao = periodo_anos * 365
+    t = np.arange(1, dias_simulacao + 1, dtype=float)
+
+    # ==================== ATERRO (BASELINE) ====================
+
+    # --- CH₄ (FOD com kernel exponencial) ---
+    # Potencial total de CH₄ (kg) que poderia ser gerado se todo o resíduo fosse degradado
+    ch4_potencial_total = residuo_kg * DOC * DOCf * MCF * F * (16/12) * (1 - Ri) * (1 - OX)
+    # Fração emitida no período (soma do kernel exponencial)
+    kernel_ch4 = np.exp(-k_dia * (t - 1)) - np.exp(-k_dia * t)
+    kernel_ch4 = np.maximum(kernel_ch4, 0)
+    fracao_ch4_emitida = kernel_ch4.sum()
+    ch4_emitido_periodo_bruto = ch4_potencial_total * fracao_ch4_emitida
+    ch4_emitido_aterro = ch4_emitido_periodo_bruto * phi   # aplica φ apenas ao CH4
+
+    # --- N₂O do aterro (Wang et al. 2017) com perfil diário ---
+    # Fator de abertura
+    f_aberto = (50.0 / residuo_kg) * (8.0 / 24)  # massa exposta ≈ 50 kg
+    f_aberto = np.clip(f_aberto, 0.0, 1.0)
+    E_aberto = p['E_aberto']
+    E_fechado = p['E_fechado']
+    E_medio = f_aberto * E_aberto + (1 - f_aberto) * E_fechado
+    fator_umid = (1 - umidade) / (1 - 0.55)
+    E_medio_ajust = E_medio * fator_umid
+    fator_n2o_por_kg = (E_medio_ajust * (44/28) / 1_000_000)   # kg N2O / kg residuo
+    n2o_total_aterro = residuo_kg * fator_n2o_por_kg
+
+    # Convolução do pulso único com o kernel diário de 5 dias
+    pulse = np.zeros(dias_simulacao)
+    pulse[0] = n2o_total_aterro   # carga total no dia zero
+    n2o_aterro_diario = np.convolve(pulse, PROFILE_N2O_LANDFILL_DAILY, mode='full')[:dias_simulacao]
+    n2o_emitido_aterro = n2o_aterro_diario.sum()
+
+    # --- Pré‑descarte (CH₄ e N₂O) ---
+    # CH₄ pré-descarte: constante durante os 3 dias iniciais
+    ch4_pre_total = residuo_kg * ch4_pre_dia_kg * 3
+    # N₂O pré-descarte: total distribuído em 3 dias conforme perfil
+    n2o_pre_total = residuo_kg * n2o_pre_total_kg
+    # Distribuição sobre os dias (pulso único, mas distribuído)
+    n2o_pre_diario = np.zeros(dias_simulacao)
+    for atraso, frac in PROFILE_N2O_PRE.items():
+        idx = atraso - 1
+        if idx < dias_simulacao:
+            n2o_pre_diario[idx] += n2o_pre_total * frac
+    n2o_pre_emitido = n2o_pre_diario.sum()
+
+    # Somar pré‑descarte ao aterro (não multiplicado por φ)
+    ch4_emitido_aterro += ch4_pre_total
+    n2o_emitido_aterro += n2o_pre_emitido
+
+    # ==================== VERMICOMPOSTAGEM ====================
+    # Cálculo das emissões totais potenciais (kg) para o resíduo
+    ch4_potencial_vermi = residuo_kg * (TOC_YANG * CH4_C_FRAC_YANG * (16/12) * fracao_ms)
+    n2o_potencial_vermi = residuo_kg * (TN_YANG * N2O_N_FRAC_YANG * (44/28) * fracao_ms)
+
+    # Distribuição temporal com perfis diários de 50 dias
+    pulse_vermi = np.zeros(dias_simulacao)
+    pulse_vermi[0] = 1.0   # marcador para convolução
+    # Convolver cada perfil com o pulso unitário
+    ch4_vermi_diario = np.convolve(pulse_vermi, PROFILE_CH4_VERMI, mode='full')[:dias_simulacao]
+    n2o_vermi_diario = np.convolve(pulse_vermi, PROFILE_N2O_VERMI, mode='full')[:dias_simulacao]
+    # Multiplicar pelos fatores de emissão totais
+    ch4_vermi_diario *= ch4_potencial_vermi
+    n2o_vermi_diario *= n2o_potencial_vermi
+    ch4_emitido_vermi = ch4_vermi_diario.sum()
+    n2o_emitido_vermi = n2o_vermi_diario.sum()
+
+    # ==================== EMISSÕES EM CO₂eq ====================
+    emissao_aterro_kgco2eq = (ch4_emitido_aterro * GWP_CH4_20 +
+                              n2o_emitido_aterro * GWP_N2O_20)
+    emissao_vermi_kgco2eq = (ch4_emitido_vermi * GWP_CH4_20 +
+                             n2o_emitido_vermi * GWP_N2O_20)
+    emissoes_evitadas_tco2eq = (emissao_aterro_kgco2eq - emissao_vermi_kgco2eq) / 1000
+
+    # ==================== DICIONÁRIO DE SAÍDA (compatível com a interface original) ====================
+    return {
+        'residuo_kg': residuo_kg,
+        'ch4_total_aterro': ch4_potencial_total,
+        'ch4_emitido_aterro_bruto': ch4_emitido_periodo_bruto,
+        'ch4_pre_descarte': ch4_pre_total,
+        'ch4_emitido_aterro_periodo': ch4_emitido_aterro,
+        'n2o_total_aterro': n2o_total_aterro,
+        'n2o_pre_descarte': n2o_pre_total,
+        'n2o_emitido_aterro_periodo': n2o_emitido_aterro,
+        'ch4_total_compostagem': ch4_potencial_vermi,
+        'n2o_total_compostagem': n2o_potencial_vermi,
+        'ch4_emitido_compostagem_periodo': ch4_emitido_vermi,
+        'n2o_emitido_compostagem_periodo': n2o_emitido_vermi,
+        'emissao_aterro_kgco2eq': emissao_aterro_kgco2eq,
+        'emissao_compostagem_kgco2eq': emissao_vermi_kgco2eq,
+        'emissoes_evitadas_tco2eq': emissoes_evitadas_tco2eq,
+        'parametros': {
+            'capacidade_litros': capacidade_litros,
+            'densidade_kg_l': densidade,
+            'periodo_anos': periodo_anos,
+            'k_ano': k_ano,
+            'fracao_ch4_emitida': fracao_ch4_emitida,
+            'phi': phi,
+            'T': T, 'DOC': DOC, 'DOCf': DOCf,
+            'TOC_YANG': TOC_YANG, 'TN_YANG': TN_YANG,
+            'CH4_C_FRAC_YANG': CH4_C_FRAC_YANG, 'N2O_N_FRAC_YANG': N2O_N_FRAC_YANG,
+            'umidade': umidade,
+            'GWP_CH4_20': GWP_CH4_20, 'GWP_N2O_20': GWP_N2O_20,
+            'f_aberto': f_aberto, 'E_medio': E_medio,
+            'E_medio_ajust': E_medio_ajust, 'fator_umid': fator_umid,
+            'ch4_pre_dia_kg': ch4_pre_dia_kg,
+            'n2o_pre_total_kg': n2o_pre_total_kg
+        }
+    }
+
+def calcular_creditos_reatores(df_reatores, df_escolas, periodo_anos=10, k_ano=K_ANO_PADRAO):
+    """
+    Monta a tabela compacta de créditos (uma linha numérica por reator cheio).
+    O detalhamento completo é recalculado sob demanda com
+    calcular_emissoes_evitadas_reator_detalhado, em vez de ser guardado para toda a frota.
+    """
+    # Somente reatores cheios, excluindo os do tipo Líquido (coletores de chorume)
+    reatores_cheios = df_reatores[df_reatores['is_cheio'] & ~df_reatores['is_liquido']]
+    if reatores_cheios.empty:
+        return pd.DataFrame(), 0, 0
+    df_resultados = reatores_cheios.reindex(columns=['id_reator', 'id_escola', 'data_encheu', 'data_colheita',
+                                                     'altura_cm', 'largura_cm', 'comprimento_cm'])
+    # float32 na tabela compacta: volta a float64 arredondado para manter o valor exato da planilha
+    df_resultados['capacidade_litros'] = reatores_cheios['capacidade_litros'].astype(float).round(2).fillna(100)
+    # As emissões dependem apenas da capacidade (para período e k fixos): um cálculo por capacidade distinta
+    por_capacidade = {
+        capacidade: calcular_emissoes_evitadas_reator_detalhado(capacidade, periodo_anos, k_ano)
+        for capacidade in df_resultados['capacidade_litros'].unique()
+    }
+    df_resultados['residuo_kg'] = df_resultados['capacidade_litros'].map(
+        {cap: calc['residuo_kg'] for cap, calc in por_capacidade.items()})
+    df_resultados['emissoes_evitadas_tco2eq'] = df_resultados['capacidade_litros'].map(
+        {cap: calc['emissoes_evitadas_tco2eq'] for cap, calc in por_capacidade.items()})
+    df_resultados = df_resultados.reset_index(drop=True)
+    if 'nome_escola' in df_escolas.columns:
+        df_resultados = df_resultados.merge(df_escolas[['id_escola', 'nome_escola']], on='id_escola', how='left')
+    total_residuo = df_resultados['residuo_kg'].sum()
+    total_emissoes_evitadas = df_resultados['emissoes_evitadas_tco2eq'].sum()
+    return df_resultados, total_residuo, total_emissoes_evitadas
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de carga do app com várias sessões simultâneas (websocket do
+Streamlit, sem navegador). O servidor local usa uma planilha sintética e
+as cotações de referência (COTACOES_LOCAIS=1), sem acessar a internet.
+Dependências: requirements-dev.txt.
+
+    python carga.py roteiro --sessoes 10 30 50   # latência p50/p95/p99, vazão e memória por roteiro
+    python carga.py memoria --sessoes 1 10 30    # memória residente do servidor por número de sessões
+    python carga.py execucao                     # tempo de execução do script (AppTest, uma sessão)
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from websockets.sync.client import connect
+
+from wake_up_bot import executar_script, localizar_servidor, url_websocket
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+# =============================================================================
+# SERVIDOR LOCAL
+# =============================================================================
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def iniciar_servidor(caminho_planilha, script="app.py", timeout=120):
+    """Sobe 'streamlit run' apontando para a planilha e retorna (processo, url_base)."""
+    porta = _porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless=true", f"--server.port={porta}",
+         "--server.address=127.0.0.1", "--browser.gatherUsageStats=false"],
+        cwd=PASTA_APP, env={**os.environ, "URL_EXCEL": caminho_planilha, "COTACOES_LOCAIS": "1"},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        url_base, _ = localizar_servidor(f"http://127.0.0.1:{porta}/", timeout=5)
+        if url_base is not None:
+            return processo, url_base
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor do Streamlit terminou antes de responder.")
+        time.sleep(0.5)
+    processo.terminate()
+    raise TimeoutError("O servidor do Streamlit não respondeu dentro do tempo limite.")
+
+def memoria_processo(pid):
+    """(memória residente atual, pico) em MB, lidos de /proc (Linux)."""
+    valores = {}
+    with open(f"/proc/{pid}/status") as arquivo:
+        for linha in arquivo:
+            chave, _, valor = linha.partition(":")
+            if chave in ("VmRSS", "VmHWM"):
+                valores[chave] = int(valor.split()[0]) / 1024
+    return valores["VmRSS"], valores["VmHWM"]
+
+# =============================================================================
+# SESSÕES SIMULTÂNEAS
+# =============================================================================
+
+def abrir_sessoes(url_base, n_sessoes, timeout=300):
+    """
+    Abre 'n_sessoes' sessões ao mesmo tempo, executa o script uma vez em cada
+    e as mantém abertas. Retorna (conexões, métricas de cada execução).
+    """
+    conexoes = [None] * n_sessoes
+    metricas = [None] * n_sessoes
+    def sessao(i):
+        try:
+            conexoes[i] = connect(url_websocket(url_base), open_timeout=timeout, max_size=None,
+                                  ping_interval=None)
+            metricas[i] = executar_script(conexoes[i], timeout=timeout)
+        except Exception as e:
+            metricas[i] = {'erro': str(e)}
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(n_sessoes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [ws for ws in conexoes if ws is not None], metricas
+
+def medir_memoria_sessoes(n_sessoes=(1, 10, 30, 50), n_reatores=10_000, script="app.py"):
+    """
+    Para cada número de sessões, sobe um servidor novo, aquece os caches com
+    uma sessão e então abre as sessões simultâneas. Retorna uma linha por
+    número de sessões com a memória do servidor (MB) antes, depois e no pico.
+    """
+    from dados import gerar_planilha_sintetica
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        planilha = gerar_planilha_sintetica(os.path.join(pasta, "sintetica.xlsx"), n_reatores)
+        for n in n_sessoes:
+            processo, url_base = iniciar_servidor(planilha, script)
+            try:
+                with connect(url_websocket(url_base), max_size=None, ping_interval=None) as ws:
+                    executar_script(ws, timeout=600)
+                rss_aquecido, _ = memoria_processo(processo.pid)
+                conexoes, metricas = abrir_sessoes(url_base, n)
+                rss_final, pico = memoria_processo(processo.pid)
+                for ws in conexoes:
+                    ws.close()
+                tempos = sorted(m['script_concluido_s'] for m in metricas if 'erro' not in m)
+                linhas.append({
+                    'sessoes': n, 'erros': sum('erro' in m for m in metricas),
+                    'rss_aquecido_mb': rss_aquecido, 'rss_com_sessoes_mb': rss_final, 'pico_mb': pico,
+                    'mb_por_sessao': (rss_final - rss_aquecido) / n,
+                    'execucao_mais_lenta_s': tempos[-1] if tempos else None
+                })
+            finally:
+                processo.terminate()
+                processo.wait()
+    return linhas
+
+def medir_execucao(n_reatores=10_000, execucoes=3, script="app.py"):
+    """Tempo de cada execução do app (AppTest, sem servidor) com uma planilha sintética de 'n_reatores' reatores."""
+    from streamlit.testing.v1 import AppTest
+    from dados import gerar_planilha_sintetica
+    anteriores = {chave: os.environ.get(chave) for chave in ('URL_EXCEL', 'COTACOES_LOCAIS')}
+    with tempfile.TemporaryDirectory() as pasta:
+        try:
+            os.environ['URL_EXCEL'] = gerar_planilha_sintetica(os.path.join(pasta, "sintetica.xlsx"), n_reatores)
+            os.environ['COTACOES_LOCAIS'] = "1"
+            app = AppTest.from_file(os.path.join(PASTA_APP, script), default_timeout=600)
+            tempos = []
+            for _ in range(execucoes):
+                inicio = time.perf_counter()
+                app.run()
+                tempos.append(time.perf_counter() - inicio)
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+        finally:
+            for chave, valor in anteriores.items():
+                if valor is None:
+                    os.environ.pop(chave, None)
+                else:
+                    os.environ[chave] = valor
+    return [{'execucao': i + 1, 'tempo_s': tempo} for i, tempo in enumerate(tempos)]
+
+# =============================================================================
+# ROTEIROS DE USO (SESSÕES QUE MEXEM NOS WIDGETS)
+# =============================================================================
+
+# Campo do WidgetState usado por tipo de widget
+CAMPOS_VALOR = {'slider': 'double_array_value', 'number_input': 'double_value', 'selectbox': 'string_value',
+                'radio': 'string_value', 'button': 'trigger_value', 'checkbox': 'bool_value',
+                'text_input': 'string_value'}
+
+class WidgetAusente(KeyError):
+    """O passo pede um widget que a última execução não desenhou (ex.: escola sem reatores)."""
+
+class SessaoCarga:
+    """
+    Uma sessão do app pelo websocket. Os widgets são localizados pela 'key'
+    ou, sem key, pelo rótulo, a partir dos elementos da última execução.
+    """
+    def __init__(self, url_base, semente=0, timeout=300):
+        self.ws = connect(url_websocket(url_base), open_timeout=timeout, max_size=None, ping_interval=None)
+        self.rng = np.random.default_rng(semente)
+        self.timeout = timeout
+        self.widgets = {}  # nome (key ou rótulo) -> (id, tipo)
+        self.opcoes = {}   # nome -> opções do selectbox/radio
+        self.valores = {}  # nome -> valor escolhido (mantido entre execuções)
+
+    def _registrar(self, msg, widgets, opcoes):
+        if msg.WhichOneof('type') != 'delta' or msg.delta.WhichOneof('type') != 'new_element':
+            return
+        tipo = msg.delta.new_element.WhichOneof('type')
+        if tipo not in CAMPOS_VALOR:
+            return
+        elemento = getattr(msg.delta.new_element, tipo)
+        chave = elemento.id.rsplit('-', 1)[-1]
+        for nome in ((chave,) if chave != 'None' else ()) + (elemento.label,):
+            widgets.setdefault(nome, (elemento.id, tipo))
+            if hasattr(elemento, 'options'):
+                opcoes.setdefault(nome, list(elemento.options))
+
+    def executar(self, alteracoes=None):
+        """
+        Executa o script com as alterações {nome: valor}; botões recebem True e
+        só valem nesta execução. Levanta WidgetAusente, sem executar, se algum
+        widget pedido não estiver na página.
+        """
+        ausentes = [nome for nome in (alteracoes or {}) if nome not in self.widgets]
+        if ausentes:
+            raise WidgetAusente(ausentes)
+        estados = WidgetStates()
+        gatilhos = {}
+        for nome, valor in (alteracoes or {}).items():
+            if self.widgets[nome][1] == 'button':
+                gatilhos[nome] = valor
+            else:
+                self.valores[nome] = valor
+        for nome, valor in {**self.valores, **gatilhos}.items():
+            if nome not in self.widgets:
+                continue
+            id_widget, tipo = self.widgets[nome]
+            estado = estados.widgets.add()
+            estado.id = id_widget
+            campo = CAMPOS_VALOR[tipo]
+            if campo == 'double_array_value':
+                estado.double_array_value.data[:] = [float(valor)]
+            else:
+                setattr(estado, campo, valor)
+        widgets, opcoes = {}, {}
+        metricas = executar_script(self.ws, timeout=self.timeout, widget_states=estados,
+                                   ao_receber=lambda msg: self._registrar(msg, widgets, opcoes))
+        self.widgets, self.opcoes = widgets, opcoes
+        return metricas
+
+    def primeira_chave(self, prefixo):
+        return next((nome for nome in self.widgets if nome.startswith(prefixo)), prefixo)
+
+    def fechar(self):
+        self.ws.close()
+
+# Jornada de um aluno na aula: cada passo é (nome, função da sessão -> alterações de widgets)
+ROTEIRO_ALUNO = [
+    ("abrir página", lambda s: {}),
+    ("mudar parâmetros", lambda s: {"Período de crédito (anos)": int(s.rng.integers(5, 21)),
+                                    "Taxa de decaimento (k) [ano⁻¹]": round(float(s.rng.choice([0.05, 0.06, 0.08])), 2)}),
+    ("filtrar escola", lambda s: {"Selecionar escola": str(s.rng.choice(s.opcoes["Selecionar escola"][1:]))}),
+    ("digitar kWh", lambda s: {"Digite seu consumo mensal (kWh):": float(s.rng.integers(100, 400))}),
+    ("escolher quantidade", lambda s: {s.primeira_chave("compra_"): 0.0001}),
+    ("comprar créditos", lambda s: {s.primeira_chave("btn_"): True}),
+    ("filtrar outra escola", lambda s: {"Selecionar escola": str(s.rng.choice(s.opcoes["Selecionar escola"][1:]))}),
+    ("voltar para todas as escolas", lambda s: {"Selecionar escola": "Todas as escolas"})
+]
+
+def executar_roteiro(url_base, roteiro=ROTEIRO_ALUNO, semente=0, pausa_s=0.5, timeout=300):
+    """
+    Percorre o roteiro em uma sessão nova; retorna uma linha por passo
+    (latência e exceções). Passos cujos widgets não aparecem na página são
+    marcados como pulados; uma conexão recusada vira um passo com erro.
+    """
+    sessao = None
+    passos = []
+    inicio = time.perf_counter()
+    try:
+        sessao = SessaoCarga(url_base, semente, timeout)
+    except Exception as e:
+        return [{'passo': "conectar", 'latencia_s': time.perf_counter() - inicio, 'excecoes': 0, 'pulado': False,
+                 'erro': repr(e), 'fim': time.perf_counter()}]
+    try:
+        for nome, alteracoes in roteiro:
+            if passos and pausa_s:
+                time.sleep(sessao.rng.uniform(0, 2 * pausa_s))  # tempo de leitura/clique do aluno
+            inicio = time.perf_counter()
+            try:
+                metricas = sessao.executar(alteracoes(sessao))
+                passos.append({'passo': nome, 'latencia_s': metricas['script_concluido_s'],
+                               'excecoes': metricas['excecoes'], 'pulado': False, 'erro': None,
+                               'fim': time.perf_counter()})
+            except WidgetAusente:
+                passos.append({'passo': nome, 'latencia_s': None, 'excecoes': 0, 'pulado': True, 'erro': None,
+                               'fim': time.perf_counter()})
+            except Exception as e:
+                passos.append({'passo': nome, 'latencia_s': time.perf_counter() - inicio, 'excecoes': 0,
+                               'pulado': False, 'erro': repr(e), 'fim': time.perf_counter()})
+                break
+    finally:
+        sessao.fechar()
+    return passos
+
+def testar_carga(n_sessoes=(10, 30, 50), n_reatores=10_000, roteiro=ROTEIRO_ALUNO, pausa_s=0.5, script="app.py"):
+    """
+    Para cada número de sessões, sobe um servidor novo, aquece os caches e
+    roda o roteiro em todas as sessões ao mesmo tempo. Retorna uma linha por
+    número de sessões com latências p50/p95/p99 das execuções, vazão
+    (execuções/s), falhas e memória do servidor (MB).
+    """
+    from dados import gerar_planilha_sintetica
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        planilha = gerar_planilha_sintetica(os.path.join(pasta, "sintetica.xlsx"), n_reatores)
+        for n in n_sessoes:
+            processo, url_base = iniciar_servidor(planilha, script)
+            try:
+                executar_roteiro(url_base, roteiro[:1], pausa_s=0)
+                rss_aquecido, _ = memoria_processo(processo.pid)
+                resultados = [None] * n
+                def sessao(i):
+                    try:
+                        resultados[i] = executar_roteiro(url_base, roteiro, semente=i, pausa_s=pausa_s)
+                    except Exception as e:
+                        resultados[i] = [{'passo': "sessão", 'latencia_s': None, 'excecoes': 0, 'pulado': False,
+                                          'erro': repr(e), 'fim': time.perf_counter()}]
+                threads = [threading.Thread(target=sessao, args=(i,)) for i in range(n)]
+                inicio = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                duracao = time.perf_counter() - inicio
+                rss_final, pico = memoria_processo(processo.pid)
+            finally:
+                processo.terminate()
+                processo.wait()
+            passos = [passo for resultado in resultados for passo in resultado]
+            latencias = np.array([p['latencia_s'] for p in passos if p['erro'] is None and not p['pulado']])
+            p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) if len(latencias) else (np.nan,) * 3
+            linhas.append({
+                'sessoes': n, 'execucoes': len(latencias),
+                'falhas': sum(p['erro'] is not None for p in passos),
+                'passos_pulados': sum(p['pulado'] for p in passos),
+                'excecoes_no_app': sum(p['excecoes'] for p in passos),
+                'p50_s': p50, 'p95_s': p95, 'p99_s': p99,
+                'vazao_exec_s': len(latencias) / duracao, 'duracao_s': duracao,
+                'rss_aquecido_mb': rss_aquecido, 'rss_final_mb': rss_final, 'pico_mb': pico
+            })
+    return linhas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Testes de carga do app com várias sessões simultâneas.")
+    subparsers = parser.add_subparsers(dest="modo", required=True)
+    for modo, ajuda, padrao in (("roteiro", "Roteiro do aluno em N sessões: latência, vazão e memória", [10, 30, 50]),
+                                ("memoria", "Memória do servidor com N sessões abertas", [1, 10, 30, 50]),
+                                ("execucao", "Tempo de execução do script em uma sessão (AppTest)", None)):
+        sub = subparsers.add_parser(modo, help=ajuda)
+        if padrao is not None:
+            sub.add_argument("--sessoes", type=int, nargs="+", default=padrao)
+        sub.add_argument("--reatores", type=int, default=10_000, help="Reatores na planilha sintética")
+        sub.add_argument("--script", default="app.py", help="Script do app (relativo à pasta do projeto)")
+        if modo == "roteiro":
+            sub.add_argument("--pausa", type=float, default=0.5, help="Pausa média entre passos (s)")
+    args = parser.parse_args(argv)
+    if args.modo == "roteiro":
+        linhas = testar_carga(args.sessoes, args.reatores, pausa_s=args.pausa, script=args.script)
+    elif args.modo == "execucao":
+        linhas = medir_execucao(args.reatores, script=args.script)
+    else:
+        linhas = medir_memoria_sessoes(args.sessoes, args.reatores, args.script)
+    for linha in linhas:
+        print(" | ".join(f"{chave}: {valor:.2f}" if isinstance(valor, float) else f"{chave}: {valor}"
+                         for chave, valor in linha.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Torna os módulos da raiz (dados, agenda, valoracao...) importáveis pelos testes em tests/
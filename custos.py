@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Análise de custos do programa: gastos (em centavos exatos) por escola, mês e
+categoria, combinados com os créditos de carbono para obter o custo por tCO₂eq.
+"""
+import numpy as np
+import pandas as pd
+
+from dados import ESCOLA_GERAL
+
+def agregar_gastos(df_gastos):
+    """
+    Totais de gastos em centavos por escola, por mês de compra e por categoria.
+    Espera a tabela já preparada por dados.preparar_gastos.
+    """
+    valores = df_gastos['valor_centavos'].fillna(0)
+    def total_por(chave):
+        return (valores.groupby(df_gastos[chave], observed=True, dropna=True).sum()
+                .astype('int64').rename('gasto_centavos').rename_axis(chave).reset_index())
+    return {
+        'por_escola': total_por('id_escola'),
+        'por_mes': total_por('mes_compra'),
+        'por_categoria': total_por('categoria').sort_values('gasto_centavos', ascending=False, ignore_index=True)
+    }
+
+def custo_por_escola(agregados, df_creditos):
+    """
+    Custo por tCO₂eq de cada escola. Gastos sem escola (ESCOLA_GERAL) são
+    comparados com os créditos de todo o programa.
+    """
+    if df_creditos.empty:
+        creditos = pd.Series(dtype=float)
+    else:
+        creditos = (df_creditos.groupby(df_creditos['id_escola'].astype(str))['emissoes_evitadas_tco2eq'].sum())
+    gastos = agregados['por_escola'].set_index('id_escola')['gasto_centavos']
+    df = pd.concat([gastos, creditos.rename('emissoes_evitadas_tco2eq')], axis=1)
+    df['gasto_centavos'] = df['gasto_centavos'].fillna(0).astype('int64')
+    df['emissoes_evitadas_tco2eq'] = df['emissoes_evitadas_tco2eq'].fillna(0.0)
+    if ESCOLA_GERAL in df.index:
+        df.loc[ESCOLA_GERAL, 'emissoes_evitadas_tco2eq'] = creditos.sum()
+    df['custo_por_tco2eq'] = (df['gasto_centavos'] / 100) / df['emissoes_evitadas_tco2eq'].where(
+        df['emissoes_evitadas_tco2eq'] > 0)
+    return df.rename_axis('id_escola').reset_index()
+
+def ratear_gastos_gerais(custos):
+    """
+    Reparte os gastos sem escola (ESCOLA_GERAL) da tabela de custo_por_escola
+    entre as escolas, na proporção das emissões evitadas de cada uma, em
+    centavos exatos (as sobras do arredondamento vão para as maiores frações).
+    Acrescenta 'rateio_geral_centavos' e 'custo_total_por_tco2eq' e tira a
+    linha ESCOLA_GERAL.
+    """
+    df = custos.set_index('id_escola')
+    geral = int(df.loc[ESCOLA_GERAL, 'gasto_centavos']) if ESCOLA_GERAL in df.index else 0
+    df = df.drop(index=ESCOLA_GERAL, errors='ignore')
+    emissoes = df['emissoes_evitadas_tco2eq'].to_numpy(dtype=float)
+    rateio = np.zeros(len(df), dtype='int64')
+    if geral and emissoes.sum() > 0:
+        cotas = geral * emissoes / emissoes.sum()
+        rateio = np.floor(cotas).astype('int64')
+        sobras = geral - int(rateio.sum())
+        rateio[np.argsort(rateio - cotas, kind='stable')[:sobras]] += 1
+    df['rateio_geral_centavos'] = rateio
+    df['custo_total_por_tco2eq'] = ((df['gasto_centavos'] + df['rateio_geral_centavos']) / 100) / df[
+        'emissoes_evitadas_tco2eq'].where(df['emissoes_evitadas_tco2eq'] > 0)
+    return df.rename_axis('id_escola').reset_index()
+
+def custo_ao_longo_do_tempo(agregados, df_creditos):
+    """
+    Gastos e créditos acumulados mês a mês (créditos pelo mês em que o reator
+    encheu) e o custo acumulado por tCO₂eq em cada mês.
+    """
+    gastos = agregados['por_mes'].set_index('mes_compra')['gasto_centavos']
+    if df_creditos.empty:
+        creditos = pd.Series(dtype=float)
+    else:
+        creditos = (df_creditos.groupby(df_creditos['data_encheu'].dt.to_period('M'))
+                    ['emissoes_evitadas_tco2eq'].sum())
+    meses = gastos.index.union(creditos.index)
+    if meses.empty:
+        meses = pd.PeriodIndex([], freq='M')
+    else:
+        meses = pd.period_range(meses.min(), meses.max(), freq='M')
+    df = pd.DataFrame({
+        'mes': meses,
+        'gasto_acumulado_centavos': gastos.reindex(meses, fill_value=0).cumsum().astype('int64').values,
+        'emissoes_acumuladas_tco2eq': creditos.reindex(meses, fill_value=0.0).cumsum().values
+    })
+    df['custo_por_tco2eq'] = (df['gasto_acumulado_centavos'] / 100) / df['emissoes_acumuladas_tco2eq'].where(
+        df['emissoes_acumuladas_tco2eq'] > 0)
+    return df
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura e normalização da planilha de vermicompostagem.
+Não depende do Streamlit, para poder ser usado também em scripts e relatórios.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# ESQUEMA COMPACTO DAS TABELAS
+# =============================================================================
+
+COLUNAS_CATEGORICAS_REATORES = ['id_reator', 'id_escola', 'status_reator', 'tipo_caixa']
+COLUNAS_FLOAT32_REATORES = ['altura_cm', 'largura_cm', 'comprimento_cm', 'volume_calculado_litros',
+                            'peso_estimado_kg', 'capacidade_litros', 'residuo_kg_estimado',
+                            'sólido_kg', 'líquido_litros']
+COLUNAS_CATEGORICAS_ESCOLAS = ['id_escola', 'status']
+COLUNAS_FLOAT32_ESCOLAS = ['capacidade_total_sistema_litros', 'num_caixas_processamento', 'num_caixas_líquido']
+
+# =============================================================================
+# ESQUEMA DECLARATIVO DA PLANILHA
+# =============================================================================
+
+FORMATO_DATA_PLANILHA = '%d/%m/%Y'  # datas digitadas como texto na planilha do programa
+
+# coluna: (tipo, obrigatória, valor usado quando a coluna não existe na aba[, formato das datas em texto])
+ESQUEMA_PLANILHA = {
+    'escolas': {
+        'id_escola': ('texto', True, None),
+        'nome_escola': ('texto', False, None),
+        'data_implantacao': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'status': ('texto', False, 'Ativo'),
+        'ultima_visita': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'observacoes': ('texto', False, None),
+        'capacidade_total_sistema_litros': ('numero', False, None),
+        'num_caixas_processamento': ('numero', False, None),
+        'num_caixas_líquido': ('numero', False, None)
+    },
+    'reatores': {
+        'id_reator': ('texto', True, None),
+        'id_escola': ('texto', False, None),
+        'altura_cm': ('numero', False, None),
+        'largura_cm': ('numero', False, None),
+        'comprimento_cm': ('numero', False, None),
+        'volume_calculado_litros': ('numero', False, None),
+        'peso_estimado_kg': ('numero', False, None),
+        'tipo_caixa': ('texto', False, None),
+        'status_reator': ('texto', False, None),
+        'data_ativacao': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'data_encheu': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'data_colheita': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'sólido_kg': ('numero', False, None),
+        'líquido_litros': ('numero', False, None),
+        'observacoes': ('texto', False, None)
+    },
+    'gastos': {
+        'id_gasto': ('texto', False, None),
+        'nome_gasto': ('texto', False, None),
+        'data_compra': ('data', False, None, FORMATO_DATA_PLANILHA),
+        'valor': ('moeda', False, 0)
+    }
+}
+CHAVES_UNICAS = {'escolas': 'id_escola', 'reatores': 'id_reator'}
+
+# Formatos aceitos para datas digitadas como texto; células de data do Excel já chegam tipadas
+FORMATOS_DATA = ['%d/%m/%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%y', '%d-%m-%Y']
+AMOSTRA_FORMATO_DATA = 50  # células de texto usadas para escolher o formato de colunas sem formato declarado
+
+COLUNAS_ERROS = ['aba', 'linha', 'coluna', 'valor', 'motivo']
+MOTIVO_INVALIDO = {'texto': 'texto inválido', 'numero': 'número inválido', 'data': 'data inválida',
+                   'moeda': 'valor monetário inválido'}
+
+# =============================================================================
+# CONVERSÃO VETORIZADA POR TIPO
+# =============================================================================
+
+def _texto_da_celula(valor):
+    return str(int(valor)) if isinstance(valor, float) and valor.is_integer() else str(valor)
+
+def _converter_texto(serie):
+    """
+    Texto sem espaços nas pontas, com células vazias como NaN. Números
+    inteiros lidos como float (7.0, em colunas com células vazias) viram "7",
+    como nas abas em que a coluna é inteira. Retorna (convertida, preenchida).
+    """
+    if not isinstance(serie.dtype, pd.StringDtype):
+        if serie.isna().all():
+            return serie, serie.notna()
+        if pd.api.types.is_float_dtype(serie):
+            inteiro = serie.notna() & (serie % 1 == 0)
+            texto = serie.astype(str).where(~inteiro, serie.where(inteiro).astype('Int64').astype(str))
+        else:
+            texto = serie.map(_texto_da_celula, na_action='ignore')
+        serie = texto.where(serie.notna())
+    texto = serie.str.strip()
+    texto = texto.mask(texto == '')
+    return texto, texto.notna()
+
+def _converter_numero(serie):
+    return pd.to_numeric(serie, errors='coerce'), serie.notna()
+
+def formato_data_provavel(serie, formatos=FORMATOS_DATA, amostra=AMOSTRA_FORMATO_DATA):
+    """
+    Formato de 'formatos' que resolve mais células de uma amostra da coluna
+    (empate: o primeiro); para no primeiro que resolve a amostra inteira.
+    """
+    texto = serie.dropna().head(amostra).astype(str).str.strip()
+    acertos = []
+    for formato in formatos:
+        acertos.append(int(pd.to_datetime(texto, format=formato, errors='coerce').notna().sum()))
+        if acertos[-1] == len(texto):
+            break
+    return formatos[int(np.argmax(acertos))]
+
+def _converter_data(serie, formato=None):
+    """
+    Converte com formatos explícitos: 'formato' (ou, sem ele, o mais provável
+    na amostra da coluna) é aplicado à coluna inteira; das células que
+    sobraram, números viram datas seriais do Excel e textos são limpos e
+    testados em todos os formatos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie, serie.notna()
+    if pd.api.types.is_numeric_dtype(serie):
+        # Número serial de data do Excel
+        return pd.to_datetime(serie, unit='D', origin='1899-12-30', errors='coerce'), serie.notna()
+    preenchida = serie.notna()
+    if not preenchida.any():
+        return pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]'), preenchida
+    formato = formato or formato_data_provavel(serie)
+    resultado = pd.to_datetime(serie, format=formato, errors='coerce')
+    faltando = (preenchida & resultado.isna()).to_numpy()
+    if not faltando.any():
+        return resultado, preenchida
+    valores = resultado.to_numpy().copy()
+    posicoes = np.flatnonzero(faltando)
+    sobras = serie.iloc[posicoes]
+    # Números no meio de textos: datas seriais do Excel, como nas colunas só numéricas
+    eh_numero = sobras.map(lambda valor: isinstance(valor, (int, float, np.number)) and not isinstance(valor, bool),
+                           na_action='ignore').fillna(False).astype(bool).to_numpy()
+    if eh_numero.any():
+        seriais = pd.to_datetime(pd.to_numeric(sobras[eh_numero]), unit='D', origin='1899-12-30', errors='coerce')
+        valores[posicoes[eh_numero]] = seriais.to_numpy(dtype=valores.dtype)
+    texto, preenchida_texto = _converter_texto(sobras)
+    preenchida = preenchida.to_numpy().copy()
+    preenchida[faltando] = preenchida_texto.to_numpy()
+    pendentes = texto.notna().to_numpy() & ~eh_numero
+    for formato_sobra in FORMATOS_DATA:
+        if not pendentes.any():
+            break
+        indices = np.flatnonzero(pendentes)
+        convertidas = pd.to_datetime(texto.iloc[indices], format=formato_sobra,
+                                     errors='coerce').to_numpy(dtype=valores.dtype)
+        resolvidas = ~np.isnat(convertidas)
+        valores[posicoes[indices[resolvidas]]] = convertidas[resolvidas]
+        pendentes[indices[resolvidas]] = False
+    return pd.Series(valores, index=serie.index), pd.Series(preenchida, index=serie.index)
+
+def _converter_moeda(serie):
+    # Mantém o valor original; a conversão para centavos é feita em preparar_gastos
+    return serie.where(converter_valor_centavos(serie).notna()), serie.notna()
+
+CONVERSORES = {'texto': _converter_texto, 'numero': _converter_numero, 'moeda': _converter_moeda}
+
+def _erros(aba, coluna, serie_original, mascara, motivo):
+    return pd.DataFrame({
+        'aba': aba,
+        'linha': serie_original.index[mascara] + 2,  # linha no Excel (cabeçalho na linha 1)
+        'coluna': coluna,
+        'valor': serie_original[mascara].astype(str).to_numpy(),
+        'motivo': motivo
+    })
+
+def validar_aba(df, aba, esquema=None, formatos_data=None):
+    """
+    Aplica o esquema da aba: converte cada coluna para o tipo declarado, cria
+    as colunas ausentes com o valor padrão, descarta linhas sem os campos
+    obrigatórios e com chave repetida. 'formatos_data' ({coluna: formato})
+    sobrepõe o formato de data declarado no esquema; colunas sem nenhum dos
+    dois têm o formato escolhido por amostra. Retorna (df, DataFrame de erros com aba, linha do Excel,
+    coluna, valor e motivo).
+    """
+    formatos_data = formatos_data or {}
+    esquema = esquema or ESQUEMA_PLANILHA[aba]
+    df = df.dropna(how='all').copy()
+    erros = []
+    for coluna, (tipo, obrigatoria, padrao, *formato_esquema) in esquema.items():
+        if coluna not in df.columns:
+            if obrigatoria:
+                erros.append(pd.DataFrame([{'aba': aba, 'linha': pd.NA, 'coluna': coluna, 'valor': None,
+                                            'motivo': 'coluna obrigatória ausente'}]))
+            df[coluna] = pd.Series(padrao, index=df.index,
+                                   dtype='datetime64[ns]' if tipo == 'data' else None)
+            continue
+        original = df[coluna]
+        if tipo == 'data':
+            formato = formatos_data.get(coluna, formato_esquema[0] if formato_esquema else None)
+            convertida, preenchida = _converter_data(original, formato)
+        else:
+            convertida, preenchida = CONVERSORES[tipo](original)
+        invalida = (preenchida & convertida.isna()).to_numpy()
+        if invalida.any():
+            erros.append(_erros(aba, coluna, original, invalida, MOTIVO_INVALIDO[tipo]))
+        df[coluna] = convertida
+        if obrigatoria:
+            vazia = convertida.isna().to_numpy() & ~invalida
+            if vazia.any():
+                erros.append(_erros(aba, coluna, original, vazia, 'campo obrigatório vazio'))
+            df = df[convertida.notna()]
+    chave = CHAVES_UNICAS.get(aba)
+    if chave is not None:
+        repetida = df[chave].notna().to_numpy() & df.duplicated(subset=[chave], keep='first').to_numpy()
+        if repetida.any():
+            erros.append(_erros(aba, chave, df[chave], repetida, 'chave repetida (mantida a primeira linha)'))
+            df = df[~repetida]
+    if not erros:
+        return df, pd.DataFrame(columns=COLUNAS_ERROS)
+    return df, pd.concat(erros, ignore_index=True).sort_values('linha', kind='stable', ignore_index=True)
+
+# =============================================================================
+# LEITURA DA PLANILHA
+# =============================================================================
+
+def ler_planilha_validada(url, densidade_kg_l):
+    """
+    Lê as abas 'escolas', 'reatores' e 'gastos' validando-as com
+    ESQUEMA_PLANILHA e calcula a capacidade (litros) e o peso estimado (kg)
+    dos reatores. Retorna (df_escolas, df_reatores, df_gastos, df_erros).
+    """
+    excel_file = pd.ExcelFile(url)
+    abas = {}
+    erros = []
+    for aba in ESQUEMA_PLANILHA:
+        abas[aba], erros_aba = validar_aba(pd.read_excel(excel_file, sheet_name=aba), aba)
+        erros.append(erros_aba)
+    df_escolas, df_reatores, df_gastos = abas['escolas'], abas['reatores'], abas['gastos']
+
+    # Capacidade: 'volume_calculado_litros' quando informado; senão pelas dimensões; senão 100 L
+    calculado = (df_reatores['altura_cm'] * df_reatores['largura_cm'] * df_reatores['comprimento_cm']) / 1000
+    df_reatores['capacidade_litros'] = (df_reatores['volume_calculado_litros'].fillna(calculado)
+                                        .round(2).fillna(100))
+
+    # Peso estimado: 'peso_estimado_kg' quando informado; senão capacidade × densidade
+    df_reatores['residuo_kg_estimado'] = df_reatores['peso_estimado_kg'].fillna(
+        df_reatores['capacidade_litros'] * densidade_kg_l).round(1)
+
+    return df_escolas, df_reatores, df_gastos, pd.concat(erros, ignore_index=True)
+
+def ler_planilha(url, densidade_kg_l):
+    """Como ler_planilha_validada, sem o relatório de erros."""
+    df_escolas, df_reatores, df_gastos, _ = ler_planilha_validada(url, densidade_kg_l)
+    return df_escolas, df_reatores, df_gastos
+
+# =============================================================================
+# GASTOS EM CENTAVOS EXATOS
+# =============================================================================
+
+ESCOLA_GERAL = "Geral"  # gastos sem id_escola são do programa como um todo
+
+def converter_valor_centavos(valores):
+    """
+    Converte valores monetários em centavos inteiros exatos (Int64), de forma
+    vetorizada. Aceita números ou texto no formato brasileiro ("R$ 1.234,56",
+    "1.234", "157,8") e também ponto decimal ("579.88"). Valores inválidos
+    viram <NA>.
+    """
+    if pd.api.types.is_numeric_dtype(valores):
+        return (valores.astype(float) * 100).round().astype('Int64')
+    if not isinstance(valores.dtype, pd.StringDtype):
+        # Colunas object misturam números nativos do Excel e texto: só o texto passa pelas regras
+        # brasileiras (12.345 como número são 12,35 reais, não doze mil)
+        eh_texto = valores.map(lambda valor: isinstance(valor, str), na_action='ignore').fillna(False).astype(bool)
+        if not eh_texto.all():
+            centavos = pd.Series(pd.NA, index=valores.index, dtype='Int64')
+            numeros = pd.to_numeric(valores[~eh_texto], errors='coerce')
+            centavos[~eh_texto] = (numeros.astype(float) * 100).round().astype('Int64')
+            if eh_texto.any():
+                centavos[eh_texto] = converter_valor_centavos(valores[eh_texto].astype(str))
+            return centavos
+    texto = valores.astype(str).str.replace(r'R\$|\s', '', regex=True)
+    com_virgula = texto.str.contains(',', regex=False)
+    texto = texto.where(~com_virgula,
+                        texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    so_milhar = ~com_virgula & texto.str.fullmatch(r'-?\d{1,3}(\.\d{3})+')
+    texto = texto.where(~so_milhar, texto.str.replace('.', '', regex=False))
+    partes = texto.str.extract(r'^(?P<sinal>-?)(?P<inteiro>\d+)(?:\.(?P<fracao>\d{1,2}))?$')
+    inteiro = pd.to_numeric(partes['inteiro'], errors='coerce').astype('Int64')
+    fracao = pd.to_numeric(partes['fracao'].fillna('').str.ljust(2, '0'), errors='coerce').astype('Int64')
+    sinal = partes['sinal'].map({'-': -1, '': 1}).astype('Int64')
+    return (sinal * (inteiro * 100 + fracao)).astype('Int64')
+
+def preparar_gastos(df_gastos):
+    """
+    Converte 'valor' uma única vez para 'valor_centavos' e acrescenta as chaves
+    de agregação 'id_escola', 'mes_compra' e 'categoria'.
+    """
+    df_gastos = df_gastos.copy()
+    if 'valor' in df_gastos.columns:
+        df_gastos['valor_centavos'] = converter_valor_centavos(df_gastos['valor'])
+    else:
+        df_gastos['valor_centavos'] = pd.Series(0, index=df_gastos.index, dtype='Int64')
+    if 'id_escola' in df_gastos.columns:
+        df_gastos['id_escola'] = df_gastos['id_escola'].fillna(ESCOLA_GERAL).astype(str)
+    else:
+        df_gastos['id_escola'] = ESCOLA_GERAL
+    if 'data_compra' in df_gastos.columns:
+        df_gastos['mes_compra'] = df_gastos['data_compra'].dt.to_period('M')
+    else:
+        df_gastos['mes_compra'] = pd.Series(pd.NaT, index=df_gastos.index, dtype='period[M]')
+    # Sem coluna 'categoria', o código do gasto (ex.: 'minhoca', 'serragem') faz esse papel
+    coluna_categoria = 'categoria' if 'categoria' in df_gastos.columns else 'id_gasto'
+    if coluna_categoria in df_gastos.columns:
+        df_gastos['categoria'] = df_gastos[coluna_categoria].fillna('Sem categoria').astype(str)
+    else:
+        df_gastos['categoria'] = 'Sem categoria'
+    return df_gastos
+
+# =============================================================================
+# TIPAGEM COMPACTA E INDICADORES DERIVADOS
+# =============================================================================
+
+def compactar_tabelas(df_escolas, df_reatores):
+    """
+    Converte IDs e status em categorias, medidas em float32 e deriva uma única
+    vez as colunas booleanas is_liquido, is_cheio (reatores) e is_ativo (escolas).
+    """
+    df_reatores = df_reatores.copy()
+    df_escolas = df_escolas.copy()
+
+    if 'tipo_caixa' in df_reatores.columns:
+        df_reatores['is_liquido'] = (df_reatores['tipo_caixa'].astype(str).str.lower()
+                                     .str.contains('líquido|liquido', na=False))
+    else:
+        df_reatores['is_liquido'] = False
+    if 'data_encheu' in df_reatores.columns:
+        df_reatores['is_cheio'] = df_reatores['data_encheu'].notna()
+    else:
+        df_reatores['is_cheio'] = False
+    if 'status' in df_escolas.columns:
+        df_escolas['is_ativo'] = df_escolas['status'] == 'Ativo'
+    else:
+        df_escolas['is_ativo'] = True
+
+    for df, categoricas, float32 in ((df_reatores, COLUNAS_CATEGORICAS_REATORES, COLUNAS_FLOAT32_REATORES),
+                                     (df_escolas, COLUNAS_CATEGORICAS_ESCOLAS, COLUNAS_FLOAT32_ESCOLAS)):
+        for col in categoricas:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        for col in float32:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+
+    return df_escolas, df_reatores
+
+def relatorio_memoria(tabelas_originais, tabelas_compactas):
+    """
+    Compara o uso de memória (bytes, com conteúdo de strings) de cada tabela.
+    'tabelas_originais' devem ser as abas lidas sem tratamento (pd.read_excel).
+    """
+    linhas = []
+    for nome, original in tabelas_originais.items():
+        bytes_original = int(original.memory_usage(deep=True).sum())
+        bytes_compacto = int(tabelas_compactas[nome].memory_usage(deep=True).sum())
+        linhas.append({
+            'tabela': nome,
+            'linhas': len(original),
+            'bytes_original': bytes_original,
+            'bytes_compacto': bytes_compacto,
+            'reducao_pct': 100 * (1 - bytes_compacto / bytes_original) if bytes_original else 0.0
+        })
+    return pd.DataFrame(linhas)
+
+# =============================================================================
+# PLANILHA SINTÉTICA (TESTES DE DESEMPENHO)
+# =============================================================================
+
+def tabelas_sinteticas(n_reatores=10_000, n_escolas=200, n_gastos=500, semente=42):
+    """Retorna (df_escolas, df_reatores, df_gastos) com as mesmas colunas das abas da planilha real."""
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp.today().normalize()
+    ids_escolas = [f"ESC{i:04d}" for i in range(n_escolas)]
+    df_escolas = pd.DataFrame({
+        'id_escola': ids_escolas,
+        'nome_escola': [f"Escola {i:04d}" for i in range(n_escolas)],
+        'data_implantacao': hoje - pd.to_timedelta(rng.integers(200, 900, n_escolas), unit='D'),
+        'status': rng.choice(['Ativo', 'Inativo'], n_escolas, p=[0.9, 0.1]),
+        'ultima_visita': hoje - pd.to_timedelta(rng.integers(0, 120, n_escolas), unit='D'),
+        'observacoes': None,
+        'capacidade_total_sistema_litros': np.nan,
+        'num_caixas_processamento': np.nan,
+        'num_caixas_líquido': np.nan
+    })
+    ativacao = hoje - pd.to_timedelta(rng.integers(100, 700, n_reatores), unit='D')
+    encheu = ativacao + pd.to_timedelta(rng.integers(20, 90, n_reatores), unit='D')
+    tipo = rng.choice(['Processamento', 'Líquido'], n_reatores, p=[0.8, 0.2])
+    cheio = (rng.random(n_reatores) < 0.7) & (tipo == 'Processamento')
+    colheita = encheu + pd.to_timedelta(rng.integers(50, 90, n_reatores), unit='D')
+    df_reatores = pd.DataFrame({
+        'id_reator': [f"R{i:06d}" for i in range(n_reatores)],
+        'id_escola': rng.choice(ids_escolas, n_reatores),
+        'altura_cm': rng.choice([19, 25, 30], n_reatores),
+        'largura_cm': rng.choice([35, 40], n_reatores),
+        'comprimento_cm': rng.choice([56, 60], n_reatores),
+        'volume_calculado_litros': np.nan,
+        'peso_estimado_kg': np.nan,
+        'tipo_caixa': tipo,
+        'status_reator': np.where(cheio, 'Cheio', 'Enchendo'),
+        'data_ativacao': ativacao,
+        'data_encheu': pd.Series(encheu).where(cheio),
+        'data_colheita': pd.Series(colheita).where(cheio & (colheita < hoje)),
+        'sólido_kg': np.nan,
+        'líquido_litros': np.nan,
+        'observacoes': np.nan
+    })
+    df_gastos = pd.DataFrame({
+        'id_gasto': rng.choice(['minhoca', 'serragem', 'esterco', 'caixa'], n_gastos),
+        'nome_gasto': [f"Compra {i}" for i in range(n_gastos)],
+        'data_compra': hoje - pd.to_timedelta(rng.integers(0, 700, n_gastos), unit='D'),
+        'valor': rng.integers(500, 60000, n_gastos) / 100
+    })
+    return df_escolas, df_reatores, df_gastos
+
+def gerar_planilha_sintetica(caminho, n_reatores=10_000, n_escolas=200, n_gastos=500, semente=42):
+    """Grava uma planilha com as mesmas abas e colunas da real, para medir desempenho com frotas grandes."""
+    df_escolas, df_reatores, df_gastos = tabelas_sinteticas(n_reatores, n_escolas, n_gastos, semente)
+    with pd.ExcelWriter(caminho) as escritor:
+        df_escolas.to_excel(escritor, sheet_name='escolas', index=False)
+        df_reatores.to_excel(escritor, sheet_name='reatores', index=False)
+        df_gastos.to_excel(escritor, sheet_name='gastos', index=False)
+    return caminho
+
+# =============================================================================
+# MEDIÇÃO DA LEITURA (ESQUEMA x INFERÊNCIA DE FORMATO)
+# =============================================================================
+
+def _normalizar_por_inferencia(df, colunas_data, colunas_numericas):
+    """Normalização anterior ao esquema: inferência de formato de data por coluna, sem relatório."""
+    df = df.dropna(how='all')
+    df = df.dropna(subset=['id_reator'])
+    df = df[df['id_reator'].astype(str).str.strip() != '']
+    df = df.drop_duplicates(subset=['id_reator'], keep='first').copy()
+    for col in colunas_data:
+        try:
+            df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
+        except Exception:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in colunas_numericas:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+def medir_leitura(n_reatores=10_000, fracao_iso=0.1, repeticoes=3):
+    """
+    Normaliza a aba de reatores sintética com datas digitadas como texto
+    (dd/mm/aaaa, com 'fracao_iso' das células em aaaa-mm-dd) pela inferência
+    anterior e pelo esquema, sem a leitura do arquivo (igual nos dois casos).
+    Retorna os tempos da aba inteira e só das colunas de data, e quantas
+    datas preenchidas cada abordagem perdeu.
+    """
+    import time
+    rng = np.random.default_rng(0)
+    _, df_reatores, _ = tabelas_sinteticas(n_reatores)
+    colunas_data = [col for col, (tipo, *_) in ESQUEMA_PLANILHA['reatores'].items() if tipo == 'data']
+    colunas_numericas = [col for col, (tipo, *_) in ESQUEMA_PLANILHA['reatores'].items() if tipo == 'numero']
+    preenchidas = 0
+    for col in colunas_data:
+        iso = rng.random(n_reatores) < fracao_iso
+        preenchidas += int(df_reatores[col].notna().sum())
+        texto = df_reatores[col].dt.strftime('%d/%m/%Y').where(~iso, df_reatores[col].dt.strftime('%Y-%m-%d'))
+        df_reatores[col] = texto.astype(object)
+    formatos = {col: ESQUEMA_PLANILHA['reatores'][col][3] for col in colunas_data}
+    tempos = {'inferencia_s': [], 'esquema_s': [], 'datas_inferencia_s': [], 'datas_esquema_s': []}
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for col in colunas_data:
+            pd.to_datetime(df_reatores[col], dayfirst=True, errors='coerce')
+        tempos['datas_inferencia_s'].append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        for col in colunas_data:
+            _converter_data(df_reatores[col], formatos[col])
+        tempos['datas_esquema_s'].append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        por_inferencia = _normalizar_por_inferencia(df_reatores, colunas_data, colunas_numericas)
+        tempos['inferencia_s'].append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        por_esquema, _ = validar_aba(df_reatores, 'reatores')
+        tempos['esquema_s'].append(time.perf_counter() - inicio)
+    resultado = {chave: min(valores) for chave, valores in tempos.items()}
+    resultado['datas_perdidas_inferencia'] = preenchidas - int(por_inferencia[colunas_data].notna().sum().sum())
+    resultado['datas_perdidas_esquema'] = preenchidas - int(por_esquema[colunas_data].notna().sum().sum())
+    return resultado
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "dados_vermicompostagem_real.xlsx"
+    # Antes: abas como o read_excel as devolve (sem esquema nem tipagem compacta); depois: carregamento atual
+    brutas = pd.read_excel(caminho, sheet_name=['escolas', 'reatores'])
+    escolas, reatores, _ = ler_planilha(caminho, densidade_kg_l=0.6)
+    escolas_compactas, reatores_compactos = compactar_tabelas(escolas, reatores)
+    print(relatorio_memoria(brutas, {'escolas': escolas_compactas,
+                                     'reatores': reatores_compactos}).to_string(index=False))
+    for chave, valor in medir_leitura().items():
+        print(f"{chave}: {valor:.3f}" if isinstance(valor, float) else f"{chave}: {valor}")
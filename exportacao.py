@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação do pacote de auditoria (créditos por reator, parâmetros do cálculo
+e gastos) em CSV, Parquet ou XLSX com várias abas.
+
+As tabelas são geradas e gravadas em blocos, então a memória usada não cresce
+com o tamanho da frota. Uso em lote:
+
+    python exportacao.py --formato xlsx --saida auditoria.xlsx
+"""
+import argparse
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from calculos import (DENSIDADE_PADRAO, K_ANO_PADRAO, calcular_creditos_reatores,
+                      calcular_emissoes_evitadas_reator_detalhado)
+from dados import compactar_tabelas, ler_planilha, preparar_gastos
+
+TAMANHO_BLOCO = 5000  # linhas por bloco gravado
+
+COLUNAS_CREDITOS = ['id_reator', 'id_escola', 'nome_escola', 'data_encheu', 'altura_cm', 'largura_cm',
+                    'comprimento_cm', 'capacidade_litros', 'residuo_kg', 'emissoes_evitadas_tco2eq']
+COLUNAS_GASTOS = ['id_gasto', 'nome_gasto', 'data_compra', 'valor_centavos', 'id_escola', 'categoria']
+
+# =============================================================================
+# GERAÇÃO DAS TABELAS EM BLOCOS
+# =============================================================================
+
+def _em_blocos(df, tamanho_bloco):
+    for inicio in range(0, len(df), tamanho_bloco):
+        bloco = df.iloc[inicio:inicio + tamanho_bloco].copy()
+        # Categorias viram texto para que todos os blocos tenham o mesmo esquema
+        for col in bloco.columns:
+            if isinstance(bloco[col].dtype, pd.CategoricalDtype):
+                bloco[col] = bloco[col].astype(str)
+        yield bloco
+
+def _blocos_creditos(df_creditos, preco_tco2eq_brl, tamanho_bloco):
+    colunas = [col for col in COLUNAS_CREDITOS if col in df_creditos.columns]
+    for bloco in _em_blocos(df_creditos[colunas], tamanho_bloco):
+        if preco_tco2eq_brl is not None:
+            bloco['preco_tco2eq_brl'] = preco_tco2eq_brl
+            bloco['valor_creditos_brl'] = bloco['emissoes_evitadas_tco2eq'] * preco_tco2eq_brl
+        yield bloco
+
+def _linha_parametros(calculo):
+    linha = {chave: valor for chave, valor in calculo.items() if chave != 'parametros'}
+    linha.update(calculo['parametros'])
+    return linha
+
+def _blocos_parametros(df_creditos, periodo_anos, k_ano, tamanho_bloco):
+    """Parâmetros e valores intermediários de cada reator (um cálculo por capacidade distinta)."""
+    por_capacidade = pd.DataFrame()
+    for bloco in _em_blocos(df_creditos[['id_reator', 'id_escola', 'capacidade_litros']], tamanho_bloco):
+        novas = [cap for cap in bloco['capacidade_litros'].unique() if cap not in por_capacidade.index]
+        if novas:
+            calculadas = pd.DataFrame.from_dict(
+                {cap: _linha_parametros(calcular_emissoes_evitadas_reator_detalhado(cap, periodo_anos, k_ano))
+                 for cap in novas}, orient='index')
+            por_capacidade = pd.concat([por_capacidade, calculadas.drop(columns='capacidade_litros')])
+        parametros = por_capacidade.loc[bloco['capacidade_litros'].to_numpy()].set_index(bloco.index)
+        yield pd.concat([bloco, parametros], axis=1)
+
+def _blocos_gastos(df_gastos, tamanho_bloco):
+    colunas = [col for col in COLUNAS_GASTOS if col in df_gastos.columns]
+    yield from _em_blocos(df_gastos[colunas], tamanho_bloco)
+
+def tabelas_auditoria(df_creditos, df_gastos, periodo_anos, k_ano, preco_tco2eq_brl=None,
+                      tamanho_bloco=TAMANHO_BLOCO):
+    """Retorna {nome_da_tabela: iterador de blocos (DataFrame)} com valores numéricos brutos."""
+    return {
+        'creditos': _blocos_creditos(df_creditos, preco_tco2eq_brl, tamanho_bloco),
+        'parametros': _blocos_parametros(df_creditos, periodo_anos, k_ano, tamanho_bloco),
+        'gastos': _blocos_gastos(df_gastos, tamanho_bloco)
+    }
+
+# =============================================================================
+# GRAVAÇÃO EM CSV, PARQUET E XLSX
+# =============================================================================
+
+def exportar_csv(tabelas, destino):
+    """Um arquivo CSV por tabela, dentro de um ZIP."""
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, blocos in tabelas.items():
+            with arquivo_zip.open(f"{nome}.csv", 'w') as binario:
+                for i, bloco in enumerate(blocos):
+                    binario.write(bloco.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+
+def _esquema_arrow(bloco):
+    """
+    Esquema Arrow do primeiro bloco, com as colunas de texto que vieram
+    vazias nele (tipo null) declaradas como string, para que os blocos
+    seguintes com valores caibam no mesmo esquema.
+    """
+    esquema = pa.Schema.from_pandas(bloco, preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            esquema = esquema.set(i, campo.with_type(pa.string()))
+    return esquema
+
+def exportar_parquet(tabelas, destino):
+    """Um arquivo Parquet por tabela (um row group por bloco), dentro de um ZIP."""
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, blocos in tabelas.items():
+            with arquivo_zip.open(f"{nome}.parquet", 'w', force_zip64=True) as binario:
+                escritor = None
+                for bloco in blocos:
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(binario, _esquema_arrow(bloco))
+                    escritor.write_table(pa.Table.from_pandas(bloco, schema=escritor.schema, preserve_index=False))
+                if escritor is not None:
+                    escritor.close()
+
+def exportar_xlsx(tabelas, destino):
+    """Uma aba por tabela, gravada em modo somente escrita (linha a linha)."""
+    planilha = Workbook(write_only=True)
+    for nome, blocos in tabelas.items():
+        aba = planilha.create_sheet(nome)
+        for i, bloco in enumerate(blocos):
+            if i == 0:
+                aba.append(list(bloco.columns))
+            bloco = bloco.astype(object).where(bloco.notna(), None)
+            for linha in bloco.itertuples(index=False, name=None):
+                aba.append(linha)
+    planilha.save(destino)
+
+FORMATOS = {
+    'csv': (exportar_csv, 'zip', 'application/zip'),
+    'parquet': (exportar_parquet, 'zip', 'application/zip'),
+    'xlsx': (exportar_xlsx, 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+def exportar_pacote(formato, destino, df_creditos, df_gastos, periodo_anos, k_ano, preco_tco2eq_brl=None,
+                    tamanho_bloco=TAMANHO_BLOCO):
+    """Grava o pacote de auditoria em 'destino' (caminho ou arquivo binário aberto)."""
+    exportar, _, _ = FORMATOS[formato]
+    exportar(tabelas_auditoria(df_creditos, df_gastos, periodo_anos, k_ano, preco_tco2eq_brl, tamanho_bloco),
+             destino)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o pacote de auditoria dos créditos de carbono.")
+    parser.add_argument("--planilha", default="dados_vermicompostagem_real.xlsx", help="Caminho ou URL da planilha")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="xlsx")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: auditoria.<extensão>)")
+    parser.add_argument("--periodo", type=int, default=10, help="Período de crédito (anos)")
+    parser.add_argument("--k", type=float, default=K_ANO_PADRAO, help="Taxa de decaimento (k) [ano⁻¹]")
+    parser.add_argument("--preco", type=float, help="Preço do carbono em R$/tCO₂eq (opcional)")
+    args = parser.parse_args(argv)
+
+    df_escolas, df_reatores, df_gastos = ler_planilha(args.planilha, DENSIDADE_PADRAO)
+    df_escolas, df_reatores = compactar_tabelas(df_escolas, df_reatores)
+    df_gastos = preparar_gastos(df_gastos)
+    df_creditos, _, _ = calcular_creditos_reatores(df_reatores, df_escolas, args.periodo, args.k)
+    if df_creditos.empty:
+        df_creditos = pd.DataFrame(columns=COLUNAS_CREDITOS)
+    saida = args.saida or f"auditoria.{FORMATOS[args.formato][1]}"
+    exportar_pacote(args.formato, saida, df_creditos, df_gastos, args.periodo, args.k, args.preco)
+    print(f"✅ Pacote de auditoria gravado em {saida}")
+
+if __name__ == "__main__":
+    main()
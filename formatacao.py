@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Formatação de números, moeda e tCO₂eq no padrão brasileiro (sem dependência do Streamlit)."""
+import pandas as pd
+
+# =============================================================================
+# FUNÇÕES DE FORMATAÇÃO BRASILEIRA (AJUSTADAS: >=1 → 2 casas; <1 → 4 casas)
+# =============================================================================
+
+def formatar_br(numero, casas_decimais=None):
+    """
+    Formata número no padrão brasileiro (ponto milhar, vírgula decimal).
+    Se casas_decimais for None, define automaticamente:
+        - valores >= 1: 2 casas decimais
+        - valores < 1: 4 casas decimais
+    """
+    if numero is None or pd.isna(numero):
+        return "N/A"
+    try:
+        numero = float(numero)
+        if casas_decimais is None:
+            if abs(numero) >= 1:
+                casas_decimais = 2
+            else:
+                casas_decimais = 4
+        numero_arredondado = round(numero, casas_decimais)
+        if casas_decimais == 0:
+            return f"{numero_arredondado:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        else:
+            formato = f"{{:,.{casas_decimais}f}}"
+            return formato.format(numero_arredondado).replace(",", "X").replace(".", ",").replace("X", ".")
+    except (ValueError, TypeError):
+        return "N/A"
+
+def formatar_moeda_br(valor, simbolo="R$", casas_decimais=None):
+    return f"{simbolo} {formatar_br(valor, casas_decimais)}"
+
+def formatar_tco2eq(valor):
+    return f"{formatar_br(valor)} tCO₂eq"
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Construção das figuras Plotly do app. As funções são puras (sem Streamlit),
+para que o app possa memorizá-las pelo hash dos dados de entrada, e as séries
+longas são reduzidas com LTTB antes de ir para o navegador.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+MAX_PONTOS_LINHA = 600  # ~1 ponto a cada 2 px em um gráfico de largura total
+
+def lttb(x, y, n_pontos):
+    """
+    Largest-Triangle-Three-Buckets: índices de 'n_pontos' pontos que preservam
+    a forma visual da série (sempre inclui o primeiro e o último ponto).
+    """
+    n = len(y)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(int)
+    indices = np.empty(n_pontos, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        proximo_fim = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        area = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                      - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(area))
+        indices[i + 1] = anterior
+    return indices
+
+def reduzir_serie(df, x, y, max_pontos=MAX_PONTOS_LINHA):
+    """Aplica LTTB a um DataFrame ordenado por 'x' (datas ou números)."""
+    if len(df) <= max_pontos:
+        return df
+    valores_x = df[x]
+    if pd.api.types.is_datetime64_any_dtype(valores_x):
+        valores_x = valores_x.astype('int64')
+    return df.iloc[lttb(valores_x.to_numpy(), df[y].to_numpy(), max_pontos)]
+
+def figura_pizza(valores, rotulos, titulo):
+    return px.pie(values=valores, names=rotulos, title=titulo)
+
+def figura_tornado(df_tornado):
+    """Tornado a partir de dados_tornado (parâmetro × cenário × impacto em tCO₂eq)."""
+    return px.bar(df_tornado, x='impacto_tco2eq', y='parametro', color='cenario', orientation='h',
+                  barmode='relative', title='Impacto de cada parâmetro nas emissões evitadas',
+                  labels={'impacto_tco2eq': 'Variação das emissões evitadas (tCO₂eq)',
+                          'parametro': 'Parâmetro', 'cenario': 'Variação'})
+
+def figura_linha(df, x, y, titulo, valor_referencia=None, rotulo_referencia="Preço Atual",
+                 max_pontos=MAX_PONTOS_LINHA):
+    """Gráfico de linha com no máximo 'max_pontos' pontos e linha horizontal de referência opcional."""
+    df = reduzir_serie(df, x, y, max_pontos)
+    fig = px.line(df, x=x, y=y, title=titulo, markers=len(df) <= 60)
+    if valor_referencia is not None:
+        fig.add_hline(y=valor_referencia, line_dash="dash", line_color="red", annotation_text=rotulo_referencia)
+    return fig
+
+def figura_barras(df, x, y, titulo, rotulos=None):
+    return px.bar(df, x=x, y=y, title=titulo, labels=rotulos)
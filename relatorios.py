@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Relatórios HTML por escola (reatores, resíduo processado, emissões evitadas,
+gastos e gráficos), gerados em lote a partir das tabelas de créditos e gastos
+já calculadas. Os resumos de todas as escolas são agregados uma única vez; os
+processos do pool recebem esses dados prontos no início e só recortam e
+renderizam cada escola. Os gastos sem escola (ESCOLA_GERAL) entram no custo
+de cada escola pelo rateio de custos.ratear_gastos_gerais.
+
+    python relatorios.py --saida relatorios/ --preco 470.25
+"""
+import argparse
+import html
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import plotly.io as pio
+
+from custos import agregar_gastos, custo_por_escola, ratear_gastos_gerais
+from dados import ESCOLA_GERAL
+from formatacao import formatar_br, formatar_moeda_br, formatar_tco2eq
+from graficos import figura_barras, figura_pizza
+
+ARQUIVO_PLOTLYJS = "plotly.min.js"  # gravado uma vez na pasta; os relatórios funcionam sem internet
+
+# =============================================================================
+# DADOS PRÉ-CALCULADOS (UMA VEZ PARA TODAS AS ESCOLAS)
+# =============================================================================
+
+def preparar_dados(df_creditos, df_gastos, preco_tco2eq_brl=None):
+    """
+    Agrega os créditos e os gastos por escola, por mês e por categoria, e
+    guarda as posições das linhas de cada escola, para que cada relatório
+    seja apenas um recorte das tabelas. Espera os gastos já preparados por
+    dados.preparar_gastos.
+    """
+    creditos = df_creditos.reindex(columns=['id_escola', 'nome_escola', 'id_reator', 'data_encheu',
+                                            'capacidade_litros', 'residuo_kg', 'emissoes_evitadas_tco2eq'])
+    creditos['id_escola'] = creditos['id_escola'].astype(str)
+    creditos['id_reator'] = creditos['id_reator'].astype(str)
+    creditos['data_encheu'] = pd.to_datetime(creditos['data_encheu'])
+    if preco_tco2eq_brl is not None:
+        creditos['valor_creditos_brl'] = creditos['emissoes_evitadas_tco2eq'] * preco_tco2eq_brl
+    creditos = creditos.sort_values(['id_escola', 'data_encheu'], ignore_index=True)
+
+    gastos = df_gastos.reindex(columns=['id_escola', 'nome_gasto', 'data_compra', 'categoria', 'valor_centavos'])
+    gastos = gastos[gastos['id_escola'] != ESCOLA_GERAL]
+    gastos = gastos.astype({'id_escola': str}).sort_values(['id_escola', 'data_compra'], ignore_index=True)
+    gastos['valor_centavos'] = gastos['valor_centavos'].fillna(0).astype('int64')
+
+    mensal = (creditos.groupby(['id_escola', creditos['data_encheu'].dt.to_period('M').rename('mes')])
+              ['emissoes_evitadas_tco2eq'].sum().reset_index())
+    mensal['mes'] = mensal['mes'].dt.strftime('%m/%Y')
+    por_categoria = gastos.groupby(['id_escola', 'categoria'])['valor_centavos'].sum().reset_index()
+
+    resumo = creditos.groupby('id_escola').agg(
+        nome_escola=('nome_escola', 'first'), reatores=('id_reator', 'size'), residuo_kg=('residuo_kg', 'sum'),
+        emissoes_evitadas_tco2eq=('emissoes_evitadas_tco2eq', 'sum'))
+    if preco_tco2eq_brl is not None:
+        resumo['valor_creditos_brl'] = resumo['emissoes_evitadas_tco2eq'] * preco_tco2eq_brl
+    # Mesmos números da aba "Custos por escola" do app, mais o rateio dos gastos gerais
+    custos = ratear_gastos_gerais(custo_por_escola(agregar_gastos(df_gastos), df_creditos)).set_index('id_escola')
+    resumo = resumo.join(custos[['gasto_centavos', 'rateio_geral_centavos', 'custo_total_por_tco2eq']], how='outer')
+    resumo['reatores'] = resumo['reatores'].fillna(0).astype('int64')
+    resumo['emissoes_evitadas_tco2eq'] = resumo['emissoes_evitadas_tco2eq'].fillna(0.0)
+    gastos_gerais = df_gastos.loc[df_gastos['id_escola'] == ESCOLA_GERAL, 'valor_centavos'].fillna(0).sum()
+
+    # Figuras montadas uma vez (o Plotly Express gasta ~0,1 s validando cada uma);
+    # cada relatório só troca os dados do traço
+    figuras = {
+        'mensal': figura_barras(mensal.iloc[:1], 'mes', 'emissoes_evitadas_tco2eq',
+                                'Emissões evitadas por mês de enchimento',
+                                {'mes': 'Mês', 'emissoes_evitadas_tco2eq': 'tCO₂eq'}).to_plotly_json(),
+        'por_categoria': figura_pizza([1], ['categoria'], 'Gastos por categoria').to_plotly_json()
+    }
+
+    tabelas = {'creditos': creditos, 'gastos': gastos, 'mensal': mensal, 'por_categoria': por_categoria}
+    return {
+        'resumo': resumo,
+        'tabelas': tabelas,
+        'posicoes': {nome: df.groupby('id_escola').indices for nome, df in tabelas.items()},
+        'figuras': figuras,
+        'preco_tco2eq_brl': preco_tco2eq_brl,
+        'gastos_gerais_centavos': int(gastos_gerais),
+        'emissoes_programa_tco2eq': float(resumo['emissoes_evitadas_tco2eq'].sum()),
+        'gerado_em': datetime.now().strftime('%d/%m/%Y %H:%M')
+    }
+
+def _linhas_da_escola(dados, tabela, id_escola):
+    posicoes = dados['posicoes'][tabela].get(id_escola, [])
+    return dados['tabelas'][tabela].iloc[posicoes]
+
+# =============================================================================
+# RENDERIZAÇÃO
+# =============================================================================
+
+_ESTILO = """
+body { font-family: sans-serif; margin: 2em auto; max-width: 1100px; color: #222; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; }
+td.num { text-align: right; }
+.metricas { display: flex; gap: 2em; flex-wrap: wrap; margin: 1em 0 2em; }
+.metricas div { font-size: 1.4em; } .metricas small { display: block; font-size: 0.6em; color: #666; }
+"""
+
+def _tabela_html(df, formatos):
+    """Tabela HTML com as colunas de 'formatos' {coluna: (rótulo, função de formatação ou None)}."""
+    cabecalho = "".join(f"<th>{html.escape(rotulo)}</th>" for rotulo, _ in formatos.values())
+    linhas = []
+    for registro in df[list(formatos)].itertuples(index=False):
+        celulas = []
+        for valor, (_, formatar) in zip(registro, formatos.values()):
+            if formatar is None:
+                celulas.append(f"<td>{html.escape('' if pd.isna(valor) else str(valor))}</td>")
+            else:
+                celulas.append(f"<td class='num'>{html.escape(formatar(valor))}</td>")
+        linhas.append(f"<tr>{''.join(celulas)}</tr>")
+    return f"<table><tr>{cabecalho}</tr>{''.join(linhas)}</table>"
+
+def _figura_html(modelo, dados_traco, incluir_plotlyjs):
+    figura = {'data': [{**modelo['data'][0], **dados_traco}], 'layout': modelo['layout']}
+    return pio.to_html(figura, full_html=False, include_plotlyjs=incluir_plotlyjs, validate=False)
+
+def _data_br(valor):
+    return "N/A" if pd.isna(valor) else valor.strftime('%d/%m/%Y')
+
+def renderizar_relatorio(dados, id_escola, incluir_plotlyjs=True):
+    """HTML completo do relatório de uma escola."""
+    resumo = dados['resumo'].loc[id_escola]
+    nome = resumo['nome_escola'] if pd.notna(resumo['nome_escola']) else id_escola
+    creditos = _linhas_da_escola(dados, 'creditos', id_escola)
+    gastos = _linhas_da_escola(dados, 'gastos', id_escola)
+    mensal = _linhas_da_escola(dados, 'mensal', id_escola)
+    por_categoria = _linhas_da_escola(dados, 'por_categoria', id_escola)
+
+    metricas = [("Reatores cheios", formatar_br(resumo['reatores'], 0)),
+                ("Resíduo processado", f"{formatar_br(resumo['residuo_kg'], 1)} kg"),
+                ("Emissões evitadas", formatar_tco2eq(resumo['emissoes_evitadas_tco2eq']))]
+    if 'valor_creditos_brl' in resumo:
+        metricas.append(("Valor dos créditos", formatar_moeda_br(resumo['valor_creditos_brl'])))
+    metricas += [("Gastos da escola", formatar_moeda_br(resumo['gasto_centavos'] / 100, casas_decimais=2)),
+                 ("Rateio dos gastos gerais", formatar_moeda_br(resumo['rateio_geral_centavos'] / 100,
+                                                                casas_decimais=2)),
+                 ("Custo por tCO₂eq", formatar_moeda_br(resumo['custo_total_por_tco2eq'], casas_decimais=2))]
+    partes = [f"<h1>♻️ {html.escape(str(nome))}</h1>",
+              f"<p>Escola {html.escape(id_escola)} · gerado em {dados['gerado_em']}</p>",
+              "<div class='metricas'>" + "".join(f"<div><small>{html.escape(rotulo)}</small>{html.escape(valor)}</div>"
+                                                 for rotulo, valor in metricas) + "</div>"]
+    if dados['gastos_gerais_centavos']:
+        participacao = resumo['emissoes_evitadas_tco2eq'] / dados['emissoes_programa_tco2eq'] \
+            if dados['emissoes_programa_tco2eq'] > 0 else 0.0
+        partes.append(f"<p>Gastos gerais do programa de "
+                      f"{html.escape(formatar_moeda_br(dados['gastos_gerais_centavos'] / 100, casas_decimais=2))} "
+                      f"rateados pela participação da escola nas emissões evitadas "
+                      f"({html.escape(formatar_br(participacao * 100, 1))}%). "
+                      f"O custo por tCO₂eq inclui o rateio.</p>")
+
+    # Só o primeiro gráfico carrega o plotly.js; o segundo reaproveita
+    plotlyjs = incluir_plotlyjs
+    if not mensal.empty:
+        partes.append(_figura_html(dados['figuras']['mensal'], {
+            'x': mensal['mes'].tolist(), 'y': mensal['emissoes_evitadas_tco2eq'].tolist()}, plotlyjs))
+        plotlyjs = False
+    if not por_categoria.empty:
+        partes.append(_figura_html(dados['figuras']['por_categoria'], {
+            'values': (por_categoria['valor_centavos'] / 100).tolist(),
+            'labels': por_categoria['categoria'].tolist()}, plotlyjs))
+
+    partes.append("<h2>📊 Reatores</h2>")
+    formatos = {'id_reator': ("Reator", None), 'data_encheu': ("Encheu em", _data_br),
+                'capacidade_litros': ("Capacidade (L)", lambda v: formatar_br(v, 0)),
+                'residuo_kg': ("Resíduo (kg)", lambda v: formatar_br(v, 1)),
+                'emissoes_evitadas_tco2eq': ("Emissões evitadas", formatar_tco2eq)}
+    if 'valor_creditos_brl' in creditos.columns:
+        formatos['valor_creditos_brl'] = ("Valor (R$)", lambda v: formatar_br(v, 2))
+    partes.append(_tabela_html(creditos, formatos) if not creditos.empty else "<p>Nenhum reator cheio.</p>")
+    partes.append("<h2>💰 Gastos</h2>")
+    partes.append(_tabela_html(gastos, {
+        'data_compra': ("Data", _data_br), 'nome_gasto': ("Item", None), 'categoria': ("Categoria", None),
+        'valor_centavos': ("Valor (R$)", lambda v: formatar_br(v / 100, 2))
+    }) if not gastos.empty else "<p>Nenhum gasto registrado.</p>")
+
+    return (f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'>"
+            f"<title>Relatório - {html.escape(str(nome))}</title><style>{_ESTILO}</style></head>"
+            f"<body>{''.join(partes)}</body></html>")
+
+# =============================================================================
+# GERAÇÃO EM LOTE (POOL DE PROCESSOS)
+# =============================================================================
+
+_dados_trabalhador = None
+
+def _iniciar_trabalhador(dados, pasta, incluir_plotlyjs):
+    # Recebe os dados pré-calculados uma vez por processo, não uma vez por escola
+    global _dados_trabalhador
+    _dados_trabalhador = (dados, pasta, incluir_plotlyjs)
+
+def _gravar_relatorio(id_escola):
+    dados, pasta, incluir_plotlyjs = _dados_trabalhador
+    caminho = os.path.join(pasta, f"relatorio_{id_escola}.html")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        arquivo.write(renderizar_relatorio(dados, id_escola, incluir_plotlyjs))
+    return caminho
+
+def gerar_relatorios(df_creditos, df_gastos, pasta, preco_tco2eq_brl=None, processos=None, embutir_plotlyjs=False):
+    """
+    Grava um relatório HTML por escola em 'pasta' e retorna os caminhos.
+    Por padrão o plotly.js é gravado uma única vez na pasta (ARQUIVO_PLOTLYJS);
+    com embutir_plotlyjs=True cada arquivo abre sozinho, mas leva ~4,8 MB
+    (para uma escola só, não para o lote). 'processos'=1 gera tudo no
+    processo atual.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    dados = preparar_dados(df_creditos, df_gastos, preco_tco2eq_brl)
+    escolas = dados['resumo'].index.tolist()
+    incluir_plotlyjs = True if embutir_plotlyjs else "directory"
+    if not embutir_plotlyjs:
+        from plotly.offline import get_plotlyjs
+        with open(os.path.join(pasta, ARQUIVO_PLOTLYJS), "w", encoding="utf-8") as arquivo:
+            arquivo.write(get_plotlyjs())
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(escolas) < 2:
+        _iniciar_trabalhador(dados, pasta, incluir_plotlyjs)
+        return [_gravar_relatorio(id_escola) for id_escola in escolas]
+    with ProcessPoolExecutor(processos, initializer=_iniciar_trabalhador,
+                             initargs=(dados, pasta, incluir_plotlyjs)) as pool:
+        return list(pool.map(_gravar_relatorio, escolas, chunksize=max(1, len(escolas) // (4 * processos))))
+
+def empacotar_relatorios(df_creditos, df_gastos, preco_tco2eq_brl=None, processos=None, embutir_plotlyjs=False):
+    """
+    Relatórios das escolas em um ZIP, como bytes, com o ARQUIVO_PLOTLYJS ao
+    lado deles; com embutir_plotlyjs=True, cada relatório traz o seu.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_relatorios(df_creditos, df_gastos, pasta, preco_tco2eq_brl, processos, embutir_plotlyjs)
+        destino = os.path.join(pasta, "relatorios.zip")
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as pacote:
+            for nome in sorted(os.listdir(pasta)):
+                if nome != "relatorios.zip":
+                    pacote.write(os.path.join(pasta, nome), nome)
+        with open(destino, "rb") as arquivo:
+            return arquivo.read()
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um relatório HTML por escola.")
+    parser.add_argument("--planilha", default="dados_vermicompostagem_real.xlsx", help="Caminho ou URL da planilha")
+    parser.add_argument("--saida", default="relatorios", help="Pasta de saída")
+    parser.add_argument("--preco", type=float, help="Preço do carbono em R$/tCO₂eq (opcional)")
+    parser.add_argument("--processos", type=int, help="Processos do pool (padrão: núcleos da máquina)")
+    parser.add_argument("--embutir-plotlyjs", action="store_true",
+                        help="Inclui o plotly.js em cada arquivo (~4,8 MB cada; para poucas escolas)")
+    args = parser.parse_args(argv)
+
+    from calculos import DENSIDADE_PADRAO, calcular_creditos_reatores
+    from dados import compactar_tabelas, ler_planilha, preparar_gastos
+    df_escolas, df_reatores, df_gastos = ler_planilha(args.planilha, DENSIDADE_PADRAO)
+    df_escolas, df_reatores = compactar_tabelas(df_escolas, df_reatores)
+    df_gastos = preparar_gastos(df_gastos)
+    df_creditos, _, _ = calcular_creditos_reatores(df_reatores, df_escolas)
+    inicio = time.perf_counter()
+    caminhos = gerar_relatorios(df_creditos, df_gastos, args.saida, args.preco, args.processos,
+                                args.embutir_plotlyjs)
+    print(f"✅ {len(caminhos)} relatório(s) gravado(s) em {args.saida} em {time.perf_counter() - inicio:.2f} s")
+
+if __name__ == "__main__":
+    main()
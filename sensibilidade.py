@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Análise de sensibilidade analítica das emissões evitadas.
+
+As emissões evitadas são somas de produtos dos parâmetros do modelo, então
+p·∂E/∂p sai em forma fechada. Uma única passada vetorizada sobre as
+capacidades da frota dá as elasticidades (∂E/∂p)·(p/E) de todos os
+parâmetros, para a frota inteira e por escola, sem recalcular o modelo
+completo para cada parâmetro.
+
+    python sensibilidade.py   # confere as derivadas contra perturbação numérica
+"""
+import numpy as np
+import pandas as pd
+
+from calculos import (K_ANO_PADRAO, PARAMETROS_PADRAO, PROFILE_CH4_VERMI, PROFILE_N2O_LANDFILL_DAILY,
+                      PROFILE_N2O_PRE, PROFILE_N2O_VERMI, calcular_emissoes_evitadas_reator_detalhado)
+
+PARAMETROS_SENSIBILIDADE = ['DOC', 'DOCf', 'MCF', 'F', 'OX', 'phi', 'k_ano', 'GWP_CH4_20', 'GWP_N2O_20',
+                            'umidade', 'densidade_kg_l', 'TOC_YANG', 'TN_YANG', 'CH4_C_FRAC_YANG',
+                            'N2O_N_FRAC_YANG', 'E_aberto', 'E_fechado', 'ch4_pre_dia_kg', 'n2o_pre_total_kg']
+
+def contribuicoes(capacidades, periodo_anos=10, k_ano=K_ANO_PADRAO, parametros=None):
+    """
+    Retorna (DataFrame p·∂E/∂p em tCO₂eq, uma coluna por parâmetro; emissões
+    evitadas E em tCO₂eq), ambos com uma linha por capacidade informada.
+    """
+    p = {**PARAMETROS_PADRAO, **(parametros or {})}
+    capacidades = np.asarray(capacidades, dtype=float)
+    residuo_kg = capacidades * p['densidade_kg_l']
+    dias = periodo_anos * 365
+    k_dia = k_ano / 365.0
+    g_ch4 = p['GWP_CH4_20'] / 1000
+    g_n2o = p['GWP_N2O_20'] / 1000
+    fracao_ms = 1 - p['umidade']
+
+    # Termos do modelo (kg do gás por reator), na mesma forma de calcular_emissoes_evitadas_reator_detalhado
+    fracao_ch4 = 1 - np.exp(-k_dia * dias)
+    ch4_fod = (residuo_kg * p['DOC'] * p['DOCf'] * p['MCF'] * p['F'] * (16/12) * (1 - p['Ri']) * (1 - p['OX'])
+               * fracao_ch4 * p['phi'])
+    ch4_pre = residuo_kg * p['ch4_pre_dia_kg'] * 3
+    f_bruto = (50.0 / residuo_kg) * (8.0 / 24)
+    f_aberto = np.clip(f_bruto, 0.0, 1.0)
+    fator_n2o = (1 - p['umidade']) / (1 - 0.55) * (44/28) / 1_000_000 * PROFILE_N2O_LANDFILL_DAILY[:dias].sum()
+    n2o_aberto = residuo_kg * f_aberto * p['E_aberto'] * fator_n2o
+    n2o_fechado = residuo_kg * (1 - f_aberto) * p['E_fechado'] * fator_n2o
+    n2o_aterro = n2o_aberto + n2o_fechado
+    n2o_pre = residuo_kg * p['n2o_pre_total_kg'] * sum(frac for atraso, frac in PROFILE_N2O_PRE.items()
+                                                      if atraso <= dias)
+    ch4_vermi = (residuo_kg * p['TOC_YANG'] * p['CH4_C_FRAC_YANG'] * (16/12) * fracao_ms
+                 * PROFILE_CH4_VERMI[:dias].sum())
+    n2o_vermi = (residuo_kg * p['TN_YANG'] * p['N2O_N_FRAC_YANG'] * (44/28) * fracao_ms
+                 * PROFILE_N2O_VERMI[:dias].sum())
+
+    ch4_liquido = ch4_fod + ch4_pre - ch4_vermi
+    n2o_liquido = n2o_aterro + n2o_pre - n2o_vermi
+    emissoes = g_ch4 * ch4_liquido + g_n2o * n2o_liquido
+
+    # Derivada de f_aberto em relação ao resíduo: R·∂f/∂R = -f enquanto não saturado em 1
+    r_df_dr = np.where(f_bruto < 1.0, -f_aberto, 0.0)
+    fod = g_ch4 * ch4_fod
+    s = {
+        'DOC': fod, 'DOCf': fod, 'MCF': fod, 'F': fod, 'phi': fod,
+        'OX': -p['OX'] / (1 - p['OX']) * fod,
+        'k_ano': fod * (k_dia * dias * np.exp(-k_dia * dias)) / fracao_ch4,
+        'GWP_CH4_20': g_ch4 * ch4_liquido,
+        'GWP_N2O_20': g_n2o * n2o_liquido,
+        'umidade': -p['umidade'] / fracao_ms * (g_n2o * (n2o_aterro - n2o_vermi) - g_ch4 * ch4_vermi),
+        'densidade_kg_l': emissoes + g_n2o * residuo_kg * fator_n2o * (p['E_aberto'] - p['E_fechado']) * r_df_dr,
+        'TOC_YANG': -g_ch4 * ch4_vermi, 'CH4_C_FRAC_YANG': -g_ch4 * ch4_vermi,
+        'TN_YANG': -g_n2o * n2o_vermi, 'N2O_N_FRAC_YANG': -g_n2o * n2o_vermi,
+        'E_aberto': g_n2o * n2o_aberto, 'E_fechado': g_n2o * n2o_fechado,
+        'ch4_pre_dia_kg': g_ch4 * ch4_pre,
+        'n2o_pre_total_kg': g_n2o * n2o_pre
+    }
+    return pd.DataFrame({nome: np.broadcast_to(s[nome], capacidades.shape) for nome in PARAMETROS_SENSIBILIDADE}), emissoes
+
+def elasticidades_frota(df_creditos, periodo_anos=10, k_ano=K_ANO_PADRAO, parametros=None):
+    """
+    Elasticidades de todos os parâmetros para a frota e por escola.
+    Retorna (Series indexada pelo parâmetro, DataFrame escola × parâmetro).
+    """
+    s, emissoes = contribuicoes(df_creditos['capacidade_litros'].to_numpy(dtype=float), periodo_anos, k_ano,
+                                parametros)
+    frota = (s.sum() / emissoes.sum()).rename('elasticidade')
+    escolas = df_creditos['id_escola'].astype(str).to_numpy()
+    por_escola = s.groupby(escolas).sum().div(pd.Series(emissoes).groupby(escolas).sum(), axis=0)
+    return frota, por_escola.rename_axis('id_escola')
+
+def dados_tornado(elasticidades, emissoes_totais, variacao=0.10):
+    """
+    Variação aproximada das emissões evitadas (tCO₂eq) quando cada parâmetro
+    sobe ou desce 'variacao', ordenada do maior para o menor impacto.
+    """
+    impacto = elasticidades * variacao * emissoes_totais
+    ordem = impacto.abs().sort_values().index
+    rotulo = f"{variacao:.0%}"
+    return pd.concat([
+        pd.DataFrame({'parametro': ordem, 'cenario': f"-{rotulo}", 'impacto_tco2eq': -impacto[ordem].values}),
+        pd.DataFrame({'parametro': ordem, 'cenario': f"+{rotulo}", 'impacto_tco2eq': impacto[ordem].values})
+    ], ignore_index=True)
+
+def verificar_por_perturbacao(capacidade=100.0, periodo_anos=10, k_ano=K_ANO_PADRAO, passo_relativo=1e-5):
+    """
+    Compara as elasticidades analíticas com diferenças centrais sobre
+    calcular_emissoes_evitadas_reator_detalhado.
+    """
+    s, emissoes = contribuicoes([capacidade], periodo_anos, k_ano)
+    analiticas = s.iloc[0] / emissoes[0]
+    linhas = []
+    for nome in PARAMETROS_SENSIBILIDADE:
+        valor = k_ano if nome == 'k_ano' else PARAMETROS_PADRAO[nome]
+        resultados = []
+        for sinal in (1, -1):
+            perturbado = valor * (1 + sinal * passo_relativo)
+            if nome == 'k_ano':
+                calc = calcular_emissoes_evitadas_reator_detalhado(capacidade, periodo_anos, perturbado)
+            else:
+                calc = calcular_emissoes_evitadas_reator_detalhado(capacidade, periodo_anos, k_ano,
+                                                                   {nome: perturbado})
+            resultados.append(calc['emissoes_evitadas_tco2eq'])
+        numerica = (resultados[0] - resultados[1]) / (2 * passo_relativo * emissoes[0])
+        linhas.append({'parametro': nome, 'analitica': analiticas[nome], 'numerica': numerica,
+                       'erro_absoluto': abs(analiticas[nome] - numerica)})
+    return pd.DataFrame(linhas)
+
+if __name__ == "__main__":
+    for capacidade in (10.0, 37.24, 100.0):
+        verificacao = verificar_por_perturbacao(capacidade)
+        print(f"Capacidade {capacidade} L — maior erro absoluto: {verificacao['erro_absoluto'].max():.2e}")
+        print(verificacao.to_string(index=False))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Exibição de tabelas com colunas numéricas tipadas e formatação no navegador
+(formatos printf com casas decimais fixas), em vez de colunas de texto
+pré-formatado. Tabelas grandes são paginadas no servidor.
+
+    python tabelas.py   # mede o que o st.dataframe envia com 10 mil reatores
+"""
+import math
+import time
+
+import pandas as pd
+import streamlit as st
+
+from formatacao import formatar_br, formatar_moeda_br, formatar_tco2eq
+
+LINHAS_POR_PAGINA = 500
+
+# =============================================================================
+# COLUNAS FORMATADAS NO NAVEGADOR
+# =============================================================================
+
+def coluna_numero(rotulo, casas_decimais=2, prefixo=""):
+    # Formato printf explícito: casas fixas e separador de milhar iguais em qualquer navegador
+    # ("localized" mudaria com o locale do visitante). O sprintf do navegador só usa ponto decimal
+    return st.column_config.NumberColumn(rotulo, format=f"{prefixo}%,.{casas_decimais}f")
+
+def coluna_moeda(rotulo="Valor (R$)"):
+    return coluna_numero(rotulo, 2, prefixo="R$ ")
+
+def coluna_tco2eq(rotulo="Emissões Evitadas (tCO₂eq)"):
+    return coluna_numero(rotulo, 4)
+
+def coluna_data(rotulo, com_hora=False):
+    if com_hora:
+        return st.column_config.DatetimeColumn(rotulo, format="DD/MM/YYYY HH:mm")
+    return st.column_config.DateColumn(rotulo, format="DD/MM/YYYY")
+
+# =============================================================================
+# PAGINAÇÃO NO SERVIDOR
+# =============================================================================
+
+def paginar(df, chave, linhas_por_pagina=LINHAS_POR_PAGINA):
+    """Retorna apenas a página escolhida pelo usuário (seletor só aparece se houver mais de uma)."""
+    total_paginas = max(1, math.ceil(len(df) / linhas_por_pagina))
+    if total_paginas == 1:
+        return df
+    pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1,
+                             step=1, key=f"pagina_{chave}")
+    inicio = (pagina - 1) * linhas_por_pagina
+    st.caption(f"Linhas {inicio + 1} a {min(inicio + linhas_por_pagina, len(df))} de {len(df)}")
+    return df.iloc[inicio:inicio + linhas_por_pagina]
+
+def exibir_tabela(df, chave, column_config=None, linhas_por_pagina=LINHAS_POR_PAGINA):
+    st.dataframe(paginar(df, chave, linhas_por_pagina), column_config=column_config, hide_index=True,
+                 use_container_width=True)
+
+# =============================================================================
+# MEDIÇÃO (O QUE O ST.DATAFRAME ENVIA)
+# =============================================================================
+
+def _pagina_medicao(df, column_config):
+    from tabelas import exibir_tabela
+    exibir_tabela(df, "medicao", column_config)
+
+def _bytes_enviados(df, column_config=None):
+    """Bytes do elemento que exibir_tabela envia ao navegador (página Arrow, estilos e configuração das colunas)."""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_function(_pagina_medicao, kwargs={'df': df, 'column_config': column_config}).run()
+    return app.dataframe[0].proto.ByteSize()
+
+def medir_payload(n_reatores=10_000):
+    """
+    Compara o que exibir_tabela envia para a tabela de reatores como texto
+    formatado no servidor e como colunas numéricas formatadas no navegador
+    (ambas paginadas, como no app).
+    """
+    numerica = pd.DataFrame({
+        'nome_escola': [f"Escola {i % 200}" for i in range(n_reatores)],
+        'id_reator': [f"R{i:05d}" for i in range(n_reatores)],
+        'data_encheu': pd.date_range('2024-01-01', periods=n_reatores, freq='h'),
+        'capacidade_litros': 37.24,
+        'residuo_kg': 22.344,
+        'emissoes_evitadas_tco2eq': 0.0396108,
+        'valor_creditos_reais': 18.63
+    })
+    colunas = {'data_encheu': coluna_data("data_encheu"), 'capacidade_litros': coluna_numero("capacidade_litros", 0),
+               'residuo_kg': coluna_numero("residuo_kg", 1), 'emissoes_evitadas_tco2eq': coluna_tco2eq(),
+               'valor_creditos_reais': coluna_moeda()}
+    inicio = time.perf_counter()
+    texto = numerica.copy()
+    texto['data_encheu'] = texto['data_encheu'].dt.strftime('%d/%m/%Y')
+    texto['capacidade_litros'] = texto['capacidade_litros'].apply(lambda x: formatar_br(x, 0))
+    texto['residuo_kg'] = texto['residuo_kg'].apply(lambda x: formatar_br(x, 1))
+    texto['emissoes_evitadas_tco2eq'] = texto['emissoes_evitadas_tco2eq'].apply(formatar_tco2eq)
+    texto['valor_creditos_reais'] = texto['valor_creditos_reais'].apply(formatar_moeda_br)
+    tempo_formatacao = time.perf_counter() - inicio
+    return pd.DataFrame([
+        {'tabela': 'texto formatado', 'bytes': _bytes_enviados(texto), 'formatacao_s': tempo_formatacao},
+        {'tabela': 'numérica', 'bytes': _bytes_enviados(numerica, colunas), 'formatacao_s': 0.0}
+    ])
+
+if __name__ == "__main__":
+    print(medir_payload().to_string(index=False))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pandas as pd
+
+from agenda import TAREFA_COLHEITA, TAREFA_VISITA, Agenda
+
+HOJE = date(2024, 3, 1)
+
+def _agenda():
+    df_escolas = pd.DataFrame({
+        'id_escola': ['E1', 'E2', 'E3'],
+        'is_ativo': [True, True, False],
+        'ultima_visita': pd.to_datetime(['2024-01-15', None, '2024-01-01']),
+        'data_implantacao': pd.to_datetime(['2023-01-01', '2024-02-20', '2023-01-01'])
+    })
+    df_reatores = pd.DataFrame({
+        'id_reator': ['R1', 'R2', 'R3', 'R4', 'R5'],
+        'id_escola': ['E1', 'E1', 'E2', 'E2', 'E2'],
+        'data_encheu': pd.to_datetime(['2024-01-01', '2024-01-05', '2024-01-10', None, '2024-01-01']),
+        'data_colheita': pd.to_datetime([None, None, None, None, '2024-02-20']),
+        'is_liquido': [False, False, False, False, False]
+    })
+    return Agenda.de_tabelas(df_escolas, df_reatores, HOJE, dias_vermicompostagem=50, intervalo_visita_dias=30)
+
+def test_de_tabelas_so_agenda_reatores_cheios_e_nao_colhidos():
+    agenda = _agenda()
+    assert len(agenda) == 3
+    assert 'R4' not in agenda and 'R5' not in agenda
+    # R1 amadurece em 20/02 e R2 em 24/02; R3 só em 29/02 (ano bissexto)
+    assert [id_reator for _, id_reator, _ in agenda.colheitas_vencidas(date(2024, 2, 25))] == ['R1', 'R2']
+
+def test_visitas_usam_ultima_visita_ou_implantacao_e_ignoram_inativas():
+    agenda = _agenda()
+    vencidas = agenda.visitas_vencidas(date(2024, 3, 21))
+    # E1: 15/01 + 30 dias; E2 sem visita usa a implantação (20/02 + 30 dias); E3 inativa
+    assert [(date.fromordinal(dia), id_escola) for dia, id_escola in vencidas] == [
+        (date(2024, 2, 14), 'E1'), (date(2024, 3, 21), 'E2')]
+
+def test_lista_do_dia_prioriza_o_maior_atraso_e_poe_a_visita_primeiro():
+    lista = _agenda().lista_do_dia(HOJE)
+    assert lista['id_escola'].tolist() == ['E1', 'E1', 'E1', 'E2']
+    assert lista['tarefa'].tolist() == [TAREFA_VISITA, TAREFA_COLHEITA, TAREFA_COLHEITA, TAREFA_COLHEITA]
+    assert lista['id_reator'].tolist()[1:] == ['R1', 'R2', 'R3']
+    assert lista['prioridade'].tolist() == [1, 1, 1, 2]
+    assert lista['dias_atraso'].tolist() == [16, 10, 6, 1]
+
+def test_eventos_substituem_entradas_antigas():
+    agenda = _agenda()
+    agenda.registrar_colheita('R1', HOJE)
+    agenda.registrar_enchimento('R2', 'E1', date(2024, 2, 20))
+    agenda.registrar_enchimento('R9', 'E3', date(2024, 1, 1))
+    lista = agenda.lista_do_dia(HOJE)
+    # R1 saiu, R2 reencheu (vence só em abril) e a colheita de R1 contou como visita a E1
+    assert 'R1' not in agenda and 'R9' in agenda
+    assert set(zip(lista['id_escola'], lista['tarefa'], lista['id_reator'].fillna(''))) == {
+        ('E2', TAREFA_COLHEITA, 'R3'), ('E3', TAREFA_COLHEITA, 'R9')}
+    # Consultar não consome as tarefas
+    assert len(agenda.lista_do_dia(HOJE)) == 2
+
+def test_lista_vazia_tem_as_colunas():
+    lista = Agenda().lista_do_dia(HOJE)
+    assert lista.empty
+    assert list(lista.columns) == ['prioridade', 'id_escola', 'tarefa', 'id_reator', 'data_prevista', 'dias_atraso']
+
+def test_compactacao_descarta_entradas_substituidas():
+    agenda = Agenda(dias_vermicompostagem=50)
+    for dia in range(500):
+        agenda.registrar_enchimento('R1', 'E1', HOJE.toordinal() + dia)
+    assert len(agenda._colheitas) <= 2 * len(agenda) + 64
+    assert [id_reator for _, id_reator, _ in agenda.colheitas_vencidas(HOJE.toordinal() + 600)] == ['R1']
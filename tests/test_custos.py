@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from custos import agregar_gastos, custo_ao_longo_do_tempo, custo_por_escola
+from dados import ESCOLA_GERAL, preparar_gastos
+
+def _gastos(**colunas):
+    return preparar_gastos(pd.DataFrame({'id_gasto': ['minhoca', 'serragem', 'minhoca'],
+                                         'valor': ['R$ 10,50', 20, '0,25'], **colunas}))
+
+def _creditos(datas, emissoes):
+    return pd.DataFrame({'id_escola': ['E1'] * len(datas), 'data_encheu': pd.to_datetime(datas),
+                         'emissoes_evitadas_tco2eq': emissoes})
+
+def test_agregar_gastos_soma_centavos_por_escola_mes_e_categoria():
+    agregados = agregar_gastos(_gastos(id_escola=['E1', None, 'E1'],
+                                       data_compra=pd.to_datetime(['2024-01-05', '2024-01-20', '2024-03-01'])))
+    assert agregados['por_escola'].set_index('id_escola')['gasto_centavos'].to_dict() == {
+        'E1': 1075, ESCOLA_GERAL: 2000}
+    assert agregados['por_mes']['gasto_centavos'].tolist() == [3050, 25]
+    assert agregados['por_categoria']['categoria'].tolist() == ['serragem', 'minhoca']
+
+def test_custo_por_escola_compara_gastos_gerais_com_todo_o_programa():
+    agregados = agregar_gastos(_gastos(id_escola=['E1', None, 'E1']))
+    custos = custo_por_escola(agregados, _creditos(['2024-01-10', '2024-02-10'], [1.0, 1.5])).set_index('id_escola')
+    assert custos.loc['E1', 'custo_por_tco2eq'] == 10.75 / 2.5
+    assert custos.loc[ESCOLA_GERAL, 'emissoes_evitadas_tco2eq'] == 2.5
+
+def test_custo_ao_longo_do_tempo_acumula_e_preenche_meses_vazios():
+    agregados = agregar_gastos(_gastos(data_compra=pd.to_datetime(['2024-01-05', '2024-01-20', '2024-03-01'])))
+    df = custo_ao_longo_do_tempo(agregados, _creditos(['2024-02-10'], [2.0]))
+    assert df['mes'].astype(str).tolist() == ['2024-01', '2024-02', '2024-03']
+    assert df['gasto_acumulado_centavos'].tolist() == [3050, 3050, 3075]
+    assert np.isnan(df['custo_por_tco2eq'].iloc[0])
+    assert df['custo_por_tco2eq'].iloc[-1] == 30.75 / 2.0
+
+def test_custo_ao_longo_do_tempo_vazio_mantem_os_tipos():
+    # Gastos sem data_compra e nenhum crédito (ex.: escola filtrada sem reatores cheios)
+    agregados = agregar_gastos(_gastos())
+    vazio = pd.DataFrame({'id_escola': pd.Series(dtype=str), 'data_encheu': pd.Series(dtype='datetime64[ns]'),
+                          'emissoes_evitadas_tco2eq': pd.Series(dtype=float)})
+    df = custo_ao_longo_do_tempo(agregados, vazio)
+    assert df.empty
+    assert isinstance(df['mes'].dtype, pd.PeriodDtype)
+    assert df['mes'].dt.to_timestamp().empty
+    assert df['gasto_acumulado_centavos'].dtype == 'int64'
+    assert df['custo_por_tco2eq'].dtype == float
+
+def test_gastos_sem_data_ficam_fora_da_linha_do_tempo():
+    agregados = agregar_gastos(_gastos())
+    df = custo_ao_longo_do_tempo(agregados, _creditos(['2024-02-10'], [2.0]))
+    assert df['mes'].astype(str).tolist() == ['2024-02']
+    assert df['gasto_acumulado_centavos'].tolist() == [0]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from dados import converter_valor_centavos, preparar_gastos
+
+def centavos(valores, dtype=None):
+    return converter_valor_centavos(pd.Series(valores, dtype=dtype)).tolist()
+
+# =============================================================================
+# VALORES MONETÁRIOS EM CENTAVOS
+# =============================================================================
+
+def test_texto_no_formato_brasileiro():
+    assert centavos(["R$ 1.234,56", "157,8", "1.234", "-3,5", "10"]) == [123456, 15780, 123400, -350, 1000]
+
+def test_texto_com_ponto_decimal():
+    assert centavos(["579.88", "0.5"]) == [57988, 50]
+
+def test_coluna_numerica():
+    assert centavos([12.34, 0.1 + 0.2, None]) == [1234, 30, pd.NA]
+
+def test_coluna_object_mista_nao_le_numero_como_milhar():
+    resultado = centavos([12.345, 0.1 + 0.2, "R$ 1.234,56", "1.234", 7, None, "abc"], dtype=object)
+    assert resultado == [1234, 30, 123456, 123400, 700, pd.NA, pd.NA]
+
+def test_coluna_object_so_com_numeros():
+    assert centavos([1.5, 2, None], dtype=object) == [150, 200, pd.NA]
+
+def test_preparar_gastos_soma_exata_em_centavos():
+    gastos = preparar_gastos(pd.DataFrame({'valor': pd.Series([0.1, 0.2, "0,30"], dtype=object),
+                                           'data_compra': pd.to_datetime(['2025-01-05'] * 3)}))
+    assert gastos['valor_centavos'].sum() == 60
+    assert (gastos['id_escola'] == "Geral").all()
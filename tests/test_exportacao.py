@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import io
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from exportacao import exportar_csv, exportar_parquet
+
+def _ler_parquet(conteudo, nome):
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo_zip:
+        return pq.read_table(io.BytesIO(arquivo_zip.read(f"{nome}.parquet"))).to_pandas()
+
+def test_parquet_aceita_coluna_vazia_no_primeiro_bloco():
+    # Coluna object toda vazia no primeiro bloco (tipo null no Arrow) e preenchida no segundo
+    blocos = iter([
+        pd.DataFrame({'id_reator': pd.Series(['R1', 'R2'], dtype=object),
+                      'nome_escola': pd.Series([None, None], dtype=object), 'residuo_kg': [1.5, 2.0]}),
+        pd.DataFrame({'id_reator': pd.Series(['R3'], dtype=object),
+                      'nome_escola': pd.Series(['Escola A'], dtype=object), 'residuo_kg': [3.0]})
+    ])
+    destino = io.BytesIO()
+    exportar_parquet({'creditos': blocos}, destino)
+    df = _ler_parquet(destino.getvalue(), 'creditos')
+    assert df['id_reator'].tolist() == ['R1', 'R2', 'R3']
+    assert df['nome_escola'].isna().tolist() == [True, True, False]
+    assert df['residuo_kg'].sum() == 6.5
+
+def test_csv_escreve_cabecalho_uma_vez():
+    blocos = iter([pd.DataFrame({'a': [1, 2]}), pd.DataFrame({'a': [3]})])
+    destino = io.BytesIO()
+    exportar_csv({'gastos': blocos}, destino)
+    with zipfile.ZipFile(io.BytesIO(destino.getvalue())) as arquivo_zip:
+        assert arquivo_zip.read('gastos.csv').decode('utf-8').splitlines() == ['a', '1', '2', '3']
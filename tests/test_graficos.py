@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from graficos import lttb, reduzir_serie
+
+def test_lttb_mantem_extremos_e_quantidade_de_pontos():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    indices = lttb(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+
+def test_lttb_devolve_tudo_quando_nao_ha_o_que_reduzir():
+    x = np.arange(10)
+    np.testing.assert_array_equal(lttb(x, x * 2.0, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb(x, x * 2.0, 50), np.arange(10))
+    np.testing.assert_array_equal(lttb(x, x * 2.0, 2), np.arange(10))
+
+def test_lttb_preserva_picos_isolados():
+    # Um único pico numa série plana precisa sobreviver à redução
+    y = np.zeros(5000)
+    y[1234] = 10.0
+    y[4321] = -10.0
+    indices = lttb(np.arange(5000), y, 50)
+    assert 1234 in indices and 4321 in indices
+
+def test_reduzir_serie_aceita_datas():
+    df = pd.DataFrame({'data': pd.date_range('2024-01-01', periods=2000, freq='h'),
+                       'preco': np.linspace(0, 1, 2000)})
+    reduzido = reduzir_serie(df, 'data', 'preco', max_pontos=200)
+    assert len(reduzido) == 200
+    assert reduzido['data'].iloc[0] == df['data'].iloc[0]
+    assert reduzido['data'].iloc[-1] == df['data'].iloc[-1]
+    assert len(reduzir_serie(df.head(100), 'data', 'preco', max_pontos=200)) == 100
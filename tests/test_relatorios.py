@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import io
+import zipfile
+
+import pandas as pd
+
+from custos import agregar_gastos, custo_por_escola, ratear_gastos_gerais
+from dados import ESCOLA_GERAL, preparar_gastos
+from relatorios import ARQUIVO_PLOTLYJS, empacotar_relatorios, preparar_dados
+
+def _tabelas():
+    df_creditos = pd.DataFrame({
+        'id_escola': ['E1', 'E1', 'E2', 'E3'],
+        'nome_escola': ['Escola 1', 'Escola 1', 'Escola 2', 'Escola 3'],
+        'id_reator': ['R1', 'R2', 'R3', 'R4'],
+        'data_encheu': pd.to_datetime(['2024-01-10', '2024-02-10', '2024-01-20', '2024-03-01']),
+        'capacidade_litros': [100.0, 100.0, 50.0, 50.0],
+        'residuo_kg': [60.0, 60.0, 30.0, 30.0],
+        'emissoes_evitadas_tco2eq': [1.0, 1.0, 1.0, 1.0]
+    })
+    df_gastos = preparar_gastos(pd.DataFrame({
+        'id_gasto': ['minhoca', 'serragem', 'homi'],
+        'nome_gasto': ['Minhocas', 'Serragem', 'Composteira'],
+        'data_compra': pd.to_datetime(['2024-01-05', '2024-01-06', '2024-01-07']),
+        'valor': [10.0, 100.0, 5.0],
+        'id_escola': [None, None, 'E2']
+    }))
+    return df_creditos, df_gastos
+
+def test_rateio_divide_gastos_gerais_em_centavos_exatos():
+    df_creditos, df_gastos = _tabelas()
+    custos = ratear_gastos_gerais(custo_por_escola(agregar_gastos(df_gastos), df_creditos)).set_index('id_escola')
+    assert ESCOLA_GERAL not in custos.index
+    # R$ 110,00 gerais na proporção 2:1:1 das emissões evitadas
+    assert custos['rateio_geral_centavos'].to_dict() == {'E1': 5500, 'E2': 2750, 'E3': 2750}
+    assert custos.loc['E2', 'custo_total_por_tco2eq'] == 32.5
+
+def test_rateio_distribui_as_sobras_do_arredondamento():
+    custos = pd.DataFrame({'id_escola': ['A', 'B', 'C', ESCOLA_GERAL], 'gasto_centavos': [0, 0, 0, 100],
+                           'emissoes_evitadas_tco2eq': [1.0, 1.0, 1.0, 3.0]})
+    rateio = ratear_gastos_gerais(custos)['rateio_geral_centavos']
+    assert rateio.sum() == 100
+    assert sorted(rateio) == [33, 33, 34]
+
+def test_relatorio_inclui_rateio_e_plotlyjs_embutido():
+    df_creditos, df_gastos = _tabelas()
+    resumo = preparar_dados(df_creditos, df_gastos)['resumo']
+    assert resumo.loc['E2', 'gasto_centavos'] == 500
+    assert resumo.loc['E1', 'rateio_geral_centavos'] == 5500
+
+    conteudo = empacotar_relatorios(df_creditos, df_gastos, processos=1, embutir_plotlyjs=True)
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+        assert sorted(pacote.namelist()) == ['relatorio_E1.html', 'relatorio_E2.html', 'relatorio_E3.html']
+        relatorio = pacote.read('relatorio_E2.html').decode('utf-8')
+    assert ARQUIVO_PLOTLYJS not in relatorio
+    assert "R$ 27,50" in relatorio and "R$ 32,50" in relatorio
+
+def test_pacote_leva_o_plotlyjs_uma_vez_por_padrao():
+    df_creditos, df_gastos = _tabelas()
+    conteudo = empacotar_relatorios(df_creditos, df_gastos, processos=1)
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+        assert ARQUIVO_PLOTLYJS in pacote.namelist()
+        assert f'src="{ARQUIVO_PLOTLYJS}"' in pacote.read('relatorio_E1.html').decode('utf-8')
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from calculos import calcular_emissoes_evitadas_reator_detalhado
+from sensibilidade import (PARAMETROS_SENSIBILIDADE, contribuicoes, dados_tornado, elasticidades_frota,
+                           verificar_por_perturbacao)
+
+TOLERANCIA = 1e-8  # diferenças centrais com passo 1e-5 erram ~1e-11
+
+@pytest.mark.parametrize('capacidade, periodo_anos, k_ano', [
+    (10.0, 10, 0.06),    # reator pequeno: f_aberto saturado em 1
+    (37.24, 10, 0.06),
+    (100.0, 10, 0.06),
+    (100.0, 1, 0.06),
+    (250.0, 20, 0.12),
+    (37.24, 5, 0.03)
+])
+def test_elasticidades_analiticas_conferem_com_perturbacao(capacidade, periodo_anos, k_ano):
+    verificacao = verificar_por_perturbacao(capacidade, periodo_anos, k_ano)
+    assert verificacao['parametro'].tolist() == PARAMETROS_SENSIBILIDADE
+    assert verificacao['erro_absoluto'].max() < TOLERANCIA
+
+def test_caso_saturado_realmente_satura():
+    # Com 10 L o resíduo fica abaixo de 50 kg × 8/24: todo o N₂O do aterro é da fase aberta
+    s, _ = contribuicoes([10.0])
+    assert s.loc[0, 'E_fechado'] == 0.0
+    assert s.loc[0, 'E_aberto'] != 0.0
+
+def test_emissoes_de_contribuicoes_batem_com_o_modelo():
+    _, emissoes = contribuicoes([10.0, 37.24, 100.0], periodo_anos=10, k_ano=0.06)
+    esperado = [calcular_emissoes_evitadas_reator_detalhado(c, 10, 0.06)['emissoes_evitadas_tco2eq']
+                for c in (10.0, 37.24, 100.0)]
+    np.testing.assert_allclose(emissoes, esperado, rtol=1e-10)
+
+def test_frota_e_a_media_das_escolas_ponderada_pelas_emissoes():
+    df_creditos = pd.DataFrame({'id_escola': ['E1', 'E1', 'E2', 'E3', 'E3', 'E3'],
+                                'capacidade_litros': [10.0, 100.0, 37.24, 50.0, 50.0, 250.0]})
+    frota, por_escola = elasticidades_frota(df_creditos, periodo_anos=10, k_ano=0.06)
+    assert list(por_escola.index) == ['E1', 'E2', 'E3']
+    assert list(por_escola.columns) == PARAMETROS_SENSIBILIDADE
+
+    _, emissoes = contribuicoes(df_creditos['capacidade_litros'], 10, 0.06)
+    por_escola_emissoes = pd.Series(emissoes).groupby(df_creditos['id_escola']).sum()
+    recomposta = por_escola.mul(por_escola_emissoes, axis=0).sum() / por_escola_emissoes.sum()
+    pd.testing.assert_series_equal(recomposta, frota, check_names=False, rtol=1e-12)
+
+    # Uma escola sozinha tem a elasticidade da própria frota
+    frota_e2, _ = elasticidades_frota(df_creditos[df_creditos['id_escola'] == 'E2'], 10, 0.06)
+    pd.testing.assert_series_equal(por_escola.loc['E2'], frota_e2, check_names=False, rtol=1e-12)
+
+def test_parametros_multiplicativos_tem_mesma_elasticidade():
+    frota, _ = elasticidades_frota(pd.DataFrame({'id_escola': ['E1'], 'capacidade_litros': [100.0]}))
+    assert frota['DOC'] == frota['DOCf'] == frota['MCF'] == frota['F'] == frota['phi']
+    assert frota['densidade_kg_l'] == pytest.approx(1.0, abs=0.05)
+
+def test_dados_tornado_simetrico_e_ordenado():
+    elasticidades = pd.Series({'a': 0.5, 'b': -1.0, 'c': 0.1})
+    df = dados_tornado(elasticidades, emissoes_totais=2.0, variacao=0.1)
+    mais = df[df['cenario'] == '+10%']
+    assert mais['parametro'].tolist() == ['c', 'a', 'b']
+    assert mais['impacto_tco2eq'].tolist() == pytest.approx([0.02, 0.1, -0.2])
+    assert df[df['cenario'] == '-10%']['impacto_tco2eq'].tolist() == pytest.approx([-0.02, -0.1, 0.2])
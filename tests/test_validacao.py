@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import dados
+from dados import ESQUEMA_PLANILHA, FORMATO_DATA_PLANILHA, formato_data_provavel, validar_aba
+
+def test_ids_inteiros_lidos_como_float_viram_texto_sem_decimal():
+    # Coluna com célula vazia chega como float (7.0); nas outras abas o mesmo id é "7"
+    reatores = pd.DataFrame({'id_reator': ['R1', 'R2', 'R3'], 'id_escola': [7.0, np.nan, 12.5]})
+    df, _ = validar_aba(reatores, 'reatores')
+    assert df['id_escola'].tolist()[0] == "7"
+    assert df['id_escola'].tolist()[2] == "12.5"
+
+def test_ids_em_coluna_object_mista():
+    escolas = pd.DataFrame({'id_escola': pd.Series([7.0, "EEI_PN", 8], dtype=object)})
+    df, _ = validar_aba(escolas, 'escolas')
+    assert df['id_escola'].tolist() == ["7", "EEI_PN", "8"]
+
+def test_datas_em_formatos_mistos_sem_perdas():
+    reatores = pd.DataFrame({'id_reator': ['R1', 'R2', 'R3', 'R4'],
+                             'data_encheu': pd.Series(['05/02/2025', '2025-03-01', ' 10/04/2025 ', 'ontem'],
+                                                      dtype=object)})
+    df, erros = validar_aba(reatores, 'reatores')
+    assert df['data_encheu'].tolist()[:3] == [pd.Timestamp('2025-02-05'), pd.Timestamp('2025-03-01'),
+                                              pd.Timestamp('2025-04-10')]
+    assert pd.isna(df['data_encheu'].iloc[3])
+    assert erros[erros['coluna'] == 'data_encheu']['linha'].tolist() == [5]
+
+def test_formato_explicito_por_coluna():
+    # O formato vem do chamador (ou da amostra da própria coluna), sem estado entre leituras
+    reatores = pd.DataFrame({'id_reator': ['R1'], 'data_encheu': pd.Series(['2003-02-01'], dtype=object)})
+    df, _ = validar_aba(reatores, 'reatores', formatos_data={'data_encheu': '%Y-%m-%d'})
+    assert df['data_encheu'].iloc[0] == pd.Timestamp('2003-02-01')
+    assert formato_data_provavel(pd.Series(['2025-01-31', '2025-02-28'])) == '%Y-%m-%d'
+
+def test_formato_declarado_no_esquema_dispensa_a_amostra(monkeypatch):
+    def amostrar(*args, **kwargs):
+        raise AssertionError("coluna com formato declarado não deveria ser amostrada")
+    monkeypatch.setattr(dados, 'formato_data_provavel', amostrar)
+    for coluna, aba in [('data_encheu', 'reatores'), ('data_colheita', 'reatores'), ('data_compra', 'gastos')]:
+        assert ESQUEMA_PLANILHA[aba][coluna][3] == FORMATO_DATA_PLANILHA
+    reatores = pd.DataFrame({'id_reator': ['R1', 'R2'],
+                             'data_encheu': pd.Series(['05/02/2025', '06/02/2025'], dtype=object),
+                             'data_colheita': pd.to_datetime(['2025-03-01', None])})
+    df, erros = validar_aba(reatores, 'reatores')
+    assert df['data_encheu'].tolist() == [pd.Timestamp('2025-02-05'), pd.Timestamp('2025-02-06')]
+    assert df['data_colheita'].iloc[0] == pd.Timestamp('2025-03-01')
+    assert erros.empty
+
+def test_numeros_seriais_do_excel_em_coluna_mista():
+    reatores = pd.DataFrame({'id_reator': ['R1', 'R2', 'R3', 'R4'],
+                             'data_encheu': pd.Series(['05/02/2025', 45000, 45000.5,
+                                                       datetime.datetime(2025, 3, 1)], dtype=object)})
+    df, erros = validar_aba(reatores, 'reatores')
+    assert df['data_encheu'].tolist() == [pd.Timestamp('2025-02-05'), pd.Timestamp('2023-03-15'),
+                                          pd.Timestamp('2023-03-15 12:00'), pd.Timestamp('2025-03-01')]
+    assert erros.empty
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+import valoracao
+from valoracao import _cotacao_em, atualizar_historico, carregar_historico, valorar_creditos
+
+def _historico():
+    # Pregões em 02/01, 03/01 e 08/01 (sem cotação no fim de semana)
+    return pd.DataFrame({'data': pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-08']),
+                         'preco_brl': [100.0, 110.0, 130.0]})
+
+def test_cotacao_em_usa_o_ultimo_pregao_ate_a_data():
+    datas = pd.Series(pd.to_datetime(['2024-01-06', '2024-01-01', '2024-01-03', None, '2024-02-01']))
+    precos = _cotacao_em(datas, _historico())
+    # Ordem de entrada preservada; antes do histórico e datas vazias ficam NaN
+    np.testing.assert_array_equal(precos, [110.0, np.nan, 110.0, np.nan, 130.0])
+
+def test_valorar_creditos_soma_por_escola_e_por_mes():
+    df_creditos = pd.DataFrame({
+        'id_reator': ['R1', 'R2', 'R3'],
+        'id_escola': ['E1', 'E1', 'E2'],
+        'nome_escola': ['Escola 1', 'Escola 1', 'Escola 2'],
+        'data_encheu': pd.to_datetime(['2024-01-02', '2024-01-05', '2023-12-20']),
+        'data_colheita': pd.to_datetime(['2024-01-08', None, None]),
+        'emissoes_evitadas_tco2eq': [1.0, 2.0, 3.0]
+    })
+    resultado = valorar_creditos(df_creditos, _historico(), preco_atual_brl=200.0, dias_vermicompostagem=3)
+
+    por_reator = resultado['por_reator'].set_index('id_reator')
+    assert por_reator['valor_safra_brl'].tolist()[:2] == [100.0, 220.0]
+    assert np.isnan(por_reator.loc['R3', 'valor_safra_brl'])
+    # Sem data de colheita, vale a maturação prevista (05/01 + 3 dias = 08/01)
+    assert por_reator.loc['R2', 'preco_colheita_brl'] == 130.0
+    assert por_reator.loc['R1', 'marcacao_mercado_brl'] == 100.0
+
+    por_escola = resultado['por_escola'].set_index('id_escola')
+    assert por_escola.loc['E1', 'valor_safra_brl'] == 320.0
+    assert por_escola.loc['E1', 'valor_atual_brl'] == 600.0
+    # Escola sem nenhuma cotação na safra fica NaN, não R$ 0,00
+    assert np.isnan(por_escola.loc['E2', 'valor_safra_brl'])
+
+    por_mes = resultado['por_mes'].set_index('mes')
+    assert por_mes.loc[pd.Timestamp('2024-01-01'), 'emissoes_evitadas_tco2eq'] == 3.0
+    assert por_mes.loc[pd.Timestamp('2023-12-01'), 'valor_atual_brl'] == 600.0
+
+def test_atualizar_historico_cria_pasta_e_acrescenta_so_dias_novos(tmp_path, monkeypatch):
+    fechamentos = {
+        'CO2.L': pd.Series([80.0, 82.0, 84.0], index=pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04'])),
+        'EURBRL=X': pd.Series([5.0, 5.5], index=pd.to_datetime(['2024-01-02', '2024-01-04']))
+    }
+    pedidos = []
+    def fechamentos_falsos(ticker, inicio):
+        pedidos.append(inicio)
+        serie = fechamentos[ticker]
+        return serie[serie.index >= pd.Timestamp(inicio)]
+    monkeypatch.setattr(valoracao, '_fechamentos', fechamentos_falsos)
+    caminho = tmp_path / "cache" / "cotacoes.csv"
+
+    assert atualizar_historico(str(caminho), inicio="2024-01-02") == 3
+    assert atualizar_historico(str(caminho), inicio="2024-01-02") == 0
+    assert pedidos[-1] == "2024-01-05"
+    historico = carregar_historico(str(caminho))
+    # EUR/BRL de 03/01 repete o último conhecido
+    assert historico['preco_brl'].tolist() == pytest.approx([400.0, 410.0, 462.0])
+
+def test_carregar_historico_sem_arquivo_fica_vazio(tmp_path):
+    assert carregar_historico(str(tmp_path / "nao_existe.csv")).empty
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from carga import iniciar_servidor
+from dados import gerar_planilha_sintetica
+from wake_up_bot import abrir_sessao_aquecimento, localizar_servidor, main
+
+@pytest.fixture(scope="module")
+def servidor(tmp_path_factory):
+    # Servidor Streamlit local com uma planilha sintética pequena, no lugar do app publicado
+    planilha = gerar_planilha_sintetica(str(tmp_path_factory.mktemp("planilha") / "sintetica.xlsx"), 200)
+    processo, url_base = iniciar_servidor(planilha)
+    yield url_base
+    processo.terminate()
+    processo.wait()
+
+def test_sonda_de_saude_encontra_o_servidor_local(servidor):
+    url_base, segundos = localizar_servidor(servidor)
+    assert url_base == servidor
+    assert segundos >= 0
+
+def test_sonda_de_saude_sem_servidor():
+    assert localizar_servidor("http://127.0.0.1:9/", timeout=2)[0] is None
+
+def test_aquecimento_mede_o_primeiro_dado(servidor):
+    metricas = abrir_sessao_aquecimento(servidor, timeout=120)
+    assert metricas['excecoes'] == 0
+    assert metricas['primeiro_elemento_s'] <= metricas['primeiro_dado_s'] <= metricas['script_concluido_s']
+    assert metricas['elementos'] > 0
+
+def test_main_contra_o_servidor_local(servidor, capsys):
+    assert main(["--url", servidor, "--timeout", "120"]) == 0
+    assert "Primeiro dado" in capsys.readouterr().out
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Valoração dos créditos por safra: cada reator é avaliado pelas cotações do
+CO2.L (€) e do EUR/BRL na data em que encheu e na data da colheita, por meio
+de junções as-of vetorizadas contra um histórico local de cotações, além do
+valor pela cotação atual e da marcação a mercado.
+
+    python valoracao.py --atualizar   # baixa as cotações que faltam no histórico local
+
+O histórico fica fora da pasta do projeto (que no Streamlit Cloud pode ser
+só leitura ou recriada a cada deploy): em COTACOES_HISTORICAS, se definida,
+ou na pasta temporária do sistema.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from agenda import DIAS_VERMICOMPOSTAGEM
+
+CAMINHO_COTACOES = os.environ.get("COTACOES_HISTORICAS") or os.path.join(tempfile.gettempdir(), "vermicompostagem",
+                                                                         "cotacoes_historicas.csv")
+INICIO_HISTORICO = "2023-01-01"
+COLUNAS_COTACOES = ['data', 'preco_co2_eur', 'taxa_eurbrl']
+
+# =============================================================================
+# HISTÓRICO LOCAL DE COTAÇÕES
+# =============================================================================
+
+def carregar_historico(caminho=CAMINHO_COTACOES):
+    """
+    Histórico diário ordenado por data, com 'preco_brl' (CO2.L × EUR/BRL).
+    Dias sem uma das cotações repetem a última conhecida. Vazio se não houver arquivo.
+    """
+    if not os.path.exists(caminho):
+        return pd.DataFrame(columns=COLUNAS_COTACOES + ['preco_brl'])
+    df = pd.read_csv(caminho, parse_dates=['data']).sort_values('data', ignore_index=True)
+    df[['preco_co2_eur', 'taxa_eurbrl']] = df[['preco_co2_eur', 'taxa_eurbrl']].ffill()
+    df = df.dropna(subset=['preco_co2_eur', 'taxa_eurbrl'])
+    df['preco_brl'] = df['preco_co2_eur'] * df['taxa_eurbrl']
+    return df.reset_index(drop=True)
+
+def _fechamentos(ticker, inicio):
+    import yfinance as yf
+    fechamento = yf.Ticker(ticker).history(start=inicio)['Close']
+    fechamento.index = fechamento.index.tz_localize(None).normalize()
+    return fechamento
+
+def atualizar_historico(caminho=CAMINHO_COTACOES, inicio=INICIO_HISTORICO):
+    """
+    Baixa do Yahoo Finance só os dias posteriores ao último gravado e regrava
+    o arquivo. Sem acesso à internet, mantém o histórico como está.
+    Retorna o número de dias acrescentados.
+    """
+    existente = pd.read_csv(caminho, parse_dates=['data']) if os.path.exists(caminho) else None
+    if existente is not None and not existente.empty:
+        inicio = (existente['data'].max() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    try:
+        novas = pd.concat({'preco_co2_eur': _fechamentos("CO2.L", inicio),
+                           'taxa_eurbrl': _fechamentos("EURBRL=X", inicio)}, axis=1)
+    except Exception:
+        return 0
+    novas = novas.rename_axis('data').reset_index()
+    novas = novas[novas['data'] >= pd.Timestamp(inicio)]
+    if novas.empty:
+        return 0
+    df = novas if existente is None else pd.concat([existente, novas], ignore_index=True)
+    df = df.drop_duplicates(subset=['data'], keep='last').sort_values('data')
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    # Grava num arquivo ao lado e troca de uma vez: quem lê nunca vê um CSV pela metade
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    df[COLUNAS_COTACOES].to_csv(temporario, index=False, date_format='%Y-%m-%d')
+    os.replace(temporario, caminho)
+    return len(novas)
+
+# =============================================================================
+# VALORAÇÃO POR SAFRA (JUNÇÃO AS-OF)
+# =============================================================================
+
+def _cotacao_em(datas, historico):
+    """Cotação (R$/tCO₂eq) vigente em cada data: a do último pregão até ela; NaN antes do histórico."""
+    consulta = pd.DataFrame({'data': datas.astype('datetime64[ns]'), 'ordem': np.arange(len(datas))})
+    consulta = consulta.dropna(subset=['data']).sort_values('data')
+    cotacoes = historico[['data', 'preco_brl']].astype({'data': 'datetime64[ns]'})
+    juncao = pd.merge_asof(consulta, cotacoes, on='data', direction='backward')
+    precos = np.full(len(datas), np.nan)
+    precos[juncao['ordem'].to_numpy()] = juncao['preco_brl'].to_numpy()
+    return precos
+
+def valorar_creditos(df_creditos, historico, preco_atual_brl, dias_vermicompostagem=DIAS_VERMICOMPOSTAGEM):
+    """
+    Valor de cada reator na safra (cotação em data_encheu), na colheita
+    (data_colheita ou, sem ela, a maturação prevista) e pela cotação atual,
+    com a marcação a mercado (atual - safra). Retorna {'por_reator',
+    'por_escola', 'por_mes'}, agregados a partir da mesma tabela.
+    """
+    colunas = ['id_reator', 'id_escola', 'nome_escola', 'data_encheu', 'emissoes_evitadas_tco2eq']
+    df = df_creditos[[col for col in colunas if col in df_creditos.columns]].copy()
+    encheu = df['data_encheu']
+    if 'data_colheita' in df_creditos.columns:
+        colheita = df_creditos['data_colheita'].fillna(encheu + pd.Timedelta(days=dias_vermicompostagem))
+    else:
+        colheita = encheu + pd.Timedelta(days=dias_vermicompostagem)
+    df['data_colheita'] = colheita
+    toneladas = df['emissoes_evitadas_tco2eq'].to_numpy(dtype=float)
+    df['preco_safra_brl'] = _cotacao_em(encheu, historico)
+    df['preco_colheita_brl'] = _cotacao_em(colheita, historico)
+    df['valor_safra_brl'] = toneladas * df['preco_safra_brl']
+    df['valor_colheita_brl'] = toneladas * df['preco_colheita_brl']
+    df['valor_atual_brl'] = toneladas * preco_atual_brl
+    df['marcacao_mercado_brl'] = df['valor_atual_brl'] - df['valor_safra_brl']
+
+    valores = ['emissoes_evitadas_tco2eq', 'valor_safra_brl', 'valor_colheita_brl', 'valor_atual_brl',
+               'marcacao_mercado_brl']
+    def somar_por(chave):
+        # min_count=1: grupos sem nenhuma cotação ficam NaN em vez de R$ 0,00
+        return df.groupby(chave, observed=True)[valores].sum(min_count=1).reset_index()
+    return {
+        'por_reator': df,
+        'por_escola': somar_por(df['id_escola'].astype(str).rename('id_escola')),
+        'por_mes': somar_por(encheu.dt.to_period('M').dt.to_timestamp().rename('mes'))
+    }
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valoração dos créditos de carbono por safra.")
+    parser.add_argument("--atualizar", action="store_true", help="Baixa as cotações que faltam no histórico")
+    parser.add_argument("--planilha", default="dados_vermicompostagem_real.xlsx", help="Caminho ou URL da planilha")
+    args = parser.parse_args(argv)
+    if args.atualizar:
+        print(f"📥 {atualizar_historico()} dia(s) acrescentado(s) em {CAMINHO_COTACOES}")
+    historico = carregar_historico()
+    if historico.empty:
+        print("ℹ️ Histórico de cotações vazio; rode com --atualizar (requer internet).")
+        return 1
+
+    from calculos import DENSIDADE_PADRAO, calcular_creditos_reatores
+    from dados import compactar_tabelas, ler_planilha
+    df_escolas, df_reatores, _ = ler_planilha(args.planilha, DENSIDADE_PADRAO)
+    df_escolas, df_reatores = compactar_tabelas(df_escolas, df_reatores)
+    df_creditos, _, _ = calcular_creditos_reatores(df_reatores, df_escolas)
+    inicio = time.perf_counter()
+    valoracao = valorar_creditos(df_creditos, historico, historico['preco_brl'].iloc[-1])
+    print(f"⏱️ Valoração de {len(df_creditos)} reatores em {time.perf_counter() - inicio:.3f} s")
+    print(valoracao['por_escola'].to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
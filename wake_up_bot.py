@@ -1,42 +1,168 @@
+import argparse
+import sys
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+
+import requests
+from websockets.sync.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
 # ⚠️ Única linha que muda de um app para outro:
 APP_URL = "https://escolasrp.streamlit.app/"
 
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--disable-gpu")
-options.add_argument("--window-size=1920,1080")
+# O Streamlit Community Cloud publica o servidor sob "/~/+/"; localmente ele fica na raiz.
+PREFIXOS_SERVIDOR = ["", "~/+/"]
+TEXTO_APP_DORMINDO = "Yes, get this app back up!"
+# Primeiro conteúdo útil da página (métricas, tabelas, gráficos), em vez do título
+ELEMENTOS_DE_DADOS = {"metric", "dataframe", "table", "plotly_chart"}
+
+
+def localizar_servidor(app_url, timeout=30):
+    """
+    Procura o endpoint de saúde do Streamlit e retorna (url_base, segundos).
+    Retorna (None, segundos) se o app estiver dormindo ou inacessível.
+    """
+    app_url = app_url.rstrip("/") + "/"
+    inicio = time.perf_counter()
+    for prefixo in PREFIXOS_SERVIDOR:
+        base = app_url + prefixo
+        try:
+            resposta = requests.get(base + "_stcore/health", timeout=timeout)
+        except requests.RequestException:
+            continue
+        if resposta.status_code == 200 and resposta.text.strip() == "ok":
+            return base, time.perf_counter() - inicio
+    return None, time.perf_counter() - inicio
+
+
+def app_esta_dormindo(app_url, timeout=30):
+    try:
+        resposta = requests.get(app_url, timeout=timeout)
+    except requests.RequestException:
+        return False
+    return TEXTO_APP_DORMINDO in resposta.text
 
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
 
-try:
-    driver.get(APP_URL)
-    WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located((By.TAG_NAME, "body"))
-    )
-    time.sleep(5)
+def acordar_app(app_url, timeout=120):
+    """
+    Clica no botão "Yes, get this app back up!" da página do Community Cloud
+    (Chrome headless via Selenium) e espera o servidor responder.
+    Retorna (url_base, segundos) ou (None, segundos).
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
 
+    options = webdriver.ChromeOptions()
+    for argumento in ("--headless", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu",
+                      "--window-size=1920,1080"):
+        options.add_argument(argumento)
+    inicio = time.perf_counter()
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
     try:
-        wake_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//button[contains(text(), 'Yes, get this app back up!')]")
-            )
-        )
-        wake_button.click()
-        print("✅ Botão de acordar clicado! Aguardando o app iniciar...")
-        time.sleep(20)
-    except:
-        print("ℹ️ App já está acordado ou botão não encontrado.")
-
-finally:
-    driver.quit()
+        driver.get(app_url)
+        botao = WebDriverWait(driver, 30).until(EC.element_to_be_clickable(
+            (By.XPATH, f"//button[contains(text(), '{TEXTO_APP_DORMINDO}')]")))
+        botao.click()
+    finally:
+        driver.quit()
+    while time.perf_counter() - inicio < timeout:
+        url_base, _ = localizar_servidor(app_url, timeout=30)
+        if url_base is not None:
+            return url_base, time.perf_counter() - inicio
+        time.sleep(5)
+    return None, time.perf_counter() - inicio
+
+
+def url_websocket(url_base):
+    return url_base.replace("https://", "wss://").replace("http://", "ws://") + "_stcore/stream"
+
+
+def executar_script(ws, query_string="", timeout=120, widget_states=None, ao_receber=None):
+    """
+    Pede uma execução do script na sessão aberta em 'ws' (com os valores de
+    widgets em 'widget_states', se houver) e mede o tempo até o primeiro
+    elemento (o título), até o primeiro dado (métrica, tabela ou gráfico) e
+    até o fim do script. Reexecuções pedidas pelo próprio
+    script (st.rerun) entram na mesma medição. 'ao_receber' recebe cada
+    ForwardMsg.
+    """
+    pedido = BackMsg()
+    pedido.rerun_script.query_string = query_string
+    if widget_states is not None:
+        pedido.rerun_script.widget_states.CopyFrom(widget_states)
+    metricas = {'primeiro_elemento_s': None, 'primeiro_dado_s': None, 'script_concluido_s': None,
+                'elementos': 0, 'excecoes': 0}
+    inicio = time.perf_counter()
+    ws.send(pedido.SerializeToString())
+    while True:
+        restante = timeout - (time.perf_counter() - inicio)
+        if restante <= 0:
+            raise TimeoutError("O app não concluiu a execução dentro do tempo limite.")
+        msg = ForwardMsg()
+        msg.ParseFromString(ws.recv(timeout=restante))
+        if ao_receber is not None:
+            ao_receber(msg)
+        tipo = msg.WhichOneof('type')
+        if tipo == 'delta':
+            metricas['elementos'] += 1
+            tipo_elemento = msg.delta.new_element.WhichOneof('type')
+            if tipo_elemento == 'exception':
+                metricas['excecoes'] += 1
+            if metricas['primeiro_elemento_s'] is None:
+                metricas['primeiro_elemento_s'] = time.perf_counter() - inicio
+            if metricas['primeiro_dado_s'] is None and tipo_elemento in ELEMENTOS_DE_DADOS:
+                metricas['primeiro_dado_s'] = time.perf_counter() - inicio
+        elif tipo == 'script_finished' and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+            metricas['script_concluido_s'] = time.perf_counter() - inicio
+            return metricas
+
+
+def abrir_sessao_aquecimento(url_base, timeout=120):
+    """
+    Abre uma sessão do app pelo websocket do Streamlit (sem navegador) com
+    ?aquecer=1 e mede o tempo até o primeiro elemento, o primeiro dado e o fim do script.
+    """
+    with connect(url_websocket(url_base), open_timeout=timeout, max_size=None) as ws:
+        return executar_script(ws, "aquecer=1", timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantém o app acordado e pré-carrega os caches.")
+    parser.add_argument("--url", default=APP_URL, help="URL do app (ex.: http://localhost:8501/)")
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo limite em segundos")
+    args = parser.parse_args(argv)
+
+    url_base, tempo_saude = localizar_servidor(args.url, timeout=args.timeout)
+    if url_base is None:
+        if not app_esta_dormindo(args.url, timeout=args.timeout):
+            print("❌ Servidor do app inacessível.")
+            return 1
+        print("😴 O app está dormindo; clicando no botão para acordá-lo...")
+        try:
+            url_base, tempo_saude = acordar_app(args.url, timeout=args.timeout)
+        except Exception as e:
+            print(f"❌ Não foi possível acordar o app: {e}")
+            return 1
+        if url_base is None:
+            print("❌ O app não voltou dentro do tempo limite.")
+            return 1
+    print(f"✅ Servidor respondeu em {tempo_saude:.2f} s ({url_base})")
+
+    try:
+        metricas = abrir_sessao_aquecimento(url_base, timeout=args.timeout)
+    except Exception as e:
+        print(f"❌ Falha na sessão de aquecimento: {e}")
+        return 1
+    print(f"⏱️ Primeiro elemento: {metricas['primeiro_elemento_s']:.2f} s")
+    if metricas['primeiro_dado_s'] is not None:
+        print(f"⏱️ Primeiro dado (métrica, tabela ou gráfico): {metricas['primeiro_dado_s']:.2f} s")
+    print(f"⏱️ Execução completa: {metricas['script_concluido_s']:.2f} s ({metricas['elementos']} elementos)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())